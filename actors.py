@@ -0,0 +1,152 @@
+import asyncio
+import time
+
+
+class UserActors:
+    """
+    runs each user's commands one at a time, in arrival order: one mailbox and
+    one worker task per user with something to do. different users never wait
+    on each other. a worker that has been idle for `idle` seconds exits and
+    drops its mailbox; the next command for that user starts a fresh one.
+    """
+
+    def __init__(self, idle=30.0, on_wait=None):
+        self.idle = idle
+        self.on_wait = on_wait  # (fn, seconds it sat in the mailbox), called before it runs
+        self.started = 0
+        self.reaped = 0
+        self._mailboxes = {}  # user_id -> asyncio.Queue
+        self._workers = set()  # the loop only keeps weak references to tasks
+
+    def __len__(self):
+        return len(self._mailboxes)
+
+    def queued(self):
+        return sum(q.qsize() for q in self._mailboxes.values())
+
+    async def run(self, user_id, fn, *args):
+        """runs `await fn(*args)` in the user's turn and returns its result."""
+        future = asyncio.get_running_loop().create_future()
+        mailbox = self._mailboxes.get(user_id)
+        if mailbox is None:
+            mailbox = self._mailboxes[user_id] = asyncio.Queue()
+            worker = asyncio.create_task(self._work(user_id, mailbox))
+            self._workers.add(worker)
+            worker.add_done_callback(self._workers.discard)
+            self.started += 1
+        mailbox.put_nowait((fn, args, future, time.perf_counter()))
+        return await future
+
+    async def _work(self, user_id, mailbox):
+        while True:
+            try:
+                fn, args, future, queued_at = await asyncio.wait_for(mailbox.get(), self.idle)
+            except asyncio.TimeoutError:
+                if mailbox.empty():
+                    # nothing can be queued between this check and the pop
+                    del self._mailboxes[user_id]
+                    self.reaped += 1
+                    return
+                continue
+
+            if future.cancelled():
+                continue
+            if self.on_wait:
+                self.on_wait(fn, time.perf_counter() - queued_at)
+            try:
+                result = await fn(*args)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+
+if __name__ == "__main__":
+    # stress: thousands of concurrent guesses from many users through main.py's
+    # real guess command (with bench.py's fake discord objects). every ranked
+    # game must reach finish_ranked exactly once and every user's guesses must
+    # run in order, one at a time
+    import os
+    import random
+    import shutil
+    import sys
+
+    import bench
+
+    USERS = 500
+    GUESSES_PER_USER = 20
+
+    scratch = bench.scratch_dir()
+    sys.path.insert(0, bench.HERE)
+    os.chdir(scratch)
+    import main as bot
+
+    rng = random.Random(0)
+    bot.actors.idle = 0.05
+    finishes = {uid: 0 for uid in range(USERS)}
+    order = {uid: [] for uid in range(USERS)}
+    in_turn = set()
+
+    finish_ranked = bot.finish_ranked
+
+    def counted_finish(user_id, guesses, won):
+        finishes[user_id] += 1
+        return finish_ranked(user_id, guesses, won)
+
+    bot.finish_ranked = counted_finish
+
+    play_guess = bot.play_guess
+
+    async def watched_play_guess(ctx, word):
+        uid = ctx.author.id
+        assert uid not in in_turn, "two commands of one user ran at once"
+        in_turn.add(uid)
+        try:
+            order[uid].append(word)
+            await play_guess(ctx, word)
+        finally:
+            in_turn.discard(uid)
+
+    bot.play_guess = watched_play_guess
+
+    async def main():
+        await bot.setup_hook()
+        stats = {"api_calls": 0}
+        channels = [bench.FakeChannel(bench.FIRST_CHANNEL_ID + i, 0, stats) for i in range(50)]
+        contexts = {
+            uid: bench.FakeContext(bench.FakeMember(uid), channels[uid % len(channels)], bench.FakeGuild())
+            for uid in range(USERS)
+        }
+        await asyncio.gather(*(bot.wordleranked.callback(ctx) for ctx in contexts.values()))
+        answers = {uid: bot.ranked_games[uid].answer for uid in range(USERS)}
+
+        calls = []
+        sent = {uid: [] for uid in range(USERS)}
+        for _ in range(GUESSES_PER_USER):
+            for uid, ctx in contexts.items():
+                word = answers[uid] if rng.random() < 0.05 else rng.choice(bot.ANSWERS)
+                sent[uid].append(word)
+                calls.append(bot.guess.callback(ctx, word))
+
+        t = time.perf_counter()
+        await asyncio.gather(*calls)
+        took = time.perf_counter() - t
+
+        assert all(count == 1 for count in finishes.values()), "a game was scored twice (or never)"
+        assert not bot.ranked_games, "a ranked game never ended"
+        assert order == sent, "guesses ran out of order"
+        await asyncio.sleep(0.2)
+        assert len(bot.actors) == 0, "idle workers were not reaped"
+        print(f"ok: {len(calls)} guesses from {USERS} users in {took:.2f}s, "
+              f"{bot.actors.started} workers started, {bot.actors.reaped} reaped")
+
+    try:
+        asyncio.run(main())
+        bot.storage.close()
+        bot.journal.close()
+        bot.log_listener.stop()
+    finally:
+        os.chdir(bench.HERE)
+        shutil.rmtree(scratch, ignore_errors=True)
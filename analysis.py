@@ -0,0 +1,129 @@
+"""
+post-game analysis: how many answers each guess left, and luck vs skill.
+
+candidates are a bitset over ANSWERS (bit i = ANSWERS[i]) in a python int.
+a guess narrows them by ANDing precomputed sets: "letter l at position i"
+(or its complement) for every position, and "at least / exactly k copies of
+l" for every letter it contains.
+
+skill for a guess is the information it was expected to give over the
+answers still possible (entropy of its feedback), luck is what it actually
+gave (log2 of before/after) minus that.
+"""
+import math
+from collections import Counter
+
+import numpy as np
+
+from feedback import ANSWERS, DECODED, MATRIX, WORD_IDS
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+ALL = (1 << len(ANSWERS)) - 1
+MAX_COPIES = 3  # no answer has a letter more than 3 times
+
+# ---------- bitsets ----------
+AT = [{letter: 0 for letter in LETTERS} for _ in range(5)]  # position -> letter -> answers
+AT_LEAST = {letter: [ALL] + [0] * (MAX_COPIES + 1) for letter in LETTERS}  # letter -> k -> answers
+
+for _i, _answer in enumerate(ANSWERS):
+    _bit = 1 << _i
+    for _pos, _letter in enumerate(_answer):
+        AT[_pos][_letter] |= _bit
+    for _letter, _n in Counter(_answer).items():
+        for _k in range(1, _n + 1):
+            AT_LEAST[_letter][_k] |= _bit
+
+
+def constraint(word, greenlist, yellowlist):
+    """the answers that would give `word` this feedback, as a bitset."""
+    allowed = ALL
+    marked = Counter()
+    grayed = set()
+    for i, letter in enumerate(word):
+        if greenlist[i]:
+            allowed &= AT[i][letter]
+            marked[letter] += 1
+        else:
+            allowed &= ~AT[i][letter]
+            if yellowlist[i]:
+                marked[letter] += 1
+            else:
+                grayed.add(letter)
+
+    for letter in set(word):
+        k = marked[letter]
+        allowed &= AT_LEAST[letter][k]
+        if letter in grayed:
+            # a gray copy means the answer has no more of it than were marked
+            allowed &= ~AT_LEAST[letter][k + 1]
+    return allowed
+
+
+def to_mask(bits):
+    """bitset -> numpy bool array over ANSWERS."""
+    raw = np.frombuffer(bits.to_bytes((len(ANSWERS) + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(raw, bitorder="little", count=len(ANSWERS)).view(bool)
+
+
+# ---------- analysis ----------
+def analyze(answer_id, words):
+    """
+    one row per guess: (word, answers before, answers after, expected bits,
+    actual bits).
+    """
+    rows = []
+    cands = ALL
+    for word in words:
+        code = MATRIX.item(WORD_IDS[word], answer_id)
+        after = cands & constraint(word, *DECODED[code])
+        before_n, after_n = cands.bit_count(), after.bit_count()
+
+        counts = np.bincount(MATRIX[WORD_IDS[word]][to_mask(cands)])
+        p = counts[counts > 0] / before_n
+        expected = max(0.0, float(-(p * np.log2(p)).sum()))
+        actual = math.log2(before_n / after_n)
+
+        rows.append((word, before_n, after_n, expected, actual))
+        cands = after
+    return rows
+
+
+def summary(rows):
+    """(skill, luck) in bits over the whole game."""
+    skill = sum(r[3] for r in rows)
+    luck = sum(r[4] - r[3] for r in rows)
+    return skill, luck
+
+
+def format_analysis(rows):
+    lines = []
+    for n, (word, before, after, expected, actual) in enumerate(rows, start=1):
+        lines.append(f"`{n}` `{word}` {before} -> **{after}** ({actual:.1f}/{expected:.1f} bits)")
+    skill, luck = summary(rows)
+    lines.append(f"skill: **{skill:.1f}** bits expected • luck: **{luck:+.1f}** bits")
+    return "**__analysis__** (words left, bits got/expected)\n" + "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # bitset filtering matches the matrix, and how long a full game takes
+    import random
+    import timeit
+
+    from feedback import WORDS
+    from solver import candidates
+
+    rng = random.Random(0)
+    for _ in range(3000):
+        answer_id = rng.randrange(len(ANSWERS))
+        words = rng.sample(WORDS, rng.randint(1, 6))
+        cands, state = ALL, []
+        for word in words:
+            code = MATRIX.item(WORD_IDS[word], answer_id)
+            cands &= constraint(word, *DECODED[code])
+            state.append((WORD_IDS[word], code))
+            assert np.flatnonzero(to_mask(cands)).tolist() == candidates(state).tolist(), (words, ANSWERS[answer_id])
+
+    games = [(rng.randrange(len(ANSWERS)), rng.sample(WORDS, 6)) for _ in range(500)]
+    took = min(timeit.repeat(lambda: [analyze(a, w) for a, w in games], number=1, repeat=5)) / len(games)
+    print(f"ok, {took * 1e6:.0f} us to analyze a six-guess game")
+    print(format_analysis(analyze(*games[0])))
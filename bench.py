@@ -0,0 +1,265 @@
+"""
+offline load generator: fake discord objects driving the real command
+callbacks from main.py, no gateway connection needed.
+
+    python bench.py --players 2000 --games 3
+    python bench.py --players 500 --think 0.2 --api-latency 0.05 --json before.json
+
+every simulated player plays full games (casual or ranked, guessing random
+words with a chance of hitting the answer) and now and then checks
+!leaderboard, !elo or !rank. main.py is imported inside a scratch directory,
+so the real leaderboard, journal and database are never touched.
+
+board edits share a per-channel rate limit (see board.py), so with few
+channels and no think time guess latency is mostly time spent queued behind
+other players' edits, the same as on discord.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA_FILES = ("words.txt", "answers.txt")
+CACHE_PATTERNS = ("feedback_", "words_", "solver_")  # built caches worth reusing
+FIRST_CHANNEL_ID = 1000  # anything but the slash-only channel
+
+
+# ---------- fake discord layer ----------
+class FakeMessage:
+    def __init__(self, channel, content=None, embed=None):
+        self.channel = channel
+        self.content = content
+        self.embed = embed
+
+    async def edit(self, content=None, embed=None):
+        await self.channel.api_call()
+        self.content = content
+        self.edits = getattr(self, "edits", 0) + 1
+        return self
+
+
+class FakeChannel:
+    def __init__(self, id, latency, stats):
+        self.id = id
+        self.mention = f"<#{id}>"
+        self.latency = latency
+        self.stats = stats
+
+    async def api_call(self):
+        self.stats["api_calls"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def send(self, content=None, embed=None, **kwargs):
+        await self.api_call()
+        return FakeMessage(self, content, embed)
+
+
+class FakeGuild:
+    icon = None  # leaderboard falls back to no thumbnail
+
+    def get_member(self, user_id):
+        return None
+
+
+class FakeMember:
+    def __init__(self, id):
+        self.id = id
+        self.display_name = f"player{id}"
+        self.mention = f"<@{id}>"
+
+
+class FakeContext:
+    def __init__(self, author, channel, guild):
+        self.author = author
+        self.channel = channel
+        self.guild = guild
+        self.interaction = None  # prefix commands, like !guess
+
+    async def send(self, content=None, embed=None, ephemeral=False, **kwargs):
+        return await self.channel.send(content, embed=embed)
+
+
+# ---------- scratch directory ----------
+def scratch_dir():
+    path = tempfile.mkdtemp(prefix="wordle-bench-")
+    for name in os.listdir(HERE):
+        if name in DATA_FILES or name.startswith(CACHE_PATTERNS):
+            os.symlink(os.path.join(HERE, name), os.path.join(path, name))
+    return path
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def percentile(samples, q):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+# ---------- the run ----------
+async def run(args, bot):
+    rng = random.Random(args.seed)
+    stats = {"api_calls": 0}
+    channels = [FakeChannel(FIRST_CHANNEL_ID + i, args.api_latency, stats) for i in range(args.channels)]
+    guild = FakeGuild()
+    latencies = {}  # command -> [seconds]
+    lag = []
+    outcomes = {"win": 0, "loss": 0}
+
+    async def call(name, ctx, *params):
+        t = time.perf_counter()
+        await getattr(bot, name).callback(ctx, *params)
+        latencies.setdefault(name, []).append(time.perf_counter() - t)
+
+    async def think():
+        await asyncio.sleep(rng.expovariate(1 / args.think) if args.think else 0)
+
+    async def player(user_id):
+        ctx = FakeContext(FakeMember(user_id), channels[user_id % len(channels)], guild)
+        for _ in range(args.games):
+            ranked = rng.random() < args.ranked
+            await call("wordleranked" if ranked else "wordle", ctx)
+            games = bot.ranked_games if ranked else bot.games
+            for _ in range(6):
+                await think()
+                game = games.get(user_id)
+                if game is None:
+                    break
+                word = game.answer if rng.random() < args.skill else rng.choice(bot.ANSWERS)
+                await call("guess", ctx, word)
+                if word == game.answer:
+                    outcomes["win"] += 1
+                    break
+            else:
+                outcomes["loss"] += 1
+            if rng.random() < args.lookups:
+                await think()
+                which = rng.choice(("leaderboard", "elo", "rank"))
+                await call(which, ctx, *(() if which == "leaderboard" else (None,)))
+
+    async def probe(stop):
+        while not stop.is_set():
+            t = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag.append(time.perf_counter() - t - 0.005)
+
+    await bot.setup_hook()
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(stop))
+    writes_before = file_writes(bot)
+
+    t = time.perf_counter()
+    await asyncio.gather(*(player(10_000 + i) for i in range(args.players)))
+    took = time.perf_counter() - t
+
+    await asyncio.gather(bot.storage.durable(), bot.journal.durable(), bot.history.durable())
+    stop.set()
+    await prober
+
+    commands = sum(len(v) for v in latencies.values())
+    games = outcomes["win"] + outcomes["loss"]
+    writes = {k: v - writes_before.get(k, 0) for k, v in file_writes(bot).items()}
+    return {
+        "commit": git_commit(),
+        "args": vars(args),
+        "seconds": round(took, 3),
+        "commands": commands,
+        "commands_per_second": round(commands / took, 1),
+        "games": games,
+        "outcomes": outcomes,
+        "latency_ms": {
+            name: {
+                "count": len(samples),
+                "p50": round(percentile(samples, 0.50) * 1000, 3),
+                "p99": round(percentile(samples, 0.99) * 1000, 3),
+            }
+            for name, samples in sorted(latencies.items())
+        },
+        "loop_lag_ms": {
+            "p50": round(percentile(lag, 0.50) * 1000, 3),
+            "p99": round(percentile(lag, 0.99) * 1000, 3),
+            "max": round(max(lag) * 1000, 3),
+        },
+        "file_writes": writes,
+        "file_writes_per_game": round(sum(writes.values()) / max(1, games), 4),
+        "api_calls_per_game": round(stats["api_calls"] / max(1, games), 2),
+        "boards": {"sent": bot.boards.sent, "edits": bot.boards.edits, "coalesced": bot.boards.coalesced},
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def file_writes(bot):
+    writes = {"journal": bot.journal.writes, "history": bot.history.writes}
+    if hasattr(bot.storage, "writer"):
+        writes["leaderboard_file"] = bot.storage.writer.writes
+    else:
+        writes["sqlite_statements"] = bot.metrics.PERSIST_TIME.labels("save_user_stats").count
+    return writes
+
+
+def print_report(result):
+    print(f"commit {result['commit']}: {result['games']} games, {result['commands']} commands "
+          f"in {result['seconds']}s = {result['commands_per_second']} commands/s")
+    print(f"{'command':>14} {'count':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for name, row in result["latency_ms"].items():
+        print(f"{name:>14} {row['count']:>8} {row['p50']:>9.3f} {row['p99']:>9.3f}")
+    lag = result["loop_lag_ms"]
+    print(f"loop lag ms: p50 {lag['p50']}, p99 {lag['p99']}, max {lag['max']}")
+    print(f"file writes: {result['file_writes']} = {result['file_writes_per_game']} per game, "
+          f"{result['api_calls_per_game']} discord calls per game, peak rss {result['peak_rss_mb']} MB")
+    print(f"boards: {result['boards']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="drive the bot's command handlers without discord")
+    parser.add_argument("--players", type=int, default=1000, help="concurrent simulated players")
+    parser.add_argument("--channels", type=int, default=50, help="channels the players are spread over")
+    parser.add_argument("--games", type=int, default=3, help="games per player")
+    parser.add_argument("--ranked", type=float, default=0.5, help="share of games that are ranked")
+    parser.add_argument("--skill", type=float, default=0.25, help="chance a guess is the answer")
+    parser.add_argument("--lookups", type=float, default=0.3, help="chance of a leaderboard/elo/rank after a game")
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds between a player's commands")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="seconds each fake discord call takes")
+    parser.add_argument("--storage", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results here")
+    args = parser.parse_args()
+
+    scratch = scratch_dir()
+    os.environ["STORAGE_BACKEND"] = args.storage
+    sys.path.insert(0, HERE)
+    os.chdir(scratch)
+    try:
+        import main as bot
+        result = asyncio.run(run(args, bot))
+        bot.storage.close()
+        bot.journal.close()
+        bot.log_listener.stop()
+    finally:
+        os.chdir(HERE)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
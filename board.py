@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+
+import discord
+
+log = logging.getLogger("wordle.game")
+
+
+class _Board:
+    __slots__ = ("message", "channel", "pending", "task", "last_edit", "final", "wake")
+
+    def __init__(self, message, channel):
+        self.message = message
+        self.channel = channel
+        self.pending = None  # newest text not yet on the message
+        self.task = None
+        self.last_edit = time.monotonic()
+        self.final = False  # game over, the last edit skips the throttle
+        self.wake = asyncio.Event()
+
+
+class BoardMessages:
+    """
+    one board message per game, edited in place after each guess instead of
+    sending a new one.
+
+    edits are coalesced: show() only stores the newest text, and one task per
+    board applies it. that task waits at least `min_interval` between edits of
+    the same board and `bucket_interval` between any two edits in the same
+    channel (message edits share the channel's rate-limit bucket), so a burst
+    of guesses turns into one edit with the latest board. finish() puts the
+    final board up right away, so a game's result never waits for a slot.
+
+    slash-command guesses still answer their interaction directly, since
+    discord requires a response to every interaction.
+    """
+
+    def __init__(self, min_interval=1.0, bucket_interval=0.25):
+        self.min_interval = min_interval
+        self.bucket_interval = bucket_interval
+        self.sent = 0
+        self.edits = 0
+        self.coalesced = 0
+        self._boards = {}  # user_id -> _Board
+        self._bucket_next = {}  # channel id -> earliest time for its next edit
+
+    async def show(self, ctx, user_id, content):
+        if ctx.interaction is not None:
+            self.drop(user_id)
+            await ctx.send(content, ephemeral=True)
+            self.sent += 1
+            return
+
+        board = self._boards.get(user_id)
+        if board is None or board.channel.id != ctx.channel.id:
+            self.drop(user_id)
+            message = await ctx.send(content)
+            self.sent += 1
+            self._boards[user_id] = _Board(message, ctx.channel)
+            return
+
+        if board.pending is not None:
+            self.coalesced += 1
+        board.pending = content
+        if board.task is None:
+            board.task = asyncio.create_task(self._apply(board))
+
+    async def finish(self, user_id):
+        # game over: put the last board state up now, then forget the message.
+        # never raises, _apply logs what went wrong
+        board = self._boards.pop(user_id, None)
+        if board and board.task:
+            board.final = True
+            board.wake.set()
+            await board.task
+
+    def drop(self, user_id):
+        board = self._boards.pop(user_id, None)
+        if board and board.task:
+            board.task.cancel()
+
+    def _reserve(self, board):
+        now = time.monotonic()
+        bucket = board.channel.id
+        slot = max(now, board.last_edit + self.min_interval, self._bucket_next.get(bucket, 0))
+        self._bucket_next[bucket] = slot + self.bucket_interval
+        if len(self._bucket_next) > 10_000:
+            self._bucket_next = {k: t for k, t in self._bucket_next.items() if t > now}
+        return slot - now
+
+    async def _apply(self, board):
+        try:
+            while board.pending is not None:
+                delay = self._reserve(board)
+                if not board.final:
+                    try:
+                        await asyncio.wait_for(board.wake.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                content, board.pending = board.pending, None
+                try:
+                    await self._edit(board, content)
+                except Exception as e:
+                    # a board that can't be updated must never keep a game from ending
+                    log.warning("updating board in %s failed: %r", board.channel.id, e)
+                board.last_edit = time.monotonic()
+        finally:
+            board.task = None
+
+    async def _edit(self, board, content):
+        try:
+            await board.message.edit(content=content)
+            self.edits += 1
+        except discord.RateLimited as e:
+            # only raised past the client's max_ratelimit_timeout; retry with
+            # whatever is newest by then, unless the game is already over
+            if board.final:
+                raise
+            if board.pending is None:
+                board.pending = content
+            self._bucket_next[board.channel.id] = time.monotonic() + e.retry_after
+        except discord.NotFound:
+            board.message = await board.channel.send(content)
+            self.sent += 1
@@ -0,0 +1,381 @@
+"""
+daily mode: one answer per utc day, the same for every player, and results
+kept per guild as running aggregates.
+
+the answer for a day is a fixed shuffle of ANSWERS indexed by the day, so
+no answer repeats until all of them have been used.
+
+a finished daily game updates its guild's counters for that day (players,
+solves, the guess distribution) and the player's streak, O(1) each.
+`!daily stats` and the end-of-day summary only read those counters (and the
+guild's streaks for the streak top), never individual games.
+"""
+import datetime
+import random
+
+from feedback import ANSWERS
+from persistence import WriteBehind, dump_json
+from storage import read_json
+
+SALT = "wordl daily"  # changing it reshuffles every future answer
+EPOCH = datetime.date(2025, 1, 1)
+KEEP_DAYS = 30  # finished days kept per guild
+TOP_STREAKS = 5
+
+_ORDER = list(range(len(ANSWERS)))
+random.Random(SALT).shuffle(_ORDER)
+
+
+def utc_day(now=None):
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return now.astimezone(datetime.timezone.utc).date()
+
+
+def answer_id(day):
+    """the answer id everyone gets on this utc day."""
+    return _ORDER[(day - EPOCH).days % len(_ORDER)]
+
+
+def number(day):
+    """daily #n, counting from EPOCH."""
+    return (day - EPOCH).days + 1
+
+
+def seconds_until_next_day(now=None):
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    midnight = datetime.datetime.combine(utc_day(now) + datetime.timedelta(days=1), datetime.time(), datetime.timezone.utc)
+    return (midnight - now).total_seconds()
+
+
+def _counts():
+    return {"players": 0, "solved": 0, "guesses": 0, "dist": [0] * 6}
+
+
+def _new_guild(day):
+    return {
+        "day": day,  # the day "today" counts
+        "channel_id": None,  # where the last daily finished, for the summary
+        "today": _counts(),
+        "days": [],  # finished days, oldest first: {"day": ..., **counts}
+        "totals": _counts(),
+        "streaks": {},  # user_id -> [last solved day, current, best]
+    }
+
+
+def _copy_guild(guild):
+    return {
+        "day": guild["day"],
+        "channel_id": guild["channel_id"],
+        "today": {**guild["today"], "dist": list(guild["today"]["dist"])},
+        "days": list(guild["days"]),  # finished days are never changed again
+        "totals": {**guild["totals"], "dist": list(guild["totals"]["dist"])},
+        "streaks": {uid: list(s) for uid, s in guild["streaks"].items()},
+    }
+
+
+class DailyResults:
+    """
+    per-guild daily aggregates plus who has played today, in one json file.
+    like JsonStorage, the loop only copies the guilds that changed and the
+    writer thread folds them into its own copy before dumping it.
+
+    with several shard workers, who has played today is kept in `shared`
+    (SqliteStorage) instead, so a user only gets one daily across all of
+    them. either way a daily cut off by a restart can be played again.
+    """
+
+    def __init__(self, path, interval=5.0, shared=None, owner=0):
+        data = read_json(path)
+        self.shared = shared
+        self.owner = owner
+        self.guilds = data.get("guilds", {})  # guild_id -> aggregate, see _new_guild
+        self.played = data.get("played", {})  # user_id -> day they last started a daily (not shared)
+        self.playing = {}  # user_id -> (guild_id, day) of a daily in progress
+
+        # the games themselves are gone after a restart
+        if shared:
+            shared.release_dailies(owner)
+        for user_id, (_, day) in data.get("playing", {}).items():
+            if self.played.get(user_id) == day:
+                del self.played[user_id]
+
+        self._changed = set()
+        self._shadow = {"guilds": {gid: _copy_guild(g) for gid, g in self.guilds.items()}, "played": {}, "playing": {}}
+        self.writer = WriteBehind(path, self._take_changes, interval=interval, serialize=self._serialize)
+
+    def _take_changes(self):
+        changes = {gid: _copy_guild(self.guilds[gid]) for gid in self._changed}
+        self._changed.clear()
+        return changes, dict(self.played), dict(self.playing)
+
+    def _serialize(self, changes):
+        guilds, played, playing = changes
+        self._shadow["guilds"].update(guilds)
+        self._shadow["played"] = played
+        self._shadow["playing"] = playing
+        return dump_json(self._shadow)
+
+    def _mark(self, guild_id):
+        self._changed.add(guild_id)
+        self.writer.mark_dirty()
+
+    def start(self):
+        self.writer.start()
+
+    def close(self):
+        self.writer.flush_sync()
+
+    # ---------- games ----------
+    def start_game(self, user_id, guild_id, day):
+        """the day's answer id, or None if they already played it."""
+        user_id = str(user_id)
+        day = day.isoformat()
+        if self.shared:
+            if not self.shared.claim_daily(user_id, day, self.owner):
+                return None
+        elif self.played.get(user_id) == day:
+            return None
+        else:
+            self.played[user_id] = day
+        self.playing[user_id] = (str(guild_id), day)
+        self.writer.mark_dirty()
+        return answer_id(datetime.date.fromisoformat(day))
+
+    def finish_game(self, user_id, guesses, solved, channel_id=None):
+        """
+        counts a finished daily for the guild and day it was started in, and
+        returns the player's [last solved day, current, best] streak.
+        """
+        user_id = str(user_id)
+        guild_id, day = self.playing.pop(user_id)
+        if self.shared:
+            self.shared.finish_daily(user_id, self.owner)
+        guild = self._guild(guild_id, day)
+        if channel_id:
+            guild["channel_id"] = channel_id
+
+        buckets = [guild["totals"]]
+        counts = self._counts_for(guild, day)
+        if counts is not None:
+            buckets.append(counts)
+        for c in buckets:
+            c["players"] += 1
+            if solved:
+                c["solved"] += 1
+                c["guesses"] += guesses
+                c["dist"][guesses - 1] += 1
+
+        streak = guild["streaks"].setdefault(user_id, [None, 0, 0])
+        if solved:
+            yesterday = (datetime.date.fromisoformat(day) - datetime.timedelta(days=1)).isoformat()
+            if streak[0] != day:
+                streak[1] = streak[1] + 1 if streak[0] == yesterday else 1
+            streak[0] = day
+            streak[2] = max(streak[2], streak[1])
+        else:
+            streak[1] = 0
+        self._mark(guild_id)
+        return streak
+
+    def abandon(self, user_id):
+        # a daily left to expire counts as a loss
+        if str(user_id) in self.playing:
+            return self.finish_game(user_id, 6, False)
+        return None
+
+    # ---------- days ----------
+    def _guild(self, guild_id, day):
+        guild = self.guilds.get(guild_id)
+        if guild is None:
+            guild = self.guilds[guild_id] = _new_guild(day)
+        self._roll(guild, day)
+        return guild
+
+    def _roll(self, guild, day):
+        # moves "today" into the finished days once a later day has started
+        if day <= guild["day"]:
+            return False
+        if guild["today"]["players"]:
+            guild["days"].append({"day": guild["day"], **guild["today"]})
+            del guild["days"][:-KEEP_DAYS]
+        guild["day"], guild["today"] = day, _counts()
+        return True
+
+    @staticmethod
+    def _counts_for(guild, day):
+        # a game started before midnight still counts for the day it started
+        if day == guild["day"]:
+            return guild["today"]
+        if guild["days"] and guild["days"][-1]["day"] == day:
+            return guild["days"][-1]
+        return None
+
+    def close_day(self, day):
+        """
+        rolls every guild over to `day`. returns (guild_id, channel_id,
+        summary) for each guild that had players on the day that just ended.
+        """
+        day = day.isoformat()
+        ended = []
+        for guild_id, guild in self.guilds.items():
+            last, played = guild["day"], guild["today"]["players"]
+            if self._roll(guild, day):
+                self._mark(guild_id)
+                if played and guild["channel_id"]:
+                    ended.append((guild_id, guild["channel_id"], self.summary(guild_id, last)))
+        self.played = {uid: d for uid, d in self.played.items() if d >= day}
+        return ended
+
+    # ---------- stats ----------
+    def summary(self, guild_id, day=None):
+        """one day's counters, the all-time totals and the streak top for a guild."""
+        guild = self.guilds.get(str(guild_id))
+        if guild is None:
+            return None
+        day = day or guild["day"]
+        counts = self._counts_for(guild, day)
+        if counts is None:
+            counts = next((d for d in guild["days"] if d["day"] == day), _counts())
+        return {
+            "day": day,
+            **counts,
+            "totals": guild["totals"],
+            "streaks": self.top_streaks(guild_id, day),
+        }
+
+    def top_streaks(self, guild_id, day, n=TOP_STREAKS):
+        """[(user_id, current, best)] of streaks still alive on `day`."""
+        guild = self.guilds.get(str(guild_id))
+        if guild is None:
+            return []
+        alive = []
+        for uid, streak in guild["streaks"].items():
+            current = self.current(streak, day)
+            if current:
+                alive.append((uid, current, streak[2]))
+        alive.sort(key=lambda s: (-s[1], -s[2]))
+        return alive[:n]
+
+    def streak(self, guild_id, user_id, day):
+        """(current, best) for a player in a guild."""
+        guild = self.guilds.get(str(guild_id))
+        streak = guild["streaks"].get(str(user_id)) if guild else None
+        if streak is None:
+            return 0, 0
+        return self.current(streak, day), streak[2]
+
+    @staticmethod
+    def current(streak, day):
+        # a streak survives until a day without a solve has fully passed
+        last, current, _ = streak
+        if last is None:
+            return 0
+        yesterday = (datetime.date.fromisoformat(day) - datetime.timedelta(days=1)).isoformat()
+        return current if last >= yesterday else 0
+
+
+def format_summary(summary):
+    players, solved = summary["players"], summary["solved"]
+    if not players:
+        lines = ["nobody played this one"]
+    else:
+        lines = [f"**{solved}/{players}** solved ({solved / players:.0%})"]
+        if solved:
+            lines.append(f"avg guesses: **{summary['guesses'] / solved:.2f}**")
+        rows = [(str(k), "🟩", n) for k, n in enumerate(summary["dist"], start=1)] + [("X", "🟥", players - solved)]
+        most = max(n for _, _, n in rows)
+        for label, square, n in rows:
+            lines.append(f"`{label}` {square * max(1 if n else 0, round(n / most * 8))} {n}")
+
+    totals = summary["totals"]
+    lines.append(f"\nall time: {totals['solved']}/{totals['players']} solved")
+    if summary["streaks"]:
+        lines.append("**streaks**")
+        lines.extend(f"<@{uid}> 🔥 **{current}** (best {best})" for uid, current, best in summary["streaks"])
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # the streaming counters match a recount from the raw games
+    import os
+    import tempfile
+
+    rng = random.Random(0)
+    path = os.path.join(tempfile.mkdtemp(), "daily.json")
+    results = DailyResults(path)
+    games = []  # (guild, user, day, guesses, solved)
+    start = datetime.date(2026, 3, 1)
+    for offset in range(40):
+        day = start + datetime.timedelta(days=offset)
+        results.close_day(day)
+        for user in rng.sample(range(300), 120):
+            guild = user % 4
+            assert results.start_game(user, guild, day) == answer_id(day)
+            assert results.start_game(user, guild, day) is None
+            solved = rng.random() < 0.85
+            guesses = rng.randint(1, 6) if solved else 6
+            results.finish_game(user, guesses, solved, channel_id=1)
+            games.append((str(guild), str(user), day.isoformat(), guesses, solved))
+
+    for guild in map(str, range(4)):
+        mine = [g for g in games if g[0] == guild]
+        totals = results.guilds[guild]["totals"]
+        assert totals["players"] == len(mine)
+        assert totals["solved"] == sum(g[4] for g in mine)
+        kept = results.guilds[guild]["days"] + [{"day": results.guilds[guild]["day"]}]
+        assert len(kept) == KEEP_DAYS + 1
+        for day in (d["day"] for d in kept):
+            that = [g for g in mine if g[2] == day]
+            s = results.summary(guild, day)
+            assert s["players"] == len(that)
+            assert s["dist"] == [sum(1 for g in that if g[4] and g[3] == k) for k in range(1, 7)]
+
+        # streaks from scratch
+        for user in {g[1] for g in mine}:
+            run = best = 0
+            last = None
+            for _, _, day, _, solved in (g for g in mine if g[1] == user):
+                d = datetime.date.fromisoformat(day)
+                if solved:
+                    run = run + 1 if last == d - datetime.timedelta(days=1) else 1
+                    last = d
+                    best = max(best, run)
+                else:
+                    run = 0
+            assert results.guilds[guild]["streaks"][user][1:] == [run, best], user
+
+    assert len({answer_id(start + datetime.timedelta(days=i)) for i in range(len(ANSWERS))}) == len(ANSWERS)
+
+    print(f"ok: {len(games)} games over 40 days, summary for guild 0:")
+    print(format_summary(results.summary("0")))
+
+    # a restart frees dailies that were cut off, but not finished ones
+    day = start + datetime.timedelta(days=40)
+    results.close_day(day)
+    results.start_game("done", 0, day)
+    results.finish_game("done", 3, True)
+    results.start_game("cut", 0, day)
+    results.close()
+    again = DailyResults(path)
+    assert again.start_game("done", 0, day) is None
+    assert again.start_game("cut", 0, day) == answer_id(day)
+
+    # with shard workers, one daily per user across all of them
+    from storage import SqliteStorage
+
+    db = os.path.join(os.path.dirname(path), "wordle.db")
+    workers = [
+        DailyResults(os.path.join(os.path.dirname(path), f"daily.{w}.json"), shared=SqliteStorage(db), owner=w)
+        for w in range(2)
+    ]
+    assert workers[0].start_game(1, 10, day) == answer_id(day)
+    assert workers[1].start_game(1, 11, day) is None, "played the daily on two workers"
+    assert workers[1].start_game(2, 11, day) == answer_id(day)
+    workers[1].finish_game(2, 4, True)
+    assert workers[0].start_game(1, 10, day + datetime.timedelta(days=1)) == answer_id(day + datetime.timedelta(days=1))
+    workers[0].abandon(1)
+    assert workers[0].start_game(3, 10, day) == answer_id(day)  # still running when worker 0 restarts
+    restarted = DailyResults(os.path.join(os.path.dirname(path), "daily.0.json"), shared=SqliteStorage(db), owner=0)
+    assert workers[1].start_game(3, 11, day) == answer_id(day), "a cut-off daily stayed claimed"
+    assert restarted.start_game(2, 10, day) is None
+    print("ok: restarts and shard workers keep one daily per user per day")
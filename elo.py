@@ -0,0 +1,330 @@
+import logging
+import math
+
+import numpy as np
+
+log = logging.getLogger("wordle.game")
+
+# ----------------------------------------------------------- ELO SYSTEM -----------------------------------------------------
+
+# ----- ELO TUNING -----
+
+ELO_CENTER = 2500  # where ladder stabilizes
+ELO_WIN_FLOOR = 2000  # wins never lose elo below ts
+
+K_MAX = 22  # volatility at very low elo
+K_MIN = 2  # 3                  # volatility at very high elo
+K_DECAY_POWER = 3.4  # 1.5        # how fast K shrinks
+
+NEUTRAL_BASE = 7  # neutral guesses at elo=0
+NEUTRAL_DROP = 4.2  # how much neutral shrinks at high elo
+
+LOSS_GUESSES = 7  # treat loss as this many guesses
+LOSS_SCALE_POWER = 2.1  # how much harsher losses get at high elo
+
+LOW_ELO_WIN_BONUS = 30  # max bonus for bad-but-winning games
+
+MAX_GAIN = 250
+MAX_LOSS = -75
+
+# ----- new / cooked curve tuning -----
+# h = -CURVE_AMPLITUDE * sin((elo - CURVE_SHIFT * (7 - g) ** CURVE_SHIFT_POWER) / CURVE_SCALE)
+
+CURVE_AMPLITUDE = 800
+CURVE_SHIFT = 500  # how far each guess saved moves the curve
+CURVE_SHIFT_POWER = 1.6
+CURVE_SCALE = 5600  # elo per radian
+
+GRIND_SOFTENER = 0.25  # reduces how brutal bad outcomes are
+NEW_BOUND_1 = 150  # smallest gain for a 1-guess win
+NEW_BOUND_2 = 50
+NEW_BOUND_3 = 15
+NEW_BOUND_4 = 3
+NEW_BOUND_5 = 35  # biggest loss for a 5-guess win
+NEW_BOUND_6 = 55
+NEW_BOUND_7 = 75  # biggest loss for a loss
+
+COOKED_AMPLITUDE = 800  # A
+COOKED_FREQ = 2  # B
+COOKED_KNEE = 0.09  # C
+COOKED_KNEE_POWER = 3  # D
+COOKED_T_POWER = 1  # P
+COOKED_FADE = 0.8  # c
+COOKED_FADE_POWER = 2  # p
+COOKED_PHASE = 1.9  # phi
+COOKED_OFFSET = 15  # spread over g - 1
+COOKED_LOSS_SCALE = 0.35  # scales losses only
+COOKED_MAX_LOSS = -150
+
+
+def neutral_guesses(elo):
+    return NEUTRAL_BASE - NEUTRAL_DROP * (elo / (elo + ELO_CENTER))
+
+
+def k_factor(elo):
+    return K_MIN + (K_MAX - K_MIN) / (1 + (elo / ELO_CENTER) ** K_DECAY_POWER)
+
+
+def clamp(x, lo, hi):
+    return max(lo, min(hi, x))
+
+
+def performance_bonus(elo, guesses):
+    if guesses >= 4:
+        return 1.0
+
+    scale = max(0.0, (ELO_CENTER - elo) / ELO_CENTER)
+
+    if guesses == 3:
+        return 1.0 + 0.1 * scale
+    if guesses == 2:
+        return 1.0 + 0.95 * scale
+
+
+def ranked_elo_delta(elo, guesses, won):
+    g = guesses if won else LOSS_GUESSES
+
+    base = k_factor(elo) * (neutral_guesses(elo) - g)
+    log.debug("ranked_elo_delta elo=%s g=%s base=%.2f", elo, g, base)
+
+    # scale losses by elo
+    if not won:
+        loss_scale = (elo / ELO_WIN_FLOOR) ** LOSS_SCALE_POWER
+        base *= loss_scale
+        log.debug("ranked_elo_delta loss_scale=%.3f base=%.2f", loss_scale, base)
+
+    # wins never lose elo below threshold
+    if won and elo < ELO_WIN_FLOOR:
+        base = max(base, 0)
+
+    # 4 guesses always safe
+    if won and guesses == 4:
+        base = max(base, 0)
+
+    # bonus for cracked games
+    if won:
+        base *= performance_bonus(elo, guesses)
+
+    # low-elo pity gain for ugly wins
+    if won and elo < ELO_WIN_FLOOR and base == 0:
+        bonus_scale = 1 - (elo / ELO_WIN_FLOOR)
+        base += LOW_ELO_WIN_BONUS * bonus_scale
+
+    base = clamp(base, MAX_LOSS, MAX_GAIN)
+
+    return round(base)
+
+
+# def new_ranked_elo_delta(elo, guesses, won):
+#     g = guesses if won else 7
+#     t = (elo - (500 * ((7 - g) ** 1.6))) / 5600
+#     h = -800 * math.sin(t)
+#     return max(-75, round(h)) if g > 4 else max(1, round(h))
+
+def curve(elo, g):
+    t = (elo - (CURVE_SHIFT * ((7 - g) ** CURVE_SHIFT_POWER))) / CURVE_SCALE
+    return -CURVE_AMPLITUDE * math.sin(t)
+
+
+def new_ranked_elo_delta(elo, guesses, won):
+    g = guesses if won else 7
+    h = curve(elo, g)
+    log.debug("new_ranked_elo_delta elo=%s g=%s h=%.2f", elo, g, h)
+    bounded_change_by_g = {
+        1: NEW_BOUND_1, 2: NEW_BOUND_2, 3: NEW_BOUND_3, 4: NEW_BOUND_4,
+        5: NEW_BOUND_5, 6: NEW_BOUND_6, 7: NEW_BOUND_7,
+    }
+    if g > 4:
+        # different caps for 5/6/7 so they are different this comment is really mart
+
+        h = h * GRIND_SOFTENER
+        log.debug("new_ranked_elo_delta softened h=%.2f", h)
+        cap = -bounded_change_by_g[g]
+        return max(cap, round(h))
+
+    # good wins
+    if g < 5:
+        return min(max(bounded_change_by_g[g], round(h)), MAX_GAIN)
+    return min(max(15, round(h)), MAX_GAIN)
+
+
+def cooked_ranked_elo_delta(elo, guesses, won):
+    # --- new damped function (for g > 4) ---
+    def new_func(elo, g):
+        t = (elo - CURVE_SHIFT * ((7 - g) ** CURVE_SHIFT_POWER)) / CURVE_SCALE
+        tp = max(0.0, t)
+
+        term1 = 1 - (tp ** COOKED_FADE_POWER) / (tp ** COOKED_FADE_POWER + COOKED_FADE ** COOKED_FADE_POWER)
+        term2 = (COOKED_KNEE ** COOKED_KNEE_POWER) / (tp ** COOKED_KNEE_POWER + COOKED_KNEE ** COOKED_KNEE_POWER)
+        term3 = (math.sin(COOKED_FREQ * (t ** COOKED_T_POWER) - COOKED_PHASE) + 1) / 2
+        offset = COOKED_OFFSET / (g - 1)
+
+        return COOKED_AMPLITUDE * term1 * term2 * term3 + offset
+
+    # --- game logic ---
+    g = guesses if won else 7
+
+    if won and g <= 4:
+        # the original curve, unchanged
+        h = curve(elo, g)
+        return max(1, round(h))
+
+    h = new_func(elo, g)
+
+    # scale losses only
+    if not won:
+        h *= COOKED_LOSS_SCALE
+        return max(COOKED_MAX_LOSS, round(h))
+
+    return max(1, round(h))
+
+
+# ----- vectorized versions (numpy), for the offline tools -----
+# same curves as above over arrays of elos / guesses / won flags. constants
+# come from `params` so tuning runs can override them without editing this file.
+
+_CURVE = ["CURVE_AMPLITUDE", "CURVE_SHIFT", "CURVE_SHIFT_POWER", "CURVE_SCALE"]
+
+# the constants each formula reads, so --set can refuse ones that would do nothing
+FORMULA_PARAMS = {
+    "old": [
+        "ELO_CENTER", "ELO_WIN_FLOOR", "K_MAX", "K_MIN", "K_DECAY_POWER", "NEUTRAL_BASE",
+        "NEUTRAL_DROP", "LOSS_GUESSES", "LOSS_SCALE_POWER", "LOW_ELO_WIN_BONUS", "MAX_GAIN", "MAX_LOSS",
+    ],
+    "new": _CURVE + ["GRIND_SOFTENER"] + [f"NEW_BOUND_{g}" for g in range(1, 8)] + ["MAX_GAIN"],
+    "cooked": _CURVE + [
+        "COOKED_AMPLITUDE", "COOKED_FREQ", "COOKED_KNEE", "COOKED_KNEE_POWER", "COOKED_T_POWER",
+        "COOKED_FADE", "COOKED_FADE_POWER", "COOKED_PHASE", "COOKED_OFFSET", "COOKED_LOSS_SCALE", "COOKED_MAX_LOSS",
+    ],
+}
+TUNABLE = list(dict.fromkeys(name for names in FORMULA_PARAMS.values() for name in names))
+
+
+def default_params(**overrides):
+    params = {name: globals()[name] for name in TUNABLE}
+    for name, value in overrides.items():
+        if name not in params:
+            raise KeyError(f"unknown elo constant {name!r}")
+        params[name] = value
+    return params
+
+
+def parse_overrides(formula, items):
+    """
+    NAME=VALUE strings (simulate.py / rerate.py --set) into params for
+    `formula`. raises ValueError for a name the formula does not read.
+    """
+    overrides = {}
+    for item in items:
+        name, _, value = item.partition("=")
+        if name not in FORMULA_PARAMS[formula]:
+            raise ValueError(f"the {formula} formula has no constant {name!r}; it reads {', '.join(FORMULA_PARAMS[formula])}")
+        try:
+            overrides[name] = float(value)
+        except ValueError:
+            raise ValueError(f"{item!r} is not NAME=VALUE with a number") from None
+    return default_params(**overrides)
+
+
+def ranked_elo_delta_vec(elo, guesses, won, params=None):
+    p = params or default_params()
+    elo = np.asarray(elo, dtype=np.float64)
+    guesses = np.asarray(guesses)
+    won = np.asarray(won, dtype=bool)
+    g = np.where(won, guesses, p["LOSS_GUESSES"])
+
+    center = p["ELO_CENTER"]
+    k = p["K_MIN"] + (p["K_MAX"] - p["K_MIN"]) / (1 + (elo / center) ** p["K_DECAY_POWER"])
+    neutral = p["NEUTRAL_BASE"] - p["NEUTRAL_DROP"] * (elo / (elo + center))
+    base = k * (neutral - g)
+
+    base = np.where(won, base, base * (elo / p["ELO_WIN_FLOOR"]) ** p["LOSS_SCALE_POWER"])
+    low = elo < p["ELO_WIN_FLOOR"]
+    base = np.where(won & (low | (guesses == 4)), np.maximum(base, 0), base)
+
+    # performance_bonus; 1-guess wins get the 2-guess bonus (the scalar version has no case for them)
+    scale = np.maximum(0.0, (center - elo) / center)
+    bonus = np.select([guesses >= 4, guesses == 3], [1.0, 1.0 + 0.1 * scale], 1.0 + 0.95 * scale)
+    base = np.where(won, base * bonus, base)
+
+    pity = won & low & (base == 0)
+    base = np.where(pity, base + p["LOW_ELO_WIN_BONUS"] * (1 - elo / p["ELO_WIN_FLOOR"]), base)
+
+    return np.round(np.clip(base, p["MAX_LOSS"], p["MAX_GAIN"])).astype(np.int64)
+
+
+def curve_vec(elo, g, p):
+    t = (elo - (p["CURVE_SHIFT"] * ((7 - g) ** p["CURVE_SHIFT_POWER"]))) / p["CURVE_SCALE"]
+    return t, -p["CURVE_AMPLITUDE"] * np.sin(t)
+
+
+def new_ranked_elo_delta_vec(elo, guesses, won, params=None):
+    p = params or default_params()
+    elo = np.asarray(elo, dtype=np.float64)
+    g = np.where(np.asarray(won, dtype=bool), guesses, 7)
+
+    _, h = curve_vec(elo, g, p)
+    bound = np.asarray([0] + [p[f"NEW_BOUND_{i}"] for i in range(1, 8)])[g]
+
+    grind = np.maximum(-bound, np.round(h * p["GRIND_SOFTENER"]))
+    good = np.minimum(np.maximum(bound, np.round(h)), p["MAX_GAIN"])
+    return np.where(g > 4, grind, good).astype(np.int64)
+
+
+def cooked_ranked_elo_delta_vec(elo, guesses, won, params=None):
+    p = params or default_params()
+    elo = np.asarray(elo, dtype=np.float64)
+    won = np.asarray(won, dtype=bool)
+    g = np.where(won, guesses, 7)
+
+    t, old = curve_vec(elo, g, p)
+
+    tp = np.maximum(0.0, t)
+    fade, fade_power = p["COOKED_FADE"], p["COOKED_FADE_POWER"]
+    knee, knee_power = p["COOKED_KNEE"], p["COOKED_KNEE_POWER"]
+    term1 = 1 - tp ** fade_power / (tp ** fade_power + fade ** fade_power)
+    term2 = knee ** knee_power / (tp ** knee_power + knee ** knee_power)
+    term3 = (np.sin(p["COOKED_FREQ"] * t ** p["COOKED_T_POWER"] - p["COOKED_PHASE"]) + 1) / 2
+    with np.errstate(divide="ignore"):  # g == 1 only happens on the old_func branch
+        new = p["COOKED_AMPLITUDE"] * term1 * term2 * term3 + p["COOKED_OFFSET"] / (g - 1)
+
+    return np.select(
+        [won & (g <= 4), ~won],
+        [np.maximum(1, np.round(old)),
+         np.maximum(p["COOKED_MAX_LOSS"], np.round(new * p["COOKED_LOSS_SCALE"]))],
+        np.maximum(1, np.round(new))
+    ).astype(np.int64)
+
+
+DELTAS = {
+    "old": (ranked_elo_delta, ranked_elo_delta_vec),
+    "new": (new_ranked_elo_delta, new_ranked_elo_delta_vec),
+    "cooked": (cooked_ranked_elo_delta, cooked_ranked_elo_delta_vec),
+}
+
+
+if __name__ == "__main__":
+    # the vectorized curves must agree with the scalar ones
+    elos = np.arange(0, 12001, 7)
+    for name, (scalar, vec) in DELTAS.items():
+        for guesses, won in [(g, True) for g in range(1, 7)] + [(6, False)]:
+            if name == "old" and guesses == 1:
+                continue  # performance_bonus has no 1-guess case
+            expected = [scalar(int(e), guesses, won) for e in elos]
+            got = vec(elos, np.full(len(elos), guesses), np.full(len(elos), won)).tolist()
+            assert got == expected, (name, guesses, won)
+
+    # and every constant a formula claims to read moves its curve
+    cases = [(g, True) for g in range(1, 7)] + [(6, False)]
+    g = np.repeat([c[0] for c in cases], len(elos))
+    w = np.repeat([c[1] for c in cases], len(elos))
+    e = np.tile(elos, len(cases))
+    for name, names in FORMULA_PARAMS.items():
+        vec = DELTAS[name][1]
+        base = vec(e, g, w)
+        for const in names:
+            value = default_params()[const]
+            with np.errstate(all="ignore"):
+                moved = [(vec(e, g, w, default_params(**{const: v})) != base).any() for v in (value / 2, -value)]
+            assert any(moved), (name, const)
+    print("ok: vectorized curves match, every tunable constant is used")
@@ -0,0 +1,146 @@
+import hashlib
+import os
+import random
+
+import numpy as np
+
+from wordindex import WORDS, WORD_IDS  # valid guesses, mmap'd; ids are words.txt line numbers
+
+WORDS_FILE = "words.txt"
+ANSWERS_FILE = "answers.txt"
+FEEDBACK_CACHE = "feedback_{}.npy"
+
+# pattern digits per position (base 3, position 0 is the lowest digit)
+GRAY, YELLOW, GREEN = 0, 1, 2
+ALL_GREEN = sum(GREEN * 3 ** i for i in range(5))
+
+
+# ---------- word lists ----------
+with open(ANSWERS_FILE) as f:
+    ANSWERS = [line.strip() for line in f]
+
+ANSWER_IDS = {a: i for i, a in enumerate(ANSWERS)}
+
+
+# ---------- reference scoring ----------
+def green(word, answer):
+    return [word[i] == answer[i] for i in range(5)]
+
+
+def yellow(word, answer, greenlist):
+    yellowlist = [False] * 5
+    remaining = []
+
+    for i in range(5):
+        if not greenlist[i]:
+            remaining.append(answer[i])
+
+    for i in range(5):
+        if not greenlist[i] and word[i] in remaining:
+            yellowlist[i] = True
+            remaining.remove(word[i])
+
+    return yellowlist
+
+
+def encode(greenlist, yellowlist):
+    code = 0
+    for i in range(4, -1, -1):
+        code = code * 3 + (GREEN if greenlist[i] else YELLOW if yellowlist[i] else GRAY)
+    return code
+
+
+def decode(code):
+    greenlist = [False] * 5
+    yellowlist = [False] * 5
+    for i in range(5):
+        code, digit = divmod(code, 3)
+        greenlist[i] = digit == GREEN
+        yellowlist[i] = digit == YELLOW
+    return tuple(greenlist), tuple(yellowlist)
+
+
+# every pattern decoded once, so a lookup never allocates
+DECODED = [decode(code) for code in range(3 ** 5)]
+
+
+# ---------- matrix build ----------
+def _letters(words):
+    return np.frombuffer("".join(words).encode(), dtype=np.uint8).reshape(-1, 5)
+
+
+def build_matrix(words, answers, chunk=512):
+    g_all = _letters(words)
+    a = _letters(answers)[None, :, :]  # (1, A, 5)
+    powers = (3 ** np.arange(5)).astype(np.uint8)
+    matrix = np.empty((len(words), len(answers)), dtype=np.uint8)
+
+    for lo in range(0, len(words), chunk):
+        g = g_all[lo:lo + chunk][:, None, :]  # (G, 1, 5)
+        greens = g == a  # (G, A, 5)
+        open_ = ~greens
+
+        # how many of guess letter i are left over in the non-green answer slots
+        left = ((g[..., :, None] == a[..., None, :]) & open_[..., None, :]).sum(-1)
+
+        # a non-green guess letter is yellow while copies of it are still left over;
+        # earlier non-green copies of the same letter use them up first
+        same = np.tril(g[..., :, None] == g[..., None, :])  # (G, 1, 5, 5) j <= i
+        order = (same & open_[..., None, :]).sum(-1)
+
+        yellows = open_ & (order <= left)
+        digits = greens.astype(np.uint8) * GREEN + yellows.astype(np.uint8)
+        matrix[lo:lo + chunk] = (digits * powers).sum(-1, dtype=np.uint8)
+
+    return matrix
+
+
+def _cache_path():
+    digest = hashlib.sha1()
+    for path in (WORDS_FILE, ANSWERS_FILE):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return FEEDBACK_CACHE.format(digest.hexdigest()[:12])
+
+
+def load_matrix():
+    path = _cache_path()
+    if os.path.exists(path):
+        matrix = np.load(path, mmap_mode="r")
+        if matrix.shape == (len(WORDS), len(ANSWERS)):
+            return matrix
+
+    matrix = build_matrix(WORDS, ANSWERS)
+    tmp = f"{path}.{os.getpid()}.tmp"  # shard workers may all build it at once
+    with open(tmp, "wb") as f:
+        np.save(f, matrix)
+    os.replace(tmp, path)
+    return matrix
+
+
+MATRIX = load_matrix()
+
+
+# ---------- lookup ----------
+def pattern(word, answer):
+    return MATRIX[WORD_IDS[word], ANSWER_IDS[answer]]
+
+
+def score(word, answer):
+    """(greenlist, yellowlist) for a guess, same as green() + yellow()."""
+    return DECODED[pattern(word, answer)]
+
+
+if __name__ == "__main__":
+    # equivalence check against the reference scoring
+    rng = random.Random(0)
+    pairs = [(rng.choice(WORDS), rng.choice(ANSWERS)) for _ in range(500_000)]
+    pairs += [(a, b) for a in ANSWERS[:200] for b in ANSWERS[:200]]
+
+    for word, answer in pairs:
+        greenlist = green(word, answer)
+        yellowlist = yellow(word, answer, greenlist)
+        got = score(word, answer)
+        assert got == (tuple(greenlist), tuple(yellowlist)), (word, answer, got)
+
+    print(f"ok: {len(pairs)} pairs match, matrix {MATRIX.shape} = {MATRIX.nbytes / 1e6:.1f} MB")
@@ -0,0 +1,145 @@
+from functools import lru_cache
+
+from feedback import ANSWERS, DECODED, MATRIX, WORD_IDS, WORDS
+from render import render_keyboard_masks, render_row
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+ID_BITS = 14  # enough for every word id in words.txt
+ID_MASK = (1 << ID_BITS) - 1
+
+
+@lru_cache(maxsize=1 << 16)
+def _board_text(answer_id, packed, guesses):
+    # the board after n guesses is the (cached) board after n - 1 plus one row
+    last = guesses - 1
+    word_id = (packed >> (ID_BITS * last)) & ID_MASK
+    row = render_row(WORDS[word_id], MATRIX.item(word_id, answer_id))
+    if last == 0:
+        return row
+    return f"{_board_text(answer_id, packed & ((1 << (ID_BITS * last)) - 1), last)}\n{row}"
+
+
+class Game:
+    """
+    one casual or ranked game. guesses are word ids packed into a single int
+    and the keyboard is three 26-bit letter masks; the board and keyboard
+    text are rendered only when a message needs them.
+    """
+
+    __slots__ = ("answer_id", "guesses", "_packed", "green", "yellow", "gray", "channel_id", "ranked", "finished")
+
+    def __init__(self, answer_id, ranked=False, channel_id=None):
+        self.answer_id = answer_id
+        self.guesses = 0  # how many guesses so far
+        self._packed = 0
+        self.green = 0
+        self.yellow = 0
+        self.gray = 0
+        self.channel_id = channel_id
+        self.ranked = ranked
+        self.finished = False
+
+    @property
+    def answer(self):
+        return ANSWERS[self.answer_id]
+
+    def guess(self, word_id, word=None):
+        """
+        records a guess by its (already validated) word id and returns its
+        (greenlist, yellowlist). pass the word too if it is at hand.
+        """
+        word = word or WORDS[word_id]
+        self._packed |= word_id << (ID_BITS * self.guesses)
+        self.guesses += 1
+
+        greenlist, yellowlist = DECODED[MATRIX.item(word_id, self.answer_id)]
+        for i, letter in enumerate(word):
+            bit = 1 << (ord(letter) - 97)
+            if greenlist[i]:
+                self.green |= bit
+            elif yellowlist[i]:
+                self.yellow |= bit
+            else:
+                self.gray |= bit
+        return greenlist, yellowlist
+
+    def guess_ids(self):
+        return [(self._packed >> (ID_BITS * i)) & ID_MASK for i in range(self.guesses)]
+
+    def guess_words(self):
+        return [WORDS[word_id] for word_id in self.guess_ids()]
+
+    def patterns(self):
+        return [int(MATRIX[word_id, self.answer_id]) for word_id in self.guess_ids()]
+
+    def board(self):
+        """every guess so far as emoji rows (what used to be guessString)."""
+        return _board_text(self.answer_id, self._packed, self.guesses) if self.guesses else ""
+
+    def keyboard(self):
+        """letter -> state emoji, the dict render_keyboard takes."""
+        kb = {}
+        for i, letter in enumerate(LETTERS):
+            bit = 1 << i
+            if self.green & bit:
+                kb[letter] = "🟩"
+            elif self.yellow & bit:
+                kb[letter] = "🟨"
+            elif self.gray & bit:
+                kb[letter] = "⬛"
+            else:
+                kb[letter] = "⬜"
+        return kb
+
+    def keyboard_text(self):
+        """render_keyboard(self.keyboard()), from the render cache."""
+        return render_keyboard_masks(self.green, self.yellow, self.gray)
+
+
+if __name__ == "__main__":
+    # same output as the old dict games, and how much memory each layout takes
+    import random
+    import tracemalloc
+
+    from feedback import score
+    from render import empty_keyboard, format_result, render_keyboard, update_keyboard
+
+    rng = random.Random(0)
+
+    def dict_game(answer, words):
+        game = {"answer": answer, "guesses": 0, "keyboard": empty_keyboard(), "guessString": ""}
+        for word in words:
+            game["guesses"] += 1
+            greenlist, yellowlist = score(word, answer)
+            result = format_result(word, greenlist, yellowlist)
+            if game["guesses"] > 1:
+                game["guessString"] = f"{game['guessString']}\n{result}"
+            else:
+                game["guessString"] = result
+            update_keyboard(game["keyboard"], word, greenlist, yellowlist)
+        return game
+
+    def slot_game(answer_id, words):
+        game = Game(answer_id)
+        for word in words:
+            game.guess(WORD_IDS[word], word)
+        return game
+
+    for _ in range(5000):
+        answer_id = rng.randrange(len(ANSWERS))
+        words = rng.sample(WORDS, rng.randint(0, 6))
+        old = dict_game(ANSWERS[answer_id], words)
+        new = slot_game(answer_id, words)
+        assert old["guessString"] == new.board()
+        assert render_keyboard(old["keyboard"]) == render_keyboard(new.keyboard()) == new.keyboard_text()
+        assert new.guess_words() == words
+
+    n = 100_000
+    setups = [(rng.randrange(len(ANSWERS)), rng.sample(WORDS, 3)) for _ in range(n)]
+    for name, build in (("dict", lambda a, w: dict_game(ANSWERS[a], w)), ("Game", slot_game)):
+        tracemalloc.start()
+        games = [build(a, w) for a, w in setups]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{name:>5}: {size / n:7.0f} bytes per game after 3 guesses ({n} games)")
+        del games
@@ -0,0 +1,289 @@
+"""
+every finished game as a fixed-width 40 byte record, appended to segment
+files and read back through mmap:
+
+    user id, time, elo before, elo after, answer id, 6 guess word ids,
+    guess count, mode, won
+
+each writer (a bot process, see shards.py) appends to its own directory,
+<root>/w<writer>/000000.seg, 000001.seg, ..., starting a new segment every
+`segment_records` records. appends are batched and written on the history's
+own worker thread (a BatchedAppender, like the ranked journal).
+
+readers keep a per-user index of record ids (file number << 32 | row)
+built by scanning the user id column of every segment once, and then only
+the rows appended since, so a query reads that user's records and nothing
+else, including games other writers recorded.
+"""
+import logging
+import mmap
+import os
+import struct
+import time
+from array import array
+
+import numpy as np
+
+from feedback import ANSWERS
+from persistence import BatchedAppender
+
+log = logging.getLogger("wordle.persistence")
+
+MAX_GUESSES = 6
+MODES = ("casual", "ranked", "daily")
+
+RECORD = struct.Struct("<QIiiH6HBBB3x")
+DTYPE = np.dtype([
+    ("user", "<u8"), ("time", "<u4"), ("elo_before", "<i4"), ("elo_after", "<i4"),
+    ("answer", "<u2"), ("words", "<u2", (MAX_GUESSES,)),
+    ("guesses", "u1"), ("mode", "u1"), ("won", "u1"), ("_pad", "V3"),
+])
+assert DTYPE.itemsize == RECORD.size == 40
+
+ROW_BITS = 32
+
+
+def pack(user_id, answer_id, word_ids, mode, won, elo_before=0, elo_after=0, at=None):
+    words = list(word_ids)[:MAX_GUESSES]
+    return RECORD.pack(
+        int(user_id), int(at if at is not None else time.time()), elo_before, elo_after,
+        answer_id, *words, *[0] * (MAX_GUESSES - len(words)),
+        len(words), MODES.index(mode), bool(won),
+    )
+
+
+class _Segment:
+    __slots__ = ("path", "number", "rows", "map", "mapped")
+
+    def __init__(self, path, number):
+        self.path = path
+        self.number = number
+        self.rows = 0  # rows indexed so far
+        self.map = None
+        self.mapped = 0  # rows covered by self.map
+
+
+class GameHistory(BatchedAppender):
+    def __init__(self, root, writer=0, interval=1.0, segment_records=1 << 20):
+        super().__init__(interval, "history")
+        self.root = root
+        self.writer = writer
+        self.segment_records = segment_records
+        self._file = None  # the segment this writer appends to
+        self._file_rows = 0
+
+        self._segments = {}  # path -> _Segment
+        self._by_number = []  # file number -> _Segment
+        self._index = {}  # user_id -> array("Q") of record ids, oldest first
+        os.makedirs(self._dir(writer), exist_ok=True)
+        self._open_tail()
+        self.refresh()
+
+    def _dir(self, writer):
+        return os.path.join(self.root, f"w{writer}")
+
+    # ---------- writing ----------
+    def record(self, *args, **kwargs):
+        """queues one finished game; same arguments as pack()."""
+        self.append(pack(*args, **kwargs))
+
+    def close(self):
+        super().close()
+        if self._file:
+            self._file.close()
+            self._file = None
+        for segment in self._by_number:
+            segment.map, segment.mapped = None, 0
+
+    def _open_tail(self):
+        # the newest segment of this writer, minus any torn record from a crash
+        names = sorted(n for n in os.listdir(self._dir(self.writer)) if n.endswith(".seg"))
+        path = os.path.join(self._dir(self.writer), names[-1] if names else "000000.seg")
+        self._file = open(path, "ab")
+        size = self._file.tell()
+        if size % RECORD.size:
+            log.warning("dropping a torn record at the end of %s", path)
+            self._file.truncate(size - size % RECORD.size)
+        self._file_rows = size // RECORD.size
+
+    def _write(self, records):
+        while records:
+            if self._file_rows >= self.segment_records:
+                self._file.close()
+                number = int(os.path.basename(self._file.name)[:-4]) + 1
+                self._file = open(os.path.join(self._dir(self.writer), f"{number:06d}.seg"), "ab")
+                self._file_rows = 0
+            batch = records[:self.segment_records - self._file_rows]
+            records = records[len(batch):]
+            self._file.write(b"".join(batch))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file_rows += len(batch)
+
+    # ---------- indexing ----------
+    def refresh(self):
+        """indexes records appended since the last refresh, by any writer."""
+        for name in sorted(os.listdir(self.root)):
+            directory = os.path.join(self.root, name)
+            if not name.startswith("w") or not os.path.isdir(directory):
+                continue
+            for seg_name in sorted(os.listdir(directory)):
+                if seg_name.endswith(".seg"):
+                    self._index_segment(os.path.join(directory, seg_name))
+
+    def _index_segment(self, path):
+        segment = self._segments.get(path)
+        if segment is None:
+            segment = self._segments[path] = _Segment(path, len(self._by_number))
+            self._by_number.append(segment)
+        rows = os.path.getsize(path) // RECORD.size
+        if rows <= segment.rows:
+            return
+        users = self._rows(segment, segment.rows, rows)["user"]
+        # group the new rows by user, keeping file order within each user
+        order = np.argsort(users, kind="stable")
+        sorted_users = users[order]
+        starts = np.flatnonzero(np.r_[True, sorted_users[1:] != sorted_users[:-1]])
+        ids = (np.uint64(segment.number) << np.uint64(ROW_BITS)) + (order + segment.rows).astype(np.uint64)
+        for lo, hi in zip(starts.tolist(), starts[1:].tolist() + [len(order)]):
+            user_id = int(sorted_users[lo])
+            index = self._index.get(user_id)
+            if index is None:
+                index = self._index[user_id] = array("Q")
+            index.frombytes(ids[lo:hi].tobytes())
+        segment.rows = rows
+
+    def _rows(self, segment, lo, hi):
+        if hi <= lo:
+            return np.empty(0, dtype=DTYPE)
+        if segment.mapped < hi:
+            # the old map is left to the gc: arrays handed out may still view it
+            with open(segment.path, "rb") as f:
+                segment.map = mmap.mmap(f.fileno(), hi * RECORD.size, access=mmap.ACCESS_READ)
+            segment.mapped = hi
+        return np.frombuffer(segment.map, dtype=DTYPE, count=hi - lo, offset=lo * RECORD.size)
+
+    # ---------- queries ----------
+    def count(self, user_id):
+        self.refresh()
+        return len(self._index.get(int(user_id), ()))
+
+    def games(self, user_id, last=None):
+        """a user's records as a numpy structured array, oldest first (the `last` n only, if given)."""
+        self.refresh()
+        ids = np.frombuffer(self._index.get(int(user_id), array("Q")), dtype=np.uint64)
+        if last is not None:
+            ids = ids[-last:] if last else ids[:0]
+        out = np.empty(len(ids), dtype=DTYPE)
+        numbers = (ids >> np.uint64(ROW_BITS)).astype(np.int64)
+        rows = (ids & np.uint64((1 << ROW_BITS) - 1)).astype(np.int64)
+        for number in np.unique(numbers).tolist():
+            mine = numbers == number
+            segment = self._by_number[number]
+            out[mine] = self._rows(segment, 0, segment.rows)[rows[mine]]
+        return out
+
+    def distribution(self, user_id, mode=None):
+        return distribution(self.games(user_id), mode)
+
+    def elo_over_time(self, user_id):
+        return elo_over_time(self.games(user_id))
+
+
+# ---------- over one user's records ----------
+def distribution(games, mode=None):
+    """[wins in 1..6 guesses] + [losses], over all the games or one mode's."""
+    if mode is not None:
+        games = games[games["mode"] == MODES.index(mode)]
+    won = games["won"].astype(bool)
+    wins = np.bincount(games["guesses"][won], minlength=MAX_GUESSES + 1)[1:MAX_GUESSES + 1]
+    return wins.tolist() + [int((~won).sum())]
+
+
+def elo_over_time(games):
+    """[(unix time, elo after)] for the ranked games."""
+    games = games[games["mode"] == MODES.index("ranked")]
+    return list(zip(games["time"].tolist(), games["elo_after"].tolist()))
+
+
+SPARKS = "▁▂▃▄▅▆▇█"
+
+
+def format_history(games, recent=10, curve=30):
+    lines = []
+    for g in games[-recent:][::-1]:
+        result = f"🟩 {g['guesses']}/6" if g["won"] else "💀 X/6"
+        elo = f" `{int(g['elo_after']) - int(g['elo_before']):+}`" if g["mode"] == MODES.index("ranked") else ""
+        lines.append(f"`{ANSWERS[g['answer']].upper()}` {MODES[g['mode']]} {result}{elo} <t:{g['time']}:R>")
+
+    dist = distribution(games)
+    most = max(dist) or 1
+    lines.append("\n**guesses**")
+    for label, n in zip(["1", "2", "3", "4", "5", "6", "X"], dist):
+        lines.append(f"`{label}` {('🟥' if label == 'X' else '🟩') * max(1 if n else 0, round(n / most * 8))} {n}")
+
+    elos = [elo for _, elo in elo_over_time(games)[-curve:]]
+    if len(elos) > 1:
+        lo, hi = min(elos), max(elos)
+        spark = "".join(SPARKS[(e - lo) * (len(SPARKS) - 1) // max(1, hi - lo)] for e in elos)
+        lines.append(f"\n**elo, last {len(elos)} ranked**\n`{lo}` {spark} `{hi}`")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # a user's queries match a scan of everything, and cost next to nothing
+    # next to that scan as the history grows
+    import asyncio
+    import random
+    import tempfile
+
+    async def main():
+        rng = random.Random(0)
+        root = tempfile.mkdtemp()
+        writers = [GameHistory(root, writer=w, segment_records=50_000) for w in range(2)]
+        for w in writers:
+            w.start()
+
+        USERS, GAMES = 20_000, 200_000
+        expected = {}
+        t = time.perf_counter()
+        for i in range(GAMES):
+            user = rng.randrange(USERS)
+            guesses = rng.randint(1, 6)
+            won = rng.random() < 0.8
+            words = [rng.randrange(12000) for _ in range(guesses)]
+            writer = writers[user % 3 % 2]  # users spread over both writers, some on each
+            writer.record(user, rng.randrange(2300), words, rng.choice(MODES), won, 1000, 1000 + i % 50, at=i)
+            expected.setdefault(user, []).append((i, words, won))
+        took_append = time.perf_counter() - t
+        await asyncio.gather(*(w.durable() for w in writers))
+
+        t = time.perf_counter()
+        reader = GameHistory(root, writer=9)  # indexes everything on open
+        took_index = time.perf_counter() - t
+
+        for user in rng.sample(range(USERS), 300):
+            games = reader.games(user)
+            assert sorted(games["time"].tolist()) == [g[0] for g in expected.get(user, [])], user
+            for record in games:
+                _, words, won = next(g for g in expected[user] if g[0] == record["time"])
+                assert record["words"][:record["guesses"]].tolist() == words and bool(record["won"]) == won
+
+        user = rng.randrange(USERS)
+        per_query = min(
+            (lambda t: (reader.distribution(user), time.perf_counter() - t)[1])(time.perf_counter())
+            for _ in range(200)
+        )
+        t = time.perf_counter()
+        everything = np.concatenate([reader._rows(s, 0, s.rows) for s in reader._by_number])
+        full = np.bincount(everything["guesses"][(everything["user"] == user) & (everything["won"] == 1)], minlength=7)
+        took_scan = time.perf_counter() - t
+        assert full[1:].tolist() == reader.distribution(user)[:6]
+
+        print(f"{GAMES} games: {took_append / GAMES * 1e6:.1f} us per simulated game + record() on the loop, "
+              f"{took_index * 1000:.0f} ms to index from scratch")
+        print(f"one user's distribution: {per_query * 1e6:.0f} us, vs {took_scan * 1000:.1f} ms scanning every record")
+        for w in writers + [reader]:
+            w.close()
+
+    asyncio.run(main())
@@ -0,0 +1,195 @@
+"""
+the keep-alive web server, on aiohttp inside the bot's own event loop instead
+of a flask thread next to it. besides "/" it serves read-only json straight
+from the live ranking index and storage:
+
+    GET /api/leaderboard?page=1      one page of the ladder
+    GET /api/players/<user_id>       one player's stats and position
+    GET /metrics, /health            same as webserver.py
+
+responses are cached as encoded bytes. a cached response is reused while the
+ranking (and for a player, their stats) has not changed, and for at most
+`max_age` seconds after it has.
+"""
+import json
+import time
+
+from aiohttp import web
+
+import metrics
+from ranks import get_rank_with_division
+
+
+class HttpServer:
+    def __init__(self, ranking, storage, page_size=10, max_age=1.0):
+        self.ranking = ranking
+        self.storage = storage
+        self.page_size = page_size
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._cache = {}  # key -> (version, built at, body)
+        self._runner = None
+
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get("/", self.home),
+            web.get("/health", self.health),
+            web.get("/metrics", self.metrics),
+            web.get("/api/leaderboard", self.leaderboard),
+            web.get("/api/players/{user_id}", self.player),
+        ])
+
+    async def start(self, host="0.0.0.0", port=8080):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    # ---------- caching ----------
+    def _cached(self, key, build, extra=None):
+        # `extra` is whatever else the body depends on besides the ranking
+        version = (self.ranking.version, extra)
+        entry = self._cache.get(key)
+        now = time.monotonic()
+        if entry and (entry[0] == version or now - entry[1] < self.max_age):
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        body = json.dumps(build()).encode()
+        if len(self._cache) > 10_000:
+            self._cache.clear()
+        self._cache[key] = (version, now, body)
+        return body
+
+    @staticmethod
+    def _json(body, status=200):
+        return web.Response(body=body, status=status, content_type="application/json")
+
+    @staticmethod
+    def _error(message, status):
+        return web.json_response({"error": message}, status=status)
+
+    # ---------- routes ----------
+    async def home(self, request):
+        return web.Response(text="im mart")
+
+    async def health(self, request):
+        healthy, details = metrics.health()
+        return web.json_response(details, status=200 if healthy else 503)
+
+    async def metrics(self, request):
+        return web.Response(text=metrics.expose(), content_type="text/plain", charset="utf-8")
+
+    async def leaderboard(self, request):
+        total = len(self.ranking)
+        pages = max(1, (total - 1) // self.page_size + 1)
+        page = request.query.get("page", "1")
+        if not page.isdigit() or not 1 <= int(page) <= pages:
+            return self._error(f"page must be 1-{pages}", 400)
+        page = int(page)
+
+        def build():
+            start = (page - 1) * self.page_size
+            return {
+                "page": page,
+                "pages": pages,
+                "total": total,
+                "players": [
+                    {"position": i, "user_id": user_id, "elo": elo, **_rank(elo)}
+                    for i, (user_id, elo) in enumerate(self.ranking.slice(start, self.page_size), start=start + 1)
+                ],
+            }
+
+        return self._json(self._cached(("page", page), build))
+
+    async def player(self, request):
+        user_id = request.match_info["user_id"]
+        if not user_id.isdigit():
+            return self._error("user id must be a number", 400)
+
+        stats = self.storage.find_player(user_id)
+        if stats is None:
+            return self._error("no such player", 404)
+
+        def build():
+            return {"user_id": user_id, "position": self.ranking.position(user_id), **stats, **_rank(stats["elo"])}
+
+        # a game that ends with a 0 elo change still moves wins/losses but not the ranking
+        extra = (stats["elo"], stats["wins"], stats["losses"])
+        return self._json(self._cached(("player", user_id), build, extra))
+
+
+def _rank(elo):
+    rank = get_rank_with_division(elo)
+    if rank is None:
+        return {"rank": None, "division": None}
+    return {"rank": rank[2], "division": rank[4] or None}
+
+
+if __name__ == "__main__":
+    # throughput against a 100k player ladder, and what it does to loop lag
+    import asyncio
+    import random
+
+    import aiohttp
+
+    from ranking import RankingIndex
+
+    PLAYERS = 100_000
+    REQUESTS = 20_000
+    CONCURRENCY = 100
+
+    class FakeStorage:
+        def __init__(self, players):
+            self.players = players
+
+        def find_player(self, user_id):
+            return self.players.get(str(user_id))
+
+    async def main():
+        rng = random.Random(0)
+        players = {str(i): {"elo": rng.randint(0, 11000), "wins": 5, "losses": 5} for i in range(PLAYERS)}
+        ranking = RankingIndex()
+        for uid, stats in players.items():
+            ranking.update(uid, stats["elo"])
+
+        server = HttpServer(ranking, FakeStorage(players))
+        await server.start("127.0.0.1", 8089)
+        lag = asyncio.create_task(metrics.watch_loop_lag(0.01))
+
+        async def churn():
+            # ranked games finishing while the api is hammered
+            while True:
+                uid = str(rng.randrange(PLAYERS))
+                players[uid]["elo"] += rng.randint(-75, 250)
+                ranking.update(uid, players[uid]["elo"])
+                await asyncio.sleep(0.001)
+
+        churner = asyncio.create_task(churn())
+        paths = [f"/api/leaderboard?page={rng.randint(1, 50)}" if rng.random() < 0.7
+                 else f"/api/players/{rng.randrange(PLAYERS)}" for _ in range(REQUESTS)]
+
+        async with aiohttp.ClientSession("http://127.0.0.1:8089") as session:
+            async def worker(mine):
+                for path in mine:
+                    async with session.get(path) as response:
+                        assert response.status == 200, path
+                        await response.read()
+
+            t = time.perf_counter()
+            await asyncio.gather(*(worker(paths[i::CONCURRENCY]) for i in range(CONCURRENCY)))
+            took = time.perf_counter() - t
+
+        churner.cancel()
+        lag.cancel()
+        await server.stop()
+        child = metrics.LOOP_LAG.labels(None)
+        print(f"{REQUESTS} requests in {took:.2f}s = {REQUESTS / took:.0f} req/s "
+              f"(client in the same process), cache {server.hits} hits / {server.misses} misses")
+        print(f"loop lag: mean {child.sum / max(1, child.count) * 1000:.2f} ms over {child.count} samples")
+
+    asyncio.run(main())
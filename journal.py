@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+
+from game import Game
+from persistence import BatchedAppender
+
+log = logging.getLogger("wordle.persistence")
+
+
+class RankedJournal(BatchedAppender):
+    """
+    append-only log of ranked games, one line per event:
+
+        S <user_id> <answer_id> <channel_id>    game started
+        G <user_id> <word_id>                   guess
+        F <user_id> [<elo> <wins> <losses>]     game over, with the stats it left
+
+    appends are queued on the loop and written + fsynced in batches, in order,
+    on the journal's own worker thread. replaying the file rebuilds ranked_games exactly; once
+    enough events have been written the file is compacted down to the games
+    that are still running.
+
+    the stats on F lines make a finished game durable without waiting for
+    leaderboard.json: replay() collects them in `settled` for the caller to
+    apply. a compaction keeps them until `before_compact` (the leaderboard's
+    durable()) has returned.
+    """
+
+    def __init__(self, path, snapshot, interval=0.05, compact_every=5000):
+        super().__init__(interval, "journal")  # a short interval: a burst of appends shares one fsync
+        self.path = path
+        self.snapshot = snapshot  # -> {user_id: Game} of running ranked games
+        self.compact_every = compact_every
+        self.compactions = 0
+        self.before_compact = None  # async, awaited before a compaction drops F lines
+        self.settled = {}  # user_id -> stats from the F lines replay() found
+        self._settled = {}  # user_id -> F line with stats, since the last compaction began
+        self._since_compact = 0
+        self._flushing = asyncio.Lock()  # a compaction awaits before_compact, nothing may flush meanwhile
+        self._file = None
+
+    # ---------- events ----------
+    def started(self, user_id, game):
+        self.append(f"S {user_id} {game.answer_id} {game.channel_id or 0}\n")
+
+    def guessed(self, user_id, word_id):
+        self.append(f"G {user_id} {word_id}\n")
+
+    def finished(self, user_id, stats=None):
+        if stats is None:
+            self.append(f"F {user_id}\n")
+            return
+        line = f"F {user_id} {stats['elo']} {stats['wins']} {stats['losses']}\n"
+        self._settled[user_id] = line
+        self.append(line)
+
+    # ---------- replay ----------
+    def replay(self):
+        games = {}
+        if not os.path.exists(self.path):
+            return games
+
+        n = 0
+        with open(self.path) as f:
+            for n, line in enumerate(f, start=1):
+                parts = line.split()
+                try:
+                    if not line.endswith("\n"):
+                        raise ValueError("torn")
+                    if parts[0] == "S":
+                        user_id, answer_id, channel_id = map(int, parts[1:4])
+                        games[user_id] = Game(answer_id, ranked=True, channel_id=channel_id or None)
+                    elif parts[0] == "G":
+                        user_id, word_id = map(int, parts[1:3])
+                        games[user_id].guess(word_id)
+                    elif parts[0] == "F":
+                        user_id = int(parts[1])
+                        if len(parts) > 2:
+                            elo, wins, losses = map(int, parts[2:5])
+                            self.settled[user_id] = {"elo": elo, "wins": wins, "losses": losses}
+                        games.pop(user_id, None)
+                    else:
+                        raise ValueError(parts[0])
+                except (IndexError, KeyError, ValueError):
+                    # a torn last line from a crash mid-append, or garbage
+                    log.warning("skipping bad journal line %d: %r", n, line)
+        # rewrite the file on the first flush, which also drops any torn tail
+        self._since_compact = max(n, self.compact_every)
+        return games
+
+    # ---------- writing ----------
+    async def flush(self):
+        async with self._flushing:
+            if self._since_compact + len(self._pending) < self.compact_every:
+                await super().flush()
+                return
+            self._wake.clear()
+            self._settled = {}
+            if self.before_compact:
+                await self.before_compact()  # F lines from before this are safe without us now
+            lines = list(self._settled.values()) + self._snapshot_lines()
+            self._pending.clear()
+            await self._on_worker(self._compact, lines)
+
+    def close(self):
+        super().close()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _snapshot_lines(self):
+        lines = []
+        for user_id, game in self.snapshot().items():
+            if game.finished:
+                continue
+            lines.append(f"S {user_id} {game.answer_id} {game.channel_id or 0}\n")
+            lines.extend(f"G {user_id} {word_id}\n" for word_id in game.guess_ids())
+        return lines
+
+    def _write(self, lines):
+        if self._file is None:
+            self._file = open(self.path, "a")
+        self._file.write("".join(lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._since_compact += len(lines)
+
+    def _compact(self, lines):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.write("".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        if self._file:
+            self._file.close()
+            self._file = None
+        os.replace(tmp, self.path)
+        self._since_compact = len(lines)
+        self.compactions += 1
@@ -0,0 +1,62 @@
+import logging
+import logging.handlers
+import os
+import queue
+
+LOG_FILE = "discord.log"
+LOG_MAX_BYTES = 1_000_000
+LOG_BACKUPS = 3
+
+# one logger per component; LOG_LEVELS="wordle.game=DEBUG,discord=WARNING" overrides these
+LEVELS = {
+    "discord": logging.INFO,  # gateway / http
+    "wordle.game": logging.INFO,  # commands, elo
+    "wordle.persistence": logging.INFO,  # leaderboard / storage writes
+}
+
+FORMAT = "[{asctime}] [{levelname:<8}] {name}: {message}"
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # the stock prepare() formats on the calling thread; hand the raw record
+    # to the listener instead so %-formatting happens off the event loop too
+    def prepare(self, record):
+        return record
+
+
+def parse_levels(spec):
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+def setup_logging(path=LOG_FILE, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS, levels=None):
+    """
+    routes every logger through a queue to a listener thread that formats and
+    writes to a size-rotated file and stderr. returns the listener; stop() it
+    on shutdown to drain the queue.
+    """
+    formatter = logging.Formatter(FORMAT, "%Y-%m-%d %H:%M:%S", style="{")
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+    )
+    file_handler.setFormatter(formatter)
+    console = logging.StreamHandler()
+    console.setFormatter(formatter)
+
+    q = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(q, file_handler, console, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.handlers[:] = [_QueueHandler(q)]
+    root.setLevel(logging.INFO)
+
+    levels = {**LEVELS, **(levels or {}), **parse_levels(os.environ.get("LOG_LEVELS", ""))}
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    listener.start()
+    return listener
@@ -1,202 +1,109 @@
 import random
 import discord
-import math
 from datetime import timedelta
 
 from discord.ext import commands
 from dotenv import load_dotenv
 from discord import app_commands
 import os
+import sys
+import time
+import logging
 import webserver
+from httpserver import HttpServer
+import metrics
+from logs import setup_logging
+from storage import open_storage, read_json
+from journal import RankedJournal
+from ranking import RankingIndex, SharedLadder, TopView
+from sessions import SessionExpiry
+from actors import UserActors
+from board import BoardMessages
+import solver
+from analysis import analyze, format_analysis
+import daily
+from history import GameHistory, format_history
+from ranks import (
+    RANKS, get_rank, get_next_major_rank, get_rank_with_division, did_rank_up, did_rank_down
+)
 
 load_dotenv()
 
-TOKEN = os.environ['discordkey']
+log_listener = setup_logging()
+log = logging.getLogger("wordle.game")
 
-import json
+TOKEN = os.environ.get('discordkey')  # only needed to run the bot; bench.py imports this module without one
 
 LEADERBOARD_FILE = "leaderboard.json"
+ACTIVE_GAMES_FILE = "active_ranked_games.json"  # games from before the journal, compensated once
+RANKED_JOURNAL_FILE = "ranked_games.journal"
+DATABASE_FILE = "wordle.db"
+DAILY_FILE = "daily.json"
+HISTORY_DIR = "history"  # every finished game, see history.py
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "json")  # "json" or "sqlite"
+LEADERBOARD_FLUSH_INTERVAL = float(os.environ.get("LEADERBOARD_FLUSH_INTERVAL", 5))  # seconds between json writes
+CASUAL_GAME_TTL = float(os.environ.get("CASUAL_GAME_TTL", 60 * 60))  # idle seconds before a casual game is dropped
+RANKED_GAME_TTL = float(os.environ.get("RANKED_GAME_TTL", 6 * 60 * 60))  # idle seconds before a ranked game is lost
+WEB_SERVER = os.environ.get("WEB_SERVER", "flask")  # "flask": thread next to the bot; "aiohttp": in the bot's loop, with the json api
+WEB_PORT = int(os.environ.get("WEB_PORT", 8080))
+BOARD_MODE = os.environ.get("BOARD_MODE", "edit")  # "edit": one board message per game, edited per guess; "send": new message per guess
+SHARD_COUNT = int(os.environ.get("SHARD_COUNT", 0))  # 0: a plain Bot; otherwise an AutoShardedBot with this many shards
+SHARD_PROCESSES = int(os.environ.get("SHARD_PROCESSES", 1))  # worker processes the shards are split across, see shards.py
+SHARD_WORKER = int(os.environ.get("SHARD_WORKER", 0))  # this worker's index, set by shards.py
+
+if SHARD_PROCESSES > 1:
+    if STORAGE_BACKEND != "sqlite":
+        raise SystemExit("running several shard processes needs STORAGE_BACKEND=sqlite")
+    RANKED_JOURNAL_FILE = f"ranked_games.{SHARD_WORKER}.journal"  # each worker journals its own games
+    DAILY_FILE = f"daily.{SHARD_WORKER}.json"  # a guild is always on one shard, so its aggregates are too
 
 import asyncio
 
-guess_locks = {}
-
-ACTIVE_GAMES_FILE = "active_ranked_games.json"
-
-
-def save_active_games():
-    with open(ACTIVE_GAMES_FILE, "w") as f:
-        json.dump(
-            {
-                str(uid): {
-                    "channel_id": game["channel_id"],
-                    "guesses": game["guesses"],
-                    "finished": game["finished"]
-                }
-                for uid, game in ranked_games.items()
-                if not game.get("finished")
-            },
-            f,
-            indent=2
-        )
-
-
-def load_active_games():
-    if not os.path.exists(ACTIVE_GAMES_FILE):
-        return {}
-
-    try:
-        with open(ACTIVE_GAMES_FILE) as f:
-            content = f.read().strip()
-            if not content:
-                os.remove(ACTIVE_GAMES_FILE)
-                return {}
-
-            return json.loads(content)
+actors = UserActors(  # runs each user's game commands one at a time
+    on_wait=lambda fn, seconds: metrics.QUEUE_WAIT.labels(fn.__name__).observe(seconds)
+)
+boards = BoardMessages()
 
-    except json.JSONDecodeError:
-        os.remove(ACTIVE_GAMES_FILE)
-        return {}
+storage = open_storage(
+    STORAGE_BACKEND, LEADERBOARD_FILE, DATABASE_FILE,
+    interval=LEADERBOARD_FLUSH_INTERVAL
+)
 
 
-def load_leaderboard():
-    if not os.path.exists(LEADERBOARD_FILE):
-        return {}
-    with open(LEADERBOARD_FILE, "r") as f:
-        return json.load(f)
-
-
-def save_leaderboard():
-    with open(LEADERBOARD_FILE, "w") as f:
-        json.dump(leaderboard_data, f, indent=2)
-
-
-leaderboard_data = load_leaderboard()
+if SHARD_PROCESSES > 1:
+    ranking = SharedLadder(storage)  # other workers change it too, so ask the database
+else:
+    ranking = RankingIndex()
+    for uid, stats in storage.all_players():
+        ranking.update(uid, stats["elo"])
 
 
 def get_user_stats(user_id):
-    user_id = str(user_id)
-
-    if user_id not in leaderboard_data:
-        leaderboard_data[user_id] = {
-            "elo": 1000,
-            "wins": 0,
-            "losses": 0
-        }
-        save_leaderboard()
-
-    return leaderboard_data[user_id]
-
-
-RANKS = [
-    (0, "Bigma", "<:caseoh:1347767315084873859>"),
-    (500, "Bronze", "🥉"),
-    (1200, "Silver", "🥈"),
-    (1500, "Gold", "🥇"),
-    (1800, "Platinum", "🔷"),
-    (2100, "Diamond", "💎"),
-    (2400, "Mythic", "🐉"),
-    (2700, "Master", "🔥"),
-    (3000, "Grandmaster", "👑"),
-    (3300, "Legend", "⚡"),
-    (3600, "Godlike", "⚜️"),
-    (4000, "Immortal", "🌌"),
-    (4500, "Celestial", "🔱"),
-    (5100, "Ascendant", "🌠"),
-    (5800, "Transcendent", "🔮"),
-    (6500, "Absolute", "⚫"),
-    (7200, "Overlord", "🧙‍♂️"),
-    (7900, "Empyrean", "☀️"),
-    (8600, "Cosmic", "🪐"),
-    (9300, "Astral", "✨"),
-    (10000, "Singularity", "🌀"),
-    (676767, "ohio sigma rizzler", "🗿"),
-    (696969, "elaine", "🥰"),
-]
-
-DIVISIONS = 5
-
-
-def get_rank(elo):
-    current = RANKS[0]
-    for r in RANKS:
-        if elo >= r[0]:
-            current = r
-        else:
-            break
-    return current  # (threshold, name, emoji)
-
-
-def get_next_rank(elo):
-    for r in RANKS:
-        if elo < r[0]:
-            return r
-    return None
-
-
-def get_major_rank(elo):
-    current = RANKS[0]
-    for r in RANKS:
-        if elo >= r[0]:
-            current = r
-        else:
-            break
-    return current
-
-
-def major_rank_start(elo):
-    return get_rank(elo)[0]
-
-
-def get_next_major_rank(elo):
-    for r in RANKS:
-        if elo < r[0]:
-            return r
-    return None
-
-
-def get_rank_with_division(elo):
-    for i in range(len(RANKS) - 1, -1, -1):
-        start, name, emoji = RANKS[i]
-        end = RANKS[i + 1][0] if i + 1 < len(RANKS) else 0
-
-        if elo >= start:
-            span = end - start
-            div_size = span / DIVISIONS
-
-            # raw division
-            if end > elo:
-                div = int((elo - start) / div_size) + 1
-                div = max(1, min(DIVISIONS, div))
-            else:
-                div = 0
+    stats = storage.get_player(user_id)
+    leaderboard_top.update(user_id, stats["elo"])
+    return stats
 
-            return (start, end, name, emoji, div)
 
-    return None
+def save_user_stats(user_id, stats):
+    t = time.perf_counter()
+    storage.save_player(user_id, stats)
+    metrics.PERSIST_TIME.labels("save_user_stats").observe(time.perf_counter() - t)
+    leaderboard_top.update(user_id, stats["elo"])
 
 
-def rank_key(rank_tuple):
+def finish_ranked(user_id, guesses, won):
     """
-    rank_tuple from get_rank_with_division: (start, end, name, emoji, div)
-    higher is better.
+    scores a ranked game and releases its claim in one step: (old elo, stats,
+    delta), or None if this worker no longer holds the game.
     """
-    start, end, name, emoji, div = rank_tuple
-    # index of major rank in RANKS list
-    major_index = next(i for i, r in enumerate(RANKS) if r[0] == start)
-    return (major_index, div)
-
-
-def did_rank_up(old_rank, new_rank):
-    if not old_rank or not new_rank:
-        return False
-    return rank_key(new_rank) > rank_key(old_rank)
-
-
-def did_rank_down(old_rank, new_rank):
-    if not old_rank or not new_rank:
-        return False
-    return rank_key(new_rank) < rank_key(old_rank)
+    t = time.perf_counter()
+    result = storage.finish_ranked(
+        user_id, SHARD_WORKER, lambda elo: new_ranked_elo_delta(elo, guesses, won=won), won
+    )
+    metrics.PERSIST_TIME.labels("save_user_stats").observe(time.perf_counter() - t)
+    if result:
+        leaderboard_top.update(user_id, result[1]["elo"])
+    return result
 
 
 def progress_bar(current, start, end, length=30):
@@ -212,274 +119,211 @@ def progress_bar(current, start, end, length=30):
 
 # ----------------------------------------------------------- ELO SYSTEM -----------------------------------------------------
 
-# ----- ELO TUNING -----
-
-ELO_CENTER = 2500  # where ladder stabilizes
-ELO_WIN_FLOOR = 2000  # wins never lose elo below ts
-
-K_MAX = 22  # volatility at very low elo
-K_MIN = 2  # 3                  # volatility at very high elo
-K_DECAY_POWER = 3.4  # 1.5        # how fast K shrinks
-
-NEUTRAL_BASE = 7  # neutral guesses at elo=0
-NEUTRAL_DROP = 4.2  # how much neutral shrinks at high elo
-
-LOSS_GUESSES = 7  # treat loss as this many guesses
-LOSS_SCALE_POWER = 2.1  # how much harsher losses get at high elo
-
-LOW_ELO_WIN_BONUS = 30  # max bonus for bad-but-winning games
-
-MAX_GAIN = 250
-MAX_LOSS = -75
-
-
-def neutral_guesses(elo):
-    return NEUTRAL_BASE - NEUTRAL_DROP * (elo / (elo + ELO_CENTER))
-
-
-def k_factor(elo):
-    return K_MIN + (K_MAX - K_MIN) / (1 + (elo / ELO_CENTER) ** K_DECAY_POWER)
-
-
-def clamp(x, lo, hi):
-    return max(lo, min(hi, x))
-
-
-def performance_bonus(elo, guesses):
-    if guesses >= 4:
-        return 1.0
+from elo import LOSS_GUESSES, new_ranked_elo_delta
 
-    scale = max(0.0, (ELO_CENTER - elo) / ELO_CENTER)
 
-    if guesses == 3:
-        return 1.0 + 0.1 * scale
-    if guesses == 2:
-        return 1.0 + 0.95 * scale
+# ---------- load word lists ----------
+from feedback import ANSWERS
+from wordindex import WORDS
 
 
-def ranked_elo_delta(elo, guesses, won):
-    g = guesses if won else LOSS_GUESSES
+# ---------- wordle logic ----------
+from game import Game
+from render import rank_label
 
-    base = k_factor(elo) * (neutral_guesses(elo) - g)
-    print(base)
 
-    # scale losses by elo
-    if not won:
-        print("imgi")
-        loss_scale = (elo / ELO_WIN_FLOOR) ** LOSS_SCALE_POWER
-        print(loss_scale)
-        base *= loss_scale
-        print(base)
-
-    # wins never lose elo below threshold
-    if won and elo < ELO_WIN_FLOOR:
-        base = max(base, 0)
-
-    # 4 guesses always safe
-    if won and guesses == 4:
-        base = max(base, 0)
-
-    # bonus for cracked games
-    if won:
-        base *= performance_bonus(elo, guesses)
-
-    # low-elo pity gain for ugly wins
-    if won and elo < ELO_WIN_FLOOR and base == 0:
-        bonus_scale = 1 - (elo / ELO_WIN_FLOOR)
-        base += LOW_ELO_WIN_BONUS * bonus_scale
-
-    base = clamp(base, MAX_LOSS, MAX_GAIN)
-
-    return round(base)
-
-
-# def new_ranked_elo_delta(elo, guesses, won):
-#     g = guesses if won else 7
-#     t = (elo - (500 * ((7 - g) ** 1.6))) / 5600
-#     h = -800 * math.sin(t)
-#     return max(-75, round(h)) if g > 4 else max(1, round(h))
-
-def new_ranked_elo_delta(elo, guesses, won):
-    g = guesses if won else 7
-    t = (elo - (500 * ((7 - g) ** 1.6))) / 5600
-    h = -800 * math.sin(t)
-    print(h)
-    # softener: reduces how brutal bad outcomes are
-    GRIND_SOFTENER = 0.25
-    bounded_change_by_g = {1: 150, 2: 50, 3: 15, 4: 3, 5: 35, 6: 55, 7: 75}
-    if g > 4:
-        # different caps for 5/6/7 so they are different this comment is really mart
-
-        h = h * GRIND_SOFTENER
-        print(h)
-        cap = -bounded_change_by_g[g]
-        return max(cap, round(h))
-
-    # good wins
-    if g < 5:
-        return min(max(bounded_change_by_g[g], round(h)), MAX_GAIN)
-    return min(max(15, round(h)), MAX_GAIN)
-
-
-def cooked_ranked_elo_delta(elo, guesses, won):
-    # --- constants ---
-    LOSS_SCALE = 0.35  # scales losses only
-
-    # --- original function (unchanged) ---
-    def old_func(elo, g):
-        t = (elo - (500 * ((7 - g) ** 1.6))) / 5600
-        h = -800 * math.sin(t)
-        return h
-
-    # --- new damped function (for g > 4) ---
-    def new_func(elo, g):
-        A = 800
-        B = 2
-        C = 0.09
-        D = 3
-        P = 1
-        p = 2
-        c = 0.8
-        phi = 1.9
-
-        t = (elo - 500 * ((7 - g) ** 1.6)) / 5600
-        tp = max(0.0, t)
-
-        term1 = 1 - (tp ** p) / (tp ** p + c ** p)
-        term2 = (C ** D) / (tp ** D + C ** D)
-        term3 = (math.sin(B * (t ** P) - phi) + 1) / 2
-        offset = 15 / (g - 1)
-
-        return A * term1 * term2 * term3 + offset
-
-    # --- game logic ---
-    g = guesses if won else 7
-
-    if won and g <= 4:
-        h = old_func(elo, g)
-        return max(1, round(h))
-
-    h = new_func(elo, g)
-
-    # scale losses only
-    if not won:
-        h *= LOSS_SCALE
-        return max(-150, round(h))
+# ---------- discord bot ----------
+intents = discord.Intents.default()
+intents.message_content = True
+intents.members = True
+if SHARD_COUNT:
+    bot = commands.AutoShardedBot(
+        command_prefix="!", intents=intents, shard_count=SHARD_COUNT,
+        shard_ids=list(range(SHARD_WORKER, SHARD_COUNT, SHARD_PROCESSES))
+    )
+else:
+    bot = commands.Bot(command_prefix="!", intents=intents)
+tree = bot.tree
 
-    return max(1, round(h))
+games = {}
+daily_games = {}
+daily_results = daily.DailyResults(
+    DAILY_FILE, interval=LEADERBOARD_FLUSH_INTERVAL,
+    shared=storage if SHARD_PROCESSES > 1 else None, owner=SHARD_WORKER  # once a day across all workers
+)
+history = GameHistory(HISTORY_DIR, writer=SHARD_WORKER)
+history.on_write = metrics.PERSIST_TIME.labels("history").observe
+journal = RankedJournal(RANKED_JOURNAL_FILE, lambda: ranked_games)
+journal.on_write = metrics.PERSIST_TIME.labels("journal").observe
+if STORAGE_BACKEND == "json":
+    storage.writer.on_write = metrics.PERSIST_TIME.labels("leaderboard_file").observe
+ranked_games = journal.replay()  # ranked games survive restarts
+if STORAGE_BACKEND == "json":
+    # a finished game's stats are durable once its F line is, leaderboard.json catches up on its interval
+    for uid, stats in journal.settled.items():
+        storage.save_player(uid, stats)
+        ranking.update(str(uid), stats["elo"])
+    journal.before_compact = storage.durable
+    # its claims only live in memory, the journal is what keeps them
+    for uid in ranked_games:
+        storage.claim_ranked(uid, SHARD_WORKER)
+
+# claims say which worker owns a user's ranked game. sqlite drops the claim in
+# the same commit as the elo change, so a replayed game without one was already
+# scored (its F line died with the process) or belongs to someone else: never
+# take a claim again here, only resume the games this worker still holds
+storage.release_claims(SHARD_WORKER, keep=ranked_games)
+for uid in list(ranked_games):
+    if storage.ranked_owner(uid) != SHARD_WORKER:
+        log.warning("dropping replayed ranked game of %s, it was already scored or another worker owns it", uid)
+        journal.finished(uid)
+        del ranked_games[uid]
+
+
+def record_game(user_id, game, mode, won, elo_before=0, elo_after=0):
+    history.record(user_id, game.answer_id, game.guess_ids(), mode, won, elo_before, elo_after)
+
+
+def end_ranked(user_id, game, stats=None):
+    # local bookkeeping once a ranked game is over, scored or not
+    game.finished = True
+    journal.finished(user_id, stats)
+    del ranked_games[user_id]
+    sessions.forget(user_id, "ranked")
+
+
+ALREADY_ENDED = "ur ranked game was already ended somewhere else"
+
+
+def ranked_loss(user_id, game):
+    """applies a ranked loss, ends the game and returns the message for it."""
+    result = finish_ranked(user_id, 6, won=False)
+    end_ranked(user_id, game, result and result[1])
+    if result is None:
+        return ALREADY_ENDED
+    old_elo, stats, delta = result
+    record_game(user_id, game, "ranked", False, old_elo, stats["elo"])
+
+    old = get_rank_with_division(old_elo)
+    new = get_rank_with_division(stats["elo"])
+
+    rankdown_msg = ""
+    if old and new:
+        if did_rank_down(old, new):
+            rankdown_msg = (
+                f"\n\n💀 **RANK DOWN** 💀\n"
+                f"{old[3]} **{old[2]} {old[4]}** -> {new[3]} **{new[2]} {new[4]}**"
+            )
 
+    metrics.GAMES_FINISHED.labels("ranked_loss").inc()
 
-# ---------- load word lists ----------
-with open("answers.txt") as f:
-    ANSWERS = [line.strip() for line in f]
+    return (
+        f"**RANKED LOSS** 💀\n"
+        f"word was `{game.answer.upper()}`\n"
+        f"elo: `{delta}` -> **{stats['elo']}**"
+        f"{rankdown_msg}"
+    )
 
-with open("words.txt") as f:
-    WORDS = set(line.strip() for line in f)
 
+async def ranked_result_durable():
+    # the one write worth waiting for: the journal's F line, which carries the new stats
+    await journal.durable()
 
-# ---------- wordle logic ----------
-yellowEmojis = {"a": "<:yellow_a:1471405850584420372>", "b": "<:yellow_b:1471405852027125832>", "c": "<:yellow_c:1471405852945551361>", "d": "<:yellow_d:1471405854103179348>", "e": "<:yellow_e:1471405854652633110>", "f": "<:yellow_f:1471405855885758629>", "g": "<:yellow_g:1471405856842322021>", "h": "<:yellow_h:1471405858952052848>", "i": "<:yellow_i:1471405859962884211>", "j": "<:yellow_j:1471405861342810258>", "k": "<:yellow_k:1471405862546571305>", "l": "<:yellow_l:1471405869332959436>", "m": "<:yellow_m:1471405870767407105>", "n": "<:yellow_n:1471405871799079103>", "o": "<:yellow_o:1471405873065623632>", "p": "<:yellow_p:1471405880812769426>", "q": "<:yellow_q:1471405882641219678>", "r": "<:yellow_r:1471405883601850439>", "s": "<:yellow_s:1471405885548007578>", "t": "<:yellow_t:1471405886655299721>", "u": "<:yellow_u:1471405887963795497>", "v": "<:yellow_v:1471405889712816290>", "w": "<:yellow_w:1471405890744881246>", "x": "<:yellow_x:1471405894674944145>", "y": "<:yellow_y:1471405896138752145>", "z": "<:yellow_z:1471405898231709696>"}
-greenEmojis = {"a": "<:green_a:1471405772356456643>", "b": "<:green_b:1471405773488914554>", "c": "<:green_c:1471405774554271849>", "d": "<:green_d:1471405776106033176>", "e": "<:green_e:1471405777481895937>", "f": "<:green_f:1471405778953830606>", "g": "<:green_g:1471405781071953992>", "h": "<:green_h:1471405782141632686>", "i": "<:green_i:1471405783437541557>", "j": "<:green_j:1471405784670670972>", "k": "<:green_k:1471405786386268202>", "l": "<:green_l:1471405787724382218>", "m": "<:green_m:1471405789100118048>", "n": "<:green_n:1471405790542823538>", "o": "<:green_o:1471405791826415666>", "p": "<:green_p:1471405792971325563>", "q": "<:green_q:1471405794598584517>", "r": "<:green_r:1471405795621998634>", "s": "<:green_s:1471405796880547860>", "t": "<:green_t:1471405798272925739>", "u": "<:green_u:1471405800206635150>", "v": "<:green_v:1471405801401876520>", "w": "<:green_w:1471405803150774282>", "x": "<:green_x:1471405804015059092>", "y": "<:green_y:1471405805554241557>", "z": "<:green_z:1471405806829436949>"}
-grayEmojis = {"a": "<:gray_a:1471405723865972780>", "b": "<:gray_b:1471405725912793260>", "c": "<:gray_c:1471405726781149205>", "d": "<:gray_d:1471405728018464800>", "e": "<:gray_e:1471405728974770216>", "f": "<:gray_f:1471405730115354654>", "g": "<:gray_g:1471405731805925387>", "h": "<:gray_h:1471405720393220207>", "i": "<:gray_i:1471405733240377499>", "j": "<:gray_j:1471405734343348359>", "k": "<:gray_k:1471405735903494398>", "l": "<:gray_l:1471405737036222517>", "m": "<:gray_m:1471405738181267518>", "n": "<:gray_n:1471405721462509660>", "o": "<:gray_o:1471405739380707408>", "p": "<:gray_p:1471405740919885835>", "q": "<:gray_q:1471405742467584010>", "r": "<:gray_r:1471405743763881994>", "s": "<:gray_s:1471405722720796786>", "t": "<:gray_t:1471405744317399092>", "u": "<:gray_u:1471405747416862802>", "v": "<:gray_v:1471405748729937920>", "w": "<:gray_w:1471405750243819645>", "x": "<:gray_x:1471405751422418965>", "y": "<:gray_y:1471405752794091583>", "z": "<:gray_z:1471405760251564045>"}
-
-def green(word, answer):
-    return [word[i] == answer[i] for i in range(5)]
-
-
-def yellow(word, answer, greenlist):
-    yellowlist = [False] * 5
-    remaining = []
-
-    for i in range(5):
-        if not greenlist[i]:
-            remaining.append(answer[i])
-
-    for i in range(5):
-        if not greenlist[i] and word[i] in remaining:
-            yellowlist[i] = True
-            remaining.remove(word[i])
-
-    return yellowlist
-KEYBOARD_ROWS = [
-    "qwertyuiop",
-    "asdfghjkl",
-    "zxcvbnm"
-]
-
-
-def format_result(word, greenlist, yellowlist):
-    emojis = []
-    for i in range(5):
-        if greenlist[i]:
-            emojis.append(greenEmojis[word[i]])
-        elif yellowlist[i]:
-            emojis.append(yellowEmojis[word[i]])
-        else:
-            emojis.append(grayEmojis[word[i]])
-    return "".join(emojis)
 
+async def expire_game(user_id, mode):
+    # in the user's turn, so it never interleaves with one of their guesses
+    await actors.run(user_id, end_idle_game, user_id, mode)
 
 
-PRIORITY = {
-    "⬜": 0,
-    "⬛": 1,
-    "🟨": 2,
-    "🟩": 3
-}
+async def end_idle_game(user_id, mode):
+    if sessions.active(user_id, mode):
+        return  # they came back while this was queued
+    boards.drop(user_id)
 
-ROW_INDENTS = [
-    0,  # qwertyuiop
-    5,  # asdfghjkl
-    15  # zxcvbnm
-]
+    if mode == "casual":
+        if games.pop(user_id, None):
+            metrics.GAMES_FINISHED.labels("casual_expired").inc()
+    elif mode == "daily":
+        game = daily_games.pop(user_id, None)
+        if game:
+            daily_results.abandon(user_id)
+            record_game(user_id, game, "daily", False)
+            metrics.GAMES_FINISHED.labels("daily_expired").inc()
+    else:
+        game = ranked_games.get(user_id)
+        if game is None or game.finished:
+            return
+        message = ranked_loss(user_id, game)
+        await ranked_result_durable()
+        channel = bot.get_channel(game.channel_id)
+        if channel:
+            await channel.send(f"<@{user_id}> ur ranked game timed out bc u left 💀\n{message}")
 
 
-def empty_keyboard():
-    return {chr(c): "⬜" for c in range(ord("a"), ord("z") + 1)}
+sessions = SessionExpiry({"casual": CASUAL_GAME_TTL, "ranked": RANKED_GAME_TTL, "daily": CASUAL_GAME_TTL}, expire_game)
 
+metrics.Gauge("wordle_games", "games in progress", lambda: {"casual": len(games), "ranked": len(ranked_games), "daily": len(daily_games)}, "mode")
+metrics.Gauge("wordle_gateway_latency_seconds", "discord gateway heartbeat latency", lambda: bot.latency)
+metrics.Gauge("wordle_queued_commands", "commands waiting in user mailboxes", actors.queued)
 
-def update_keyboard(kb, word, greenlist, yellowlist):
-    for i, letter in enumerate(word):
-        if greenlist[i]:
-            new = "🟩"
-        elif yellowlist[i]:
-            new = "🟨"
-        else:
-            new = "⬛"
 
-        if PRIORITY[new] > PRIORITY[kb[letter]]:
-            kb[letter] = new
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.started_at = time.perf_counter()
 
 
-def render_keyboard(kb):
-    lines = []
-    for row, indent in zip(KEYBOARD_ROWS, ROW_INDENTS):
-        keys = []
-        for letter in row:
-            state = kb[letter]
-            keys.append(f"{state}**{letter.upper()}**")
-        line = " ".join(keys)
-        lines.append(" " * indent + line)
-    return "\n".join(lines)
+@bot.after_invoke
+async def observe_command(ctx):
+    metrics.COMMAND_LATENCY.labels(ctx.command.qualified_name).observe(time.perf_counter() - ctx.started_at)
 
 
-# ---------- discord bot ----------
-intents = discord.Intents.default()
-intents.message_content = True
-intents.members = True
-bot = commands.Bot(command_prefix="!", intents=intents)
-tree = bot.tree
-
-games = {}
-ranked_games = {}
+@bot.event
+async def setup_hook():
+    storage.start()
+    journal.start()
+    daily_results.start()
+    history.start()
+    sessions.start()
+    for user_id, game in list(ranked_games.items()):
+        if game.guesses >= 6:
+            # the sixth guess reached the journal but the loss did not, settle it now
+            ranked_loss(user_id, game)
+            log.info("replayed ranked game of %s had 6 guesses, counted it as a loss", user_id)
+    await ranked_result_durable()
+    for user_id in ranked_games:
+        sessions.touch(user_id, "ranked")
+    log.info("resumed %d ranked games from the journal", len(ranked_games))
+    bot.solver_tables = asyncio.create_task(prepare_solver())
+    bot.loop_lag = asyncio.create_task(metrics.watch_loop_lag())
+    bot.daily_summaries = asyncio.create_task(post_daily_summaries())
+    if WEB_SERVER == "aiohttp" and SHARD_WORKER == 0:
+        await HttpServer(ranking, storage, page_size=LEADERBOARD_PAGE_SIZE).start(port=WEB_PORT)
+
+
+async def prepare_solver():
+    # hints work without the tables, they are just slower until these load
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(None, solver.load_tables):
+        log.info("building solver tables in the background")
+        workers = max(1, (os.cpu_count() or 2) // 2)
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "solver.py", "build", "--workers", str(workers),
+            stdout=asyncio.subprocess.DEVNULL
+        )
+        if await proc.wait() != 0 or not await loop.run_in_executor(None, solver.load_tables):
+            log.warning("building solver tables failed, hints stay uncached")
+            return
+    log.info("solver tables loaded")
 
 
 @bot.event
 async def on_ready():
-    print(f"Logged in as {bot.user}")
+    log.info("logged in as %s", bot.user)
+    if SHARD_WORKER != 0:
+        return  # one worker is enough to sync commands and compensate old games
     await tree.sync()
 
-    interrupted = load_active_games()
+    interrupted = read_json(ACTIVE_GAMES_FILE)
     if not interrupted:
         return
 
@@ -491,7 +335,7 @@ async def on_ready():
         COMP_ELO = new_ranked_elo_delta(stats["elo"], interrupted[uid_str]["guesses"] + 1, True)
         COMP_ELO = max(0, min(30, COMP_ELO))
         stats["elo"] += COMP_ELO
-        save_leaderboard()
+        save_user_stats(user_id, stats)
 
         channel = bot.get_channel(data["channel_id"])
         if channel:
@@ -505,17 +349,25 @@ async def on_ready():
 
 @bot.hybrid_command(name = "wordle", description = "start a wordle game")
 async def wordle(ctx: commands.Context):
+    await actors.run(ctx.author.id, start_casual, ctx)
+
+
+def ranked_elsewhere(user_id):
+    # a ranked game held by another shard worker
+    return storage.ranked_owner(user_id) not in (None, SHARD_WORKER)
+
 
-    if ctx.author.id in ranked_games:
+async def start_casual(ctx):
+    if ctx.author.id in ranked_games or ranked_elsewhere(ctx.author.id):
         await ctx.send("you already in a ranked game you little dodger", ephemeral=True)
         return
+    if ctx.author.id in daily_games:
+        await ctx.send("finish ur daily first", ephemeral=True)
+        return
 
-    games[ctx.author.id] = {
-        "answer": random.choice(ANSWERS),
-        "guesses": 0,
-        "keyboard": empty_keyboard(),
-        "guessString": ""
-    }
+    games[ctx.author.id] = Game(random.randrange(len(ANSWERS)))
+    boards.drop(ctx.author.id)
+    sessions.touch(ctx.author.id, "casual")
     if ctx.channel.id == 1293326543346466969:
         await ctx.send("**casual wordl started!!**\nuse `/guess <word>`", ephemeral=True)
     else:
@@ -528,26 +380,27 @@ async def isgay(ctx):
 
 @bot.hybrid_command(name = "wordleranked", description = "start a ranked wordle game")
 async def wordleranked(ctx: commands.Context):
-    if ctx.author.id in ranked_games:
+    await actors.run(ctx.author.id, start_ranked, ctx)
+
+
+async def start_ranked(ctx):
+    if ctx.author.id in daily_games:
+        await ctx.send("finish ur daily first", ephemeral=True)
+        return
+    if ctx.author.id in ranked_games or not storage.claim_ranked(ctx.author.id, SHARD_WORKER):
         await ctx.send("you already in a ranked game you little dodger", ephemeral=True)
         return
 
     get_user_stats(ctx.author.id)
 
-    answer = random.choice(ANSWERS)
-
-    ranked_games[ctx.author.id] = {
-        "answer": answer,
-        "guesses": 0,
-        "keyboard": empty_keyboard(),
-        "guessString": "",
-        "channel_id": ctx.channel.id,
-        "finished": False
-    }
+    game = Game(random.randrange(len(ANSWERS)), ranked=True, channel_id=ctx.channel.id)
+    ranked_games[ctx.author.id] = game
+    boards.drop(ctx.author.id)
+    sessions.touch(ctx.author.id, "ranked")
 
-    save_active_games()
+    journal.started(ctx.author.id, game)
 
-    print(f"[RANKED] {ctx.author} -> answer: {answer}")
+    log.debug("[RANKED] %s -> answer: %s", ctx.author, game.answer)
     if ctx.channel.id == 1293326543346466969:
         await ctx.send("**RANKED wordl started!!!!** \nuse `/guess <word>`")
     else:
@@ -563,149 +416,154 @@ async def guess(ctx: commands.Context, word: str):
         await ctx.send(f"`!guess` does not work in {ctx.channel.mention}, use `/guess` instead")
         return
 
+    await actors.run(ctx.author.id, play_guess, ctx, word)
+
+
+@bot.hybrid_command(name = "hint", description = "get a hint for your casual wordle game")
+async def hint(ctx: commands.Context):
     user_id = ctx.author.id
+    if user_id in ranked_games:
+        await ctx.send("no hints in ranked u cheater", ephemeral=True)
+        return
+    game = games.get(user_id)
+    if game is None:
+        await ctx.send("start a game first u mart (with `!wordle`)", ephemeral=True)
+        return
 
-    if user_id not in guess_locks:
-        guess_locks[user_id] = asyncio.Lock()
+    state = tuple(zip(game.guess_ids(), game.patterns()))
+    left, ranked = await asyncio.get_running_loop().run_in_executor(None, solver.suggest, state)
+    word, bits = ranked[0]
+    if left == 1:
+        await ctx.send(f"**hint** 💡 only one word left. its `{word}` bro", ephemeral=True)
+    else:
+        await ctx.send(f"**hint** 💡 {left} words left\ntry `{word}` ({bits:.2f} bits of info)", ephemeral=True)
 
-    async with guess_locks[user_id]:
 
-        try:
-            if user_id in ranked_games:
-                game = ranked_games[user_id]
-                ranked = True
-            elif user_id in games:
-                game = games[user_id]
-                ranked = False
-            else:
-                await ctx.send("start a game first u mart (with `!wordle` or `!wordleranked`)", ephemeral=True)
-                return
+async def play_guess(ctx, word):
+    user_id = ctx.author.id
 
-            answer = game["answer"]
+    mode = "casual"
+    if user_id in ranked_games:
+        game = ranked_games[user_id]
+        ranked = True
+        mode = "ranked"
+    elif user_id in daily_games:
+        game = daily_games[user_id]
+        ranked = False
+        mode = "daily"
+    elif user_id in games:
+        game = games[user_id]
+        ranked = False
+    elif ranked_elsewhere(user_id):
+        await ctx.send("ur ranked game is in another server, guess there", ephemeral=True)
+        return
+    else:
+        await ctx.send("start a game first u mart (with `!wordle` or `!wordleranked`)", ephemeral=True)
+        return
 
-            word = word.lower()
-            if len(word) != 5 or word not in WORDS:
-                await ctx.send("not a valid 5-letter word you bigma", ephemeral=True)
-                return
+    sessions.touch(user_id, mode)
 
-            game["guesses"] += 1
-            if ranked:
-                ranked_games[user_id]["guesses"] = game["guesses"]
-                save_active_games()
-
-            if word == answer:
-                if ranked:
-                    stats = get_user_stats(user_id)
-                    old_elo = stats["elo"]
-
-                    if game.get("finished"):
-                        return
-
-                    game["finished"] = True
-
-                    delta = new_ranked_elo_delta(old_elo, game["guesses"], won=True)
-
-                    stats["elo"] += delta
-                    stats["wins"] += 1
-                    save_leaderboard()
-
-                    old = get_rank_with_division(old_elo)
-                    new_actual = get_rank_with_division(stats["elo"])
-
-                    rankup_msg = ""
-
-                    if old and new_actual:
-                        if did_rank_up(old, new_actual):
-                            rankup_msg = (
-                                f"\n\n🎉 **RANK UP!** 🎉\n"
-                                f"{old[3]} **{old[2]} {old[4]}** -> "
-                                f"{new_actual[3]} **{new_actual[2]} {new_actual[4]}**"
-                            )
-                        elif did_rank_down(old, new_actual):
-                            rankup_msg = (
-                                f"\n\n💀 **RANK DOWN** 💀\n"
-                                f"{old[3]} **{old[2]} {old[4]}** -> "
-                                f"{new_actual[3]} **{new_actual[2]} {new_actual[4]}**"
-                            )
-
-                    # ---- DISPLAY ONLY ----
-                    new = new_actual
-                    if old and new and old[0] != new[0]:
-                        new = (new[0], new[1], new[2], new[3], 1)
-
-                    await ctx.send(
-                        f"**RANKED WIN** 🟩\n"
-                        f"word: `{answer.upper()}`\n"
-                        f"guesses: {game['guesses']}\n"
-                        f"elo: `{delta:+}` -> **{stats['elo']}**"
-                        f"{rankup_msg}"
-                    )
-                    save_active_games()
-                    del ranked_games[user_id]
-                else:
-                    await ctx.send(f"**casual win** 🟩 word was `{answer.upper()}`", ephemeral=True)
-                    del games[user_id]
+    answer = game.answer
+
+    word = word.lower()
+    word_id = WORDS.id(word)
+    if word_id is None:
+        await ctx.send("not a valid 5-letter word you bigma", ephemeral=True)
+        return
+
+    game.guess(word_id, word)
+    if ranked:
+        journal.guessed(user_id, word_id)
+
+    if word == answer:
+        if ranked:
+            if game.finished:
                 return
 
-            greenlist = green(word, answer)
-            yellowlist = yellow(word, answer, greenlist)
+            result = finish_ranked(user_id, game.guesses, won=True)
+            end_ranked(user_id, game, result and result[1])
+            if result is None:
+                await ctx.send(ALREADY_ENDED)
+                return
+            old_elo, stats, delta = result
+            record_game(user_id, game, "ranked", True, old_elo, stats["elo"])
 
-            result = format_result(word, greenlist, yellowlist)
-            if game["guesses"] > 1:
-                game["guessString"] = f"{game['guessString']}\n{result}"
-            else: game["guessString"] = result
+            old = get_rank_with_division(old_elo)
+            new_actual = get_rank_with_division(stats["elo"])
 
-            update_keyboard(game["keyboard"], word, greenlist, yellowlist)
-            keyboard_display = render_keyboard(game["keyboard"])
+            rankup_msg = ""
 
-            await ctx.send(
-                f"**__guess #{game['guesses']}__**\n"
-                f"{game['guessString']}\n\n"
-                f"**__keyboard__**\n{keyboard_display}", ephemeral=True
-            )
+            if old and new_actual:
+                if did_rank_up(old, new_actual):
+                    rankup_msg = (
+                        f"\n\n🎉 **RANK UP!** 🎉\n"
+                        f"{old[3]} **{old[2]} {old[4]}** -> "
+                        f"{new_actual[3]} **{new_actual[2]} {new_actual[4]}**"
+                    )
+                elif did_rank_down(old, new_actual):
+                    rankup_msg = (
+                        f"\n\n💀 **RANK DOWN** 💀\n"
+                        f"{old[3]} **{old[2]} {old[4]}** -> "
+                        f"{new_actual[3]} **{new_actual[2]} {new_actual[4]}**"
+                    )
 
-            if game["guesses"] >= 6:
-                if ranked:
-                    stats = get_user_stats(user_id)
-                    old_elo = stats["elo"]
+            # ---- DISPLAY ONLY ----
+            new = new_actual
+            if old and new and old[0] != new[0]:
+                new = (new[0], new[1], new[2], new[3], 1)
 
-                    if game.get("finished"):
-                        return
+            metrics.GAMES_FINISHED.labels("ranked_win").inc()
+            await asyncio.gather(ranked_result_durable(), boards.finish(user_id))
 
-                    game["finished"] = True
+            await ctx.send(
+                f"**RANKED WIN** 🟩\n"
+                f"word: `{answer.upper()}`\n"
+                f"guesses: {game.guesses}\n"
+                f"elo: `{delta:+}` -> **{stats['elo']}**"
+                f"{rankup_msg}\n\n"
+                f"{format_analysis(analyze(game.answer_id, game.guess_words()))}"
+            )
+        elif mode == "daily":
+            await finish_daily(ctx, user_id, game, solved=True)
+        else:
+            await boards.finish(user_id)
+            record_game(user_id, game, "casual", True)
+            await ctx.send(f"**casual win** 🟩 word was `{answer.upper()}`", ephemeral=True)
+            del games[user_id]
+            sessions.forget(user_id, "casual")
+            metrics.GAMES_FINISHED.labels("casual_win").inc()
+        return
 
-                    delta = new_ranked_elo_delta(stats["elo"], 6, won=False)
+    keyboard_display = game.keyboard_text()
 
-                    stats["elo"] += delta
-                    stats["losses"] += 1
-                    save_leaderboard()
+    board_text = (
+        f"**__guess #{game.guesses}__**\n"
+        f"{game.board()}\n\n"
+        f"**__keyboard__**\n{keyboard_display}"
+    )
+    if BOARD_MODE == "edit":
+        await boards.show(ctx, user_id, board_text)
+    else:
+        await ctx.send(board_text, ephemeral=True)
 
-                    old = get_rank_with_division(old_elo)
-                    new = get_rank_with_division(stats["elo"])
+    if game.guesses >= 6:
+        if ranked:
+            if game.finished:
+                return
 
-                    rankdown_msg = ""
-                    if old and new:
-                        if did_rank_down(old, new):
-                            rankdown_msg = (
-                                f"\n\n💀 **RANK DOWN** 💀\n"
-                                f"{old[3]} **{old[2]} {old[4]}** -> {new[3]} **{new[2]} {new[4]}**"
-                            )
+            message = ranked_loss(user_id, game)
+            await asyncio.gather(ranked_result_durable(), boards.finish(user_id))
+            await ctx.send(f"{message}\n\n{format_analysis(analyze(game.answer_id, game.guess_words()))}")
+        elif mode == "daily":
+            await finish_daily(ctx, user_id, game, solved=False)
+        else:
+            await boards.finish(user_id)
+            record_game(user_id, game, "casual", False)
+            await ctx.send(f"**casual loss** 💀 word was `{answer.upper()}`", ephemeral=True)
+            del games[user_id]
+            sessions.forget(user_id, "casual")
+            metrics.GAMES_FINISHED.labels("casual_loss").inc()
 
-                    await ctx.send(
-                        f"**RANKED LOSS** 💀\n"
-                        f"word was `{answer.upper()}`\n"
-                        f"elo: `{delta}` -> **{stats['elo']}**"
-                        f"{rankdown_msg}"
-                    )
-                    save_active_games()
-                    del ranked_games[user_id]
-                else:
-                    await ctx.send(f"**casual loss** 💀 word was `{answer.upper()}`", ephemeral=True)
-                    del games[user_id]
-        finally:
-            # cleanup only if this lock is no longer needed
-            if not guess_locks[user_id].locked():
-                guess_locks.pop(user_id, None)
 
 @bot.command()
 async def elo(ctx, member: discord.Member = None):
@@ -722,42 +580,60 @@ async def elo(ctx, member: discord.Member = None):
     )
 
 
-@bot.command()
-async def leaderboard(ctx):
-    if not leaderboard_data:
-        await ctx.send("noobdy in leaderboard")
-        return
+LEADERBOARD_PAGE_SIZE = 10
 
-    ranked = sorted(
-        leaderboard_data.items(),
-        key=lambda x: x[1]["elo"],
-        reverse=True
-    )
-
-    total_players = len(ranked)
-    top_10 = ranked[:10]
-
-    user_rank = None
-    for i, (uid, _) in enumerate(ranked, start=1):
-        if int(uid) == ctx.author.id:
-            user_rank = i
-            break
 
+def leaderboard_rows(rows, start):
     leaderboard_string = ""
-    for i, (user_id, stats) in enumerate(top_10, start=1):
-        member = ctx.guild.get_member(int(user_id))
+    for i, (user_id, elo) in enumerate(rows, start=start + 1):
         name = f"<@{user_id}>"
+        emoji, label = rank_label(elo)
 
-        rank_info = get_rank_with_division(stats["elo"])
-        _, _, rank_name, emoji, div = rank_info
+        leaderboard_string += f"**#{i}** {emoji} **{name}**\nElo: `{elo}` • *{label}*\n\n"
+    return leaderboard_string
 
-        ROMAN = ["I", "II", "III", "IV", "V"]
-        div_str = ROMAN[div - 1] if div != 0 else ""
 
-        leaderboard_string += f"**#{i}** {emoji} **{name}**\nElo: `{stats['elo']}` • *{rank_name} {div_str}*\n\n"
+# the plain !leaderboard view, re-rendered only when the top of the ladder changes
+# (or, with other workers writing to the ladder too, whenever the database changed)
+leaderboard_top = TopView(
+    ranking, LEADERBOARD_PAGE_SIZE, lambda rows: leaderboard_rows(rows, 0), shared=SHARD_PROCESSES > 1
+)
+
+
+@bot.command()
+async def leaderboard(ctx, view: str = None, arg: str = None):
+    total_players = len(ranking)
+    if not total_players:
+        await ctx.send("noobdy in leaderboard")
+        return
+
+    user_rank = ranking.position(ctx.author.id)
+    pages = (total_players - 1) // LEADERBOARD_PAGE_SIZE + 1
+    title = "__wordl leaderboard__"
+
+    if view is None:
+        start = 0
+    elif view == "page" and arg and arg.isdigit() and 1 <= int(arg) <= pages:
+        start = (int(arg) - 1) * LEADERBOARD_PAGE_SIZE
+        title += f" (page {arg}/{pages})"
+    elif view == "around" and arg in (None, "me"):
+        if not user_rank:
+            await ctx.send("ur not on the leaderboard yet, play a ranked game first")
+            return
+        start = user_rank - 1 - LEADERBOARD_PAGE_SIZE // 2
+        start = max(0, min(start, total_players - LEADERBOARD_PAGE_SIZE))
+        title += " (around you)"
+    else:
+        await ctx.send(f"usage: `!leaderboard`, `!leaderboard page <1-{pages}>` or `!leaderboard around me`")
+        return
+
+    if start == 0:
+        leaderboard_string = leaderboard_top.get()
+    else:
+        leaderboard_string = leaderboard_rows(ranking.slice(start, LEADERBOARD_PAGE_SIZE), start)
 
     embed = discord.Embed(
-        title="__wordl leaderboard__",
+        title=title,
         description=leaderboard_string if leaderboard_string else "No data available.",
         color=discord.Color.gold()
     )
@@ -771,7 +647,7 @@ async def leaderboard(ctx):
     try:
         embed.set_thumbnail(url = ctx.guild.icon.url)
     except:
-        print("Server does not have a custom PFP.")
+        log.debug("server %s does not have a custom PFP", ctx.guild)
     await ctx.send(embed=embed)
 
 
@@ -877,6 +753,135 @@ async def ranks(ctx):
         + "\n".join(lines)
     )
 
+@bot.command()
+async def solve(ctx, *args):
+    try:
+        state = solver.parse_state(args)
+    except ValueError as e:
+        await ctx.send(f"{e}\nusage: `!solve crane bygbb slate bbggb` (g green, y yellow, b gray)")
+        return
+
+    left, ranked = await asyncio.get_running_loop().run_in_executor(None, solver.suggest, state)
+    if not left:
+        await ctx.send("no word fits that lol, check ur patterns")
+        return
+
+    shown = solver.remaining(state)
+    lines = [f"`{word}` {bits:.2f} bits" for word, bits in ranked]
+    await ctx.send(
+        f"**__wordl solver__**\n"
+        f"{left} words left: {', '.join(f'`{w}`' for w in shown)}{' ...' if left > len(shown) else ''}\n\n"
+        f"**best guesses**\n" + "\n".join(lines)
+    )
+
+@bot.group(name="daily", invoke_without_command=True)
+async def daily_command(ctx):
+    await actors.run(ctx.author.id, start_daily, ctx)
+
+
+async def start_daily(ctx):
+    user_id = ctx.author.id
+    if ctx.guild is None:
+        await ctx.send("daily only works in servers")
+        return
+    if user_id in ranked_games or ranked_elsewhere(user_id):
+        await ctx.send("finish ur ranked game first", ephemeral=True)
+        return
+    if user_id in daily_games:
+        await ctx.send("u already have a daily going, use `!guess <word>`", ephemeral=True)
+        return
+
+    day = daily.utc_day()
+    answer_id = daily_results.start_game(user_id, ctx.guild.id, day)
+    if answer_id is None:
+        await ctx.send(f"u already did todays daily, next one <t:{round(time.time() + daily.seconds_until_next_day())}:R>")
+        return
+
+    if games.pop(user_id, None):
+        sessions.forget(user_id, "casual")  # the daily replaces a casual game
+    daily_games[user_id] = Game(answer_id, channel_id=ctx.channel.id)
+    boards.drop(user_id)
+    sessions.touch(user_id, "daily")
+    await ctx.send(
+        f"**daily wordl #{daily.number(day)} started!!** same word for everyone today\n"
+        f"use `/guess <word>` or `!guess <word>`"
+    )
+
+
+async def finish_daily(ctx, user_id, game, solved):
+    await boards.finish(user_id)
+    del daily_games[user_id]
+    sessions.forget(user_id, "daily")
+    _, current, best = daily_results.finish_game(user_id, game.guesses, solved, channel_id=ctx.channel.id)
+    record_game(user_id, game, "daily", solved)
+    metrics.GAMES_FINISHED.labels("daily_win" if solved else "daily_loss").inc()
+    if solved:
+        await ctx.send(f"**daily win** 🟩 solved in {game.guesses}/6\nstreak: 🔥 **{current}** (best {best})")
+    else:
+        await ctx.send(f"**daily loss** 💀 streak reset. word was ||`{game.answer.upper()}`||")
+
+
+@daily_command.command(name="stats")
+async def daily_stats(ctx):
+    if ctx.guild is None:
+        await ctx.send("daily only works in servers")
+        return
+
+    day = daily.utc_day()
+    summary = daily_results.summary(ctx.guild.id, day.isoformat())
+    if summary is None:
+        await ctx.send("nobody here played the daily yet, start with `!daily`")
+        return
+
+    current, best = daily_results.streak(ctx.guild.id, ctx.author.id, day.isoformat())
+    await ctx.send(
+        f"**__daily wordl #{daily.number(day)}__**\n"
+        f"{daily.format_summary(summary)}\n\n"
+        f"ur streak: 🔥 **{current}** (best {best})"
+    )
+
+
+async def post_daily_summaries():
+    # rolls the guild aggregates over at each utc midnight and posts the day that ended
+    while True:
+        for guild_id, channel_id, summary in daily_results.close_day(daily.utc_day()):
+            channel = bot.get_channel(channel_id)
+            if channel is None:
+                continue
+            try:
+                await channel.send(f"**__daily wordl results ({summary['day']})__**\n{daily.format_summary(summary)}")
+            except discord.HTTPException as e:
+                log.warning("posting the daily summary for guild %s failed: %s", guild_id, e)
+        await asyncio.sleep(daily.seconds_until_next_day() + 1)
+
+
+@bot.command(name="history")
+async def history_command(ctx, member: discord.Member = None):
+    member = member or ctx.author
+    records = history.games(member.id)
+    if not len(records):
+        await ctx.send(f"**{member.display_name}** has no finished games yet")
+        return
+    await ctx.send(
+        f"**__{member.display_name}'s last games__** ({len(records)} total)\n"
+        f"{format_history(records)}"
+    )
+
+
+@bot.command(name="sessions")
+async def sessions_info(ctx):
+    info = sessions.stats()
+    lines = [
+        f"**{mode}**: {info['live'][mode]} live, {info['expired'][mode]} expired"
+        for mode in info["live"]
+    ]
+    await ctx.send(
+        "**__wordl sessions__**\n"
+        + "\n".join(lines)
+        + f"\nstale timers evicted: {info['evicted']} (heap {info['heap']})"
+        + f"\nboard messages: {boards.sent} sent, {boards.edits} edits, {boards.coalesced} coalesced"
+    )
+
 @tree.command(name = "application", description = "creates server application")
 async def application(interaction: discord.Interaction, username: str, name: str):
     if interaction.user.id == 881239314246287360 and interaction.guild.id == 1264709544349536277:
@@ -894,5 +899,12 @@ async def application(interaction: discord.Interaction, username: str, name: str
         await interaction.response.send_message("using this command is a crime (its fine nobodys gonna know)", ephemeral = True)
 
 # ---------- run ----------
-webserver.keep_alive()
-bot.run(TOKEN)
\ No newline at end of file
+if __name__ == "__main__":
+    if WEB_SERVER == "flask" and SHARD_WORKER == 0:
+        webserver.keep_alive()
+    bot.run(TOKEN, log_handler=None)
+    storage.close()
+    journal.close()
+    daily_results.close()
+    history.close()
+    log_listener.stop()
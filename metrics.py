@@ -0,0 +1,173 @@
+"""
+prometheus metrics for the web server's /metrics and /health.
+
+metrics are only ever written from the bot's event loop and only read by the
+web server thread, so they are plain ints and floats with no locks: a scrape
+can at worst land between two fields of one observation.
+"""
+import asyncio
+import math
+import time
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REGISTRY = []
+
+
+def _format(value):
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(label, value, extra=""):
+    parts = [f'{label}="{value}"'] if label else []
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Family:
+    kind = None
+
+    def __init__(self, name, help, label=None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.children = {}  # label value (None without a label) -> child
+        REGISTRY.append(self)
+
+    def labels(self, value):
+        child = self.children.get(value)
+        if child is None:
+            child = self.children[value] = self._child()
+        return child
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for value, child in list(self.children.items()):
+            lines.extend(child.expose(self.name, self.label, value))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+    def expose(self, name, label, value):
+        return [f"{name}{_labels(label, value)} {_format(self.value)}"]
+
+
+class Counter(_Family):
+    kind = "counter"
+    _child = _CounterChild
+
+    def inc(self, n=1):
+        self.labels(None).inc(n)
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def expose(self, name, label, value):
+        lines, total = [], 0
+        for bound, n in zip(self.buckets + (math.inf,), list(self.counts)):
+            total += n
+            le = 'le="' + _format(bound) + '"'
+            lines.append(f"{name}_bucket{_labels(label, value, le)} {total}")
+        lines.append(f"{name}_sum{_labels(label, value)} {_format(self.sum)}")
+        lines.append(f"{name}_count{_labels(label, value)} {self.count}")
+        return lines
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name, help, label=None, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help, label)
+
+    def _child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels(None).observe(value)
+
+
+class Gauge(_Family):
+    """read at scrape time from fn(), which returns a number or {label value: number}."""
+    kind = "gauge"
+
+    def __init__(self, name, help, fn, label=None):
+        super().__init__(name, help, label)
+        self.fn = fn
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            values = self.fn()
+        except Exception:
+            return lines
+        if not isinstance(values, dict):
+            values = {None: values}
+        for value, number in values.items():
+            lines.append(f"{self.name}{_labels(self.label, value)} {_format(number)}")
+        return lines
+
+
+def expose():
+    """every registered metric in the prometheus text format."""
+    lines = []
+    for family in list(REGISTRY):
+        lines.extend(family.expose())
+    return "\n".join(lines) + "\n"
+
+
+# ---------- the bot's metrics ----------
+COMMAND_LATENCY = Histogram("wordle_command_seconds", "time to handle a command", "command")
+QUEUE_WAIT = Histogram("wordle_queue_wait_seconds", "time a command waited for its user's earlier commands", "command")
+PERSIST_TIME = Histogram("wordle_persist_seconds", "time spent writing state to disk", "target")
+GAMES_FINISHED = Counter("wordle_games_finished_total", "games that ended, by how", "result")
+LOOP_LAG = Histogram("wordle_loop_lag_seconds", "how late the event loop ran a timer")
+
+_heartbeat = {"at": 0.0, "lag": math.nan}
+
+
+async def watch_loop_lag(interval=0.5):
+    """samples event loop lag forever; /health is unhealthy once this stops ticking."""
+    while True:
+        t = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - t - interval)
+        LOOP_LAG.observe(lag)
+        _heartbeat["at"], _heartbeat["lag"] = time.monotonic(), lag
+
+
+def health(stale_after=10.0):
+    """(healthy, details) for /health."""
+    age = time.monotonic() - _heartbeat["at"]
+    healthy = bool(_heartbeat["at"]) and age < stale_after
+    return healthy, {
+        "status": "ok" if healthy else ("starting" if not _heartbeat["at"] else "stalled"),
+        "loop_lag_seconds": None if math.isnan(_heartbeat["lag"]) else round(_heartbeat["lag"], 6),
+        "seconds_since_tick": round(age, 3) if _heartbeat["at"] else None,
+    }
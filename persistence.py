@@ -0,0 +1,255 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger("wordle.persistence")
+
+
+def atomic_write(path, data):
+    # temp file + fsync + rename, so a crash leaves either the old or the new file.
+    # the temp name is per process, so two processes writing one file never share it
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def dump_json(data):
+    return json.dumps(data, indent=2)
+
+
+class BackgroundWriter:
+    """
+    what every off-loop writer here shares: one worker thread, so writes run
+    in order and never on the event loop, and one background task that wakes
+    on `_wake`, waits `interval` more seconds so a burst shares one write,
+    and calls flush().
+    """
+
+    def __init__(self, interval, name):
+        self.interval = interval
+        self.writes = 0
+        self.on_write = None  # called on the loop with the seconds each write took
+        self._wake = asyncio.Event()
+        self._task = None
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self):
+        raise NotImplementedError
+
+    async def _on_worker(self, fn, *args):
+        # fn(*args) on the worker thread; it returns False if it wrote nothing
+        took = await asyncio.get_running_loop().run_in_executor(self._worker, self._timed, fn, args)
+        if took is not None and self.on_write:
+            self.on_write(took)
+
+    def _timed(self, fn, args):
+        t = time.perf_counter()
+        if fn(*args) is False:
+            return None
+        self.writes += 1
+        return time.perf_counter() - t
+
+    async def _caught_up(self):
+        # returns once everything already handed to the worker is written
+        await asyncio.get_running_loop().run_in_executor(self._worker, lambda: None)
+
+
+class BatchedAppender(BackgroundWriter):
+    """
+    append-only writes in batches: append() queues an item on the loop and
+    the background task hands everything pending to _write(items) on the
+    worker thread. `await durable()` returns once everything appended
+    before the call has been written.
+    """
+
+    def __init__(self, interval, name):
+        super().__init__(interval, name)
+        self._pending = []
+
+    def append(self, item):
+        self._pending.append(item)
+        self._wake.set()
+
+    async def flush(self):
+        self._wake.clear()
+        if not self._pending:
+            return
+        items, self._pending = self._pending, []
+        await self._on_worker(self._write, items)
+
+    async def durable(self):
+        if self._pending:
+            await self.flush()
+        else:
+            await self._caught_up()
+
+    def close(self):
+        # shutdown path, once the loop has stopped
+        self._worker.shutdown(wait=True)
+        if self._pending:
+            items, self._pending = self._pending, []
+            self._timed(self._write, (items,))
+
+    def _write(self, items):
+        raise NotImplementedError
+
+
+class WriteBehind(BackgroundWriter):
+    """
+    coalesces saves of one json file: callers mark it dirty, and a background
+    task writes at most once per interval, off the event loop.
+
+    every mark_dirty() bumps a version. snapshot() runs on the loop and should
+    only copy what changed; serialize() and the write run on this file's own
+    single worker thread, in order, and a version older than the one already
+    on disk is never written. `await durable()` returns once everything marked
+    dirty before the call is on disk.
+    """
+
+    def __init__(self, path, snapshot, interval=5.0, serialize=dump_json):
+        super().__init__(interval, f"persist-{os.path.basename(path)}")
+        self.path = path
+        self.snapshot = snapshot
+        self.serialize = serialize
+        self._version = 0  # bumped by mark_dirty
+        self._taken = 0  # version of the last snapshot handed to the worker
+        self._written = 0  # version on disk
+        self._lock = threading.Lock()
+
+    def mark_dirty(self):
+        self._version += 1
+        self._wake.set()
+
+    @property
+    def dirty(self):
+        return self._taken < self._version
+
+    async def flush(self):
+        self._wake.clear()
+        if not self.dirty:
+            return
+        version, data = self._version, self.snapshot()
+        self._taken = version
+        try:
+            await self._on_worker(self._write, version, data)
+        except OSError as e:
+            log.warning("writing %s failed: %s", self.path, e)
+            self.mark_dirty()
+
+    async def durable(self):
+        target = self._version
+        if self._written >= target:
+            return
+        if self._taken < target:
+            await self.flush()
+        else:
+            # already handed to the worker; anything queued behind it is newer
+            await self._caught_up()
+
+    def flush_sync(self):
+        # shutdown path, once the loop has stopped
+        self._worker.shutdown(wait=True)
+        if self.dirty:
+            version, data = self._version, self.snapshot()
+            self._taken = version
+            self._timed(self._write, (version, data))
+
+    def _write(self, version, data):
+        text = self.serialize(data)
+        with self._lock:
+            if version <= self._written:
+                return False
+            atomic_write(self.path, text)
+            self._written = version
+
+
+if __name__ == "__main__":
+    # event-loop lag while a burst of ranked games finishes: the old blocking
+    # save_leaderboard() vs this write-behind, on a 50k player leaderboard
+    import random
+    import tempfile
+
+    PLAYERS = 50_000
+    GAMES = 200
+
+    async def probe(samples, stop):
+        while not stop.is_set():
+            t = time.perf_counter()
+            await asyncio.sleep(0.001)
+            samples.append((time.perf_counter() - t - 0.001) * 1000)
+
+    async def burst(save, data):
+        samples, stop = [], asyncio.Event()
+        task = asyncio.create_task(probe(samples, stop))
+        t = time.perf_counter()
+        for _ in range(GAMES):
+            uid = random.choice(list(data))
+            data[uid]["elo"] += random.randint(-75, 250)
+            save(uid)
+            await asyncio.sleep(0)
+        took = time.perf_counter() - t
+        stop.set()
+        await task
+        samples.sort()
+        return took, samples[len(samples) // 2], samples[int(len(samples) * 0.99)], samples[-1]
+
+    def make_data():
+        return {str(i): {"elo": random.randint(0, 11000), "wins": 10, "losses": 3} for i in range(PLAYERS)}
+
+    async def main():
+        path = os.path.join(tempfile.mkdtemp(), "leaderboard.json")
+
+        data = make_data()
+
+        def blocking_save(_uid):
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+
+        before = await burst(blocking_save, data)
+
+        data = make_data()
+        shadow = {uid: dict(s) for uid, s in data.items()}
+        changed = set()
+
+        def take():
+            delta = {uid: dict(data[uid]) for uid in changed}
+            changed.clear()
+            return delta
+
+        def serialize(delta):
+            shadow.update(delta)
+            return dump_json(shadow)
+
+        writer = WriteBehind(path, take, interval=0.5, serialize=serialize)
+        writer.start()
+
+        def deferred_save(uid):
+            changed.add(uid)
+            writer.mark_dirty()
+
+        after = await burst(deferred_save, data)
+        await writer.durable()
+
+        print(f"{GAMES} finished games, {PLAYERS} players    total s   lag p50 ms   p99 ms   max ms")
+        for name, (took, p50, p99, worst) in (("blocking json.dump", before), ("write-behind", after)):
+            print(f"{name:>36} {took:9.2f} {p50:12.2f} {p99:8.2f} {worst:8.2f}")
+        print(f"write-behind wrote the file {writer.writes} time(s)")
+
+    asyncio.run(main())
@@ -0,0 +1,311 @@
+from bisect import bisect_left, bisect_right, insort
+
+
+class RankingIndex:
+    """
+    players ordered by elo (high first, ties by who joined first), kept sorted
+    as they change. sublists of about `load` keys, with a fenwick tree over the
+    sublist lengths, so position / top-n / paging never sort the whole ladder.
+    """
+
+    def __init__(self, load=512):
+        self.load = load
+        self._lists = []  # sorted sublists of (-elo, seq, user_id)
+        self._maxes = []  # last key of each sublist
+        self._tree = []  # fenwick over len(sublist)
+        self._keys = {}  # user_id -> key
+        self._seq = 0
+        self.version = 0  # bumped on every change, for caches built on top
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, user_id):
+        return str(user_id) in self._keys
+
+    # ---------- fenwick over sublist lengths ----------
+    def _rebuild(self):
+        tree = [len(l) for l in self._lists]
+        for i in range(len(tree)):
+            j = i | (i + 1)
+            if j < len(tree):
+                tree[j] += tree[i]
+        self._tree = tree
+
+    def _add(self, i, delta):
+        tree = self._tree
+        while i < len(tree):
+            tree[i] += delta
+            i |= i + 1
+
+    def _prefix(self, i):
+        # keys in sublists [0, i)
+        total = 0
+        tree = self._tree
+        while i > 0:
+            total += tree[i - 1]
+            i &= i - 1
+        return total
+
+    def _locate(self, index):
+        # (sublist, offset) holding the key at a 0-based position
+        pos = 0
+        tree = self._tree
+        step = 1 << len(tree).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= len(tree) and tree[nxt - 1] <= index:
+                pos = nxt
+                index -= tree[nxt - 1]
+            step >>= 1
+        return pos, index
+
+    # ---------- updates ----------
+    def update(self, user_id, elo):
+        user_id = str(user_id)
+        old = self._keys.get(user_id)
+        if old is not None:
+            if old[0] == -elo:
+                return
+            self._discard(old)
+            seq = old[1]
+        else:
+            seq = self._seq
+            self._seq += 1
+
+        key = (-elo, seq, user_id)
+        self._keys[user_id] = key
+        self._insert(key)
+        self.version += 1
+
+    def remove(self, user_id):
+        key = self._keys.pop(str(user_id), None)
+        if key is not None:
+            self._discard(key)
+            self.version += 1
+
+    def _insert(self, key):
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._rebuild()
+            return
+
+        i = bisect_left(self._maxes, key)
+        if i == len(self._maxes):
+            i -= 1
+            self._lists[i].append(key)
+            self._maxes[i] = key
+        else:
+            insort(self._lists[i], key)
+
+        if len(self._lists[i]) > 2 * self.load:
+            half = self._lists[i][self.load:]
+            del self._lists[i][self.load:]
+            self._maxes[i] = self._lists[i][-1]
+            self._lists.insert(i + 1, half)
+            self._maxes.insert(i + 1, half[-1])
+            self._rebuild()
+        else:
+            self._add(i, 1)
+
+    def _discard(self, key):
+        i = bisect_left(self._maxes, key)
+        sub = self._lists[i]
+        del sub[bisect_left(sub, key)]
+        if not sub:
+            del self._lists[i]
+            del self._maxes[i]
+            self._rebuild()
+            return
+        self._maxes[i] = sub[-1]
+        self._add(i, -1)
+
+    # ---------- queries ----------
+    def position(self, user_id):
+        """1-based position, or None if the player is not ranked."""
+        key = self._keys.get(str(user_id))
+        if key is None:
+            return None
+        i = bisect_left(self._maxes, key)
+        return self._prefix(i) + bisect_right(self._lists[i], key)
+
+    def slice(self, start, count):
+        """[(user_id, elo)] for positions start+1 .. start+count."""
+        out = []
+        if start >= len(self._keys) or count <= 0:
+            return out
+        i, j = self._locate(max(0, start))
+        while i < len(self._lists) and len(out) < count:
+            for neg_elo, _, user_id in self._lists[i][j:j + count - len(out)]:
+                out.append((user_id, -neg_elo))
+            i, j = i + 1, 0
+        return out
+
+    def top(self, n):
+        return self.slice(0, n)
+
+    def elo(self, user_id):
+        key = self._keys.get(str(user_id))
+        return None if key is None else -key[0]
+
+
+class SharedLadder:
+    """
+    the RankingIndex interface answered by a storage backend that several
+    processes share (SqliteStorage), so no process keeps its own copy of the
+    ladder. `version` moves whenever any of them commits a change.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def __len__(self):
+        return self.storage.count()
+
+    def __contains__(self, user_id):
+        return self.storage.find_player(user_id) is not None
+
+    @property
+    def version(self):
+        return self.storage.data_version()
+
+    def update(self, user_id, elo):
+        pass  # the storage write already moved them
+
+    def position(self, user_id):
+        return self.storage.position(user_id)
+
+    def slice(self, start, count):
+        return self.storage.page(max(0, start), count)
+
+    def top(self, n):
+        return self.slice(0, n)
+
+    def elo(self, user_id):
+        stats = self.storage.find_player(user_id)
+        return None if stats is None else stats["elo"]
+
+
+class TopView:
+    """
+    a rendered view of the top n (render gets [(user_id, elo)]), kept until an
+    elo change reaches the top n. route elo updates through update() so it can
+    tell.
+
+    with shared=True the ladder also changes in other processes, so the view
+    is instead re-rendered whenever the ladder's version has moved.
+    """
+
+    def __init__(self, ranking, n, render, shared=False):
+        self.ranking = ranking
+        self.n = n
+        self.render = render
+        self.shared = shared
+        self.renders = 0
+        self.invalidations = 0
+        self._view = None
+        self._version = None
+
+    def update(self, user_id, elo):
+        if self.shared:
+            return
+        if self.ranking.elo(user_id) == elo:
+            return
+        before = self.ranking.position(user_id)
+        self.ranking.update(user_id, elo)
+        if self._view is None:
+            return
+        if (before is not None and before <= self.n) or self.ranking.position(user_id) <= self.n:
+            self._view = None
+            self.invalidations += 1
+
+    def invalidate(self):
+        self._view = None
+
+    def get(self):
+        if self.shared:
+            version = self.ranking.version
+            if version != self._version:
+                if self._view is not None:
+                    self.invalidations += 1
+                self._view, self._version = None, version
+        if self._view is None:
+            self._view = self.render(self.ranking.top(self.n))
+            self.renders += 1
+        return self._view
+
+
+if __name__ == "__main__":
+    # benchmark: index ops vs the old sort-and-scan, as the ladder grows
+    import random
+    import time
+
+    def per_op(fn, reps):
+        t = time.perf_counter()
+        for _ in range(reps):
+            fn()
+        return (time.perf_counter() - t) / reps * 1e6
+
+    rng = random.Random(0)
+    print(f"{'players':>9} {'update':>9} {'position':>9} {'top10':>9} {'page':>9} {'sort+scan':>11}  (us/op)")
+    for n in (1_000, 10_000, 100_000, 1_000_000):
+        data = {str(i): {"elo": rng.randint(0, 11000)} for i in range(n)}
+        index = RankingIndex()
+        for uid, stats in data.items():
+            index.update(uid, stats["elo"])
+        ids = list(data)
+
+        def update():
+            uid = rng.choice(ids)
+            index.update(uid, data[uid]["elo"] + rng.randint(-75, 250))
+
+        def position():
+            index.position(rng.choice(ids))
+
+        def sort_scan():
+            target = rng.choice(ids)
+            ranked = sorted(data.items(), key=lambda x: x[1]["elo"], reverse=True)
+            for i, (uid, _) in enumerate(ranked, start=1):
+                if uid == target:
+                    break
+
+        print(
+            f"{n:>9} {per_op(update, 20000):>9.2f} {per_op(position, 20000):>9.2f} "
+            f"{per_op(lambda: index.top(10), 20000):>9.2f} "
+            f"{per_op(lambda: index.slice(rng.randrange(n), 10), 20000):>9.2f} "
+            f"{per_op(sort_scan, max(1, 200_000 // n)):>11.1f}"
+        )
+
+    # the cached top view only changes when the top 10 does
+    view = TopView(index, 10, lambda rows: list(rows))
+    for _ in range(20_000):
+        uid = rng.choice(ids)
+        view.update(uid, index.elo(uid) + rng.randint(-75, 250))
+        assert view.get() == index.top(10)
+    print(f"top view: 20000 updates, {view.renders} renders")
+
+    # a shared view sees writes from another connection (another worker) and its own
+    import os
+    import tempfile
+
+    from storage import SqliteStorage
+
+    path = os.path.join(tempfile.mkdtemp(), "wordle.db")
+    mine, other = SqliteStorage(path), SqliteStorage(path)
+    for i in range(20):
+        mine.save_player(i, {"elo": 1000 + i, "wins": 0, "losses": 0})
+    shared = TopView(SharedLadder(mine), 3, lambda rows: list(rows), shared=True)
+    assert shared.get() == mine.page(0, 3) and shared.renders == 1
+    assert shared.get() == mine.page(0, 3) and shared.renders == 1, "re-rendered without a change"
+    other.save_player(100, {"elo": 5000, "wins": 1, "losses": 0})
+    assert shared.get()[0] == ("100", 5000), "missed another connection's write"
+    mine.save_player(101, {"elo": 6000, "wins": 1, "losses": 0})
+    shared.update(101, 6000)
+    assert shared.get()[:2] == [("101", 6000), ("100", 5000)], "missed its own write"
+    print(f"shared top view: {shared.renders} renders for 2 writes")
+
+    # sanity: matches a full sort
+    expected = sorted(index._keys.values())
+    assert [uid for uid, _ in index.slice(0, len(index))] == [k[2] for k in expected]
+    assert all(index.position(k[2]) == i for i, k in enumerate(expected[:5000], start=1))
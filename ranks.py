@@ -0,0 +1,189 @@
+from bisect import bisect_right
+
+import numpy as np
+
+RANKS = [
+    (0, "Bigma", "<:caseoh:1347767315084873859>"),
+    (500, "Bronze", "🥉"),
+    (1200, "Silver", "🥈"),
+    (1500, "Gold", "🥇"),
+    (1800, "Platinum", "🔷"),
+    (2100, "Diamond", "💎"),
+    (2400, "Mythic", "🐉"),
+    (2700, "Master", "🔥"),
+    (3000, "Grandmaster", "👑"),
+    (3300, "Legend", "⚡"),
+    (3600, "Godlike", "⚜️"),
+    (4000, "Immortal", "🌌"),
+    (4500, "Celestial", "🔱"),
+    (5100, "Ascendant", "🌠"),
+    (5800, "Transcendent", "🔮"),
+    (6500, "Absolute", "⚫"),
+    (7200, "Overlord", "🧙‍♂️"),
+    (7900, "Empyrean", "☀️"),
+    (8600, "Cosmic", "🪐"),
+    (9300, "Astral", "✨"),
+    (10000, "Singularity", "🌀"),
+    (676767, "ohio sigma rizzler", "🗿"),
+    (696969, "elaine", "🥰"),
+]
+
+DIVISIONS = 5
+
+# ---------- precomputed tables ----------
+STARTS = [r[0] for r in RANKS]
+ENDS = STARTS[1:] + [0]  # the top rank has no end, so it has no divisions
+DIV_SIZES = [(end - start) / DIVISIONS for start, end in zip(STARTS, ENDS)]
+START_INDEX = {start: i for i, start in enumerate(STARTS)}
+
+_STARTS = np.array(STARTS, dtype=np.float64)
+_ENDS = np.array(ENDS, dtype=np.float64)
+_DIV_SIZES = np.array(DIV_SIZES, dtype=np.float64)
+
+
+def _index(elo):
+    # index of the highest rank whose start is <= elo, -1 below the first rank
+    return bisect_right(STARTS, elo) - 1
+
+
+def get_rank(elo):
+    return RANKS[max(0, _index(elo))]  # (threshold, name, emoji)
+
+
+def get_next_rank(elo):
+    i = _index(elo) + 1
+    return RANKS[i] if i < len(RANKS) else None
+
+
+get_major_rank = get_rank
+get_next_major_rank = get_next_rank
+
+
+def major_rank_start(elo):
+    return get_rank(elo)[0]
+
+
+def get_rank_with_division(elo):
+    i = _index(elo)
+    if i < 0:
+        return None
+
+    start, name, emoji = RANKS[i]
+    end = ENDS[i]
+    if end > elo:
+        div = int((elo - start) / DIV_SIZES[i]) + 1
+        div = max(1, min(DIVISIONS, div))
+    else:
+        div = 0
+
+    return (start, end, name, emoji, div)
+
+
+def rank_indices(elos):
+    """
+    batch lookup: (rank index, division) arrays for an array of elos.
+    index is -1 (division 0) where get_rank_with_division would return None.
+    """
+    elos = np.asarray(elos, dtype=np.float64)
+    idx = np.searchsorted(_STARTS, elos, side="right") - 1
+    safe = np.maximum(idx, 0)
+
+    start = _STARTS[safe]
+    end = _ENDS[safe]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        div = np.floor((elos - start) / _DIV_SIZES[safe]) + 1
+    div = np.where(end > elos, np.clip(div, 1, DIVISIONS), 0).astype(np.int64)
+    div[idx < 0] = 0
+    return idx, div
+
+
+def get_ranks_with_division(elos):
+    """get_rank_with_division for every elo in elos, in one pass."""
+    idx, div = rank_indices(elos)
+    out = []
+    for i, d in zip(idx.tolist(), div.tolist()):
+        if i < 0:
+            out.append(None)
+        else:
+            start, name, emoji = RANKS[i]
+            out.append((start, ENDS[i], name, emoji, d))
+    return out
+
+
+def rank_key(rank_tuple):
+    """
+    rank_tuple from get_rank_with_division: (start, end, name, emoji, div)
+    higher is better.
+    """
+    start, end, name, emoji, div = rank_tuple
+    return (START_INDEX[start], div)
+
+
+def did_rank_up(old_rank, new_rank):
+    if not old_rank or not new_rank:
+        return False
+    return rank_key(new_rank) > rank_key(old_rank)
+
+
+def did_rank_down(old_rank, new_rank):
+    if not old_rank or not new_rank:
+        return False
+    return rank_key(new_rank) < rank_key(old_rank)
+
+
+if __name__ == "__main__":
+    # equivalence with the original linear scans, at and around every boundary
+    def linear_rank(elo):
+        current = RANKS[0]
+        for r in RANKS:
+            if elo >= r[0]:
+                current = r
+            else:
+                break
+        return current
+
+    def linear_next_rank(elo):
+        for r in RANKS:
+            if elo < r[0]:
+                return r
+        return None
+
+    def linear_rank_with_division(elo):
+        for i in range(len(RANKS) - 1, -1, -1):
+            start, name, emoji = RANKS[i]
+            end = RANKS[i + 1][0] if i + 1 < len(RANKS) else 0
+
+            if elo >= start:
+                span = end - start
+                div_size = span / DIVISIONS
+                if end > elo:
+                    div = int((elo - start) / div_size) + 1
+                    div = max(1, min(DIVISIONS, div))
+                else:
+                    div = 0
+                return (start, end, name, emoji, div)
+        return None
+
+    def linear_rank_key(rank_tuple):
+        start, end, name, emoji, div = rank_tuple
+        return (next(i for i, r in enumerate(RANKS) if r[0] == start), div)
+
+    points = set(range(-50, 12000))
+    for i, start in enumerate(STARTS):
+        for k in range(DIVISIONS + 1):
+            edge = start + k * DIV_SIZES[i]
+            for e in (edge - 1, edge - 0.5, edge, edge + 0.5, edge + 1):
+                points.update((e, int(e), round(e)))
+    points = sorted(points)
+
+    batch = get_ranks_with_division(points)
+    for elo, batched in zip(points, batch):
+        expected = linear_rank_with_division(elo)
+        assert get_rank(elo) == get_major_rank(elo) == linear_rank(elo), elo
+        assert get_next_rank(elo) == get_next_major_rank(elo) == linear_next_rank(elo), elo
+        assert get_rank_with_division(elo) == expected, elo
+        assert batched == expected, (elo, batched, expected)
+        if expected:
+            assert rank_key(expected) == linear_rank_key(expected), elo
+
+    print(f"ok: {len(points)} elos match the linear scans")
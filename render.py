@@ -0,0 +1,216 @@
+from functools import lru_cache
+
+from feedback import GRAY, GREEN, YELLOW
+from ranks import RANKS, get_rank_with_division, rank_key
+
+yellowEmojis = {"a": "<:yellow_a:1471405850584420372>", "b": "<:yellow_b:1471405852027125832>", "c": "<:yellow_c:1471405852945551361>", "d": "<:yellow_d:1471405854103179348>", "e": "<:yellow_e:1471405854652633110>", "f": "<:yellow_f:1471405855885758629>", "g": "<:yellow_g:1471405856842322021>", "h": "<:yellow_h:1471405858952052848>", "i": "<:yellow_i:1471405859962884211>", "j": "<:yellow_j:1471405861342810258>", "k": "<:yellow_k:1471405862546571305>", "l": "<:yellow_l:1471405869332959436>", "m": "<:yellow_m:1471405870767407105>", "n": "<:yellow_n:1471405871799079103>", "o": "<:yellow_o:1471405873065623632>", "p": "<:yellow_p:1471405880812769426>", "q": "<:yellow_q:1471405882641219678>", "r": "<:yellow_r:1471405883601850439>", "s": "<:yellow_s:1471405885548007578>", "t": "<:yellow_t:1471405886655299721>", "u": "<:yellow_u:1471405887963795497>", "v": "<:yellow_v:1471405889712816290>", "w": "<:yellow_w:1471405890744881246>", "x": "<:yellow_x:1471405894674944145>", "y": "<:yellow_y:1471405896138752145>", "z": "<:yellow_z:1471405898231709696>"}
+greenEmojis = {"a": "<:green_a:1471405772356456643>", "b": "<:green_b:1471405773488914554>", "c": "<:green_c:1471405774554271849>", "d": "<:green_d:1471405776106033176>", "e": "<:green_e:1471405777481895937>", "f": "<:green_f:1471405778953830606>", "g": "<:green_g:1471405781071953992>", "h": "<:green_h:1471405782141632686>", "i": "<:green_i:1471405783437541557>", "j": "<:green_j:1471405784670670972>", "k": "<:green_k:1471405786386268202>", "l": "<:green_l:1471405787724382218>", "m": "<:green_m:1471405789100118048>", "n": "<:green_n:1471405790542823538>", "o": "<:green_o:1471405791826415666>", "p": "<:green_p:1471405792971325563>", "q": "<:green_q:1471405794598584517>", "r": "<:green_r:1471405795621998634>", "s": "<:green_s:1471405796880547860>", "t": "<:green_t:1471405798272925739>", "u": "<:green_u:1471405800206635150>", "v": "<:green_v:1471405801401876520>", "w": "<:green_w:1471405803150774282>", "x": "<:green_x:1471405804015059092>", "y": "<:green_y:1471405805554241557>", "z": "<:green_z:1471405806829436949>"}
+grayEmojis = {"a": "<:gray_a:1471405723865972780>", "b": "<:gray_b:1471405725912793260>", "c": "<:gray_c:1471405726781149205>", "d": "<:gray_d:1471405728018464800>", "e": "<:gray_e:1471405728974770216>", "f": "<:gray_f:1471405730115354654>", "g": "<:gray_g:1471405731805925387>", "h": "<:gray_h:1471405720393220207>", "i": "<:gray_i:1471405733240377499>", "j": "<:gray_j:1471405734343348359>", "k": "<:gray_k:1471405735903494398>", "l": "<:gray_l:1471405737036222517>", "m": "<:gray_m:1471405738181267518>", "n": "<:gray_n:1471405721462509660>", "o": "<:gray_o:1471405739380707408>", "p": "<:gray_p:1471405740919885835>", "q": "<:gray_q:1471405742467584010>", "r": "<:gray_r:1471405743763881994>", "s": "<:gray_s:1471405722720796786>", "t": "<:gray_t:1471405744317399092>", "u": "<:gray_u:1471405747416862802>", "v": "<:gray_v:1471405748729937920>", "w": "<:gray_w:1471405750243819645>", "x": "<:gray_x:1471405751422418965>", "y": "<:gray_y:1471405752794091583>", "z": "<:gray_z:1471405760251564045>"}
+
+
+KEYBOARD_ROWS = [
+    "qwertyuiop",
+    "asdfghjkl",
+    "zxcvbnm"
+]
+
+
+def format_result(word, greenlist, yellowlist):
+    emojis = []
+    for i in range(5):
+        if greenlist[i]:
+            emojis.append(greenEmojis[word[i]])
+        elif yellowlist[i]:
+            emojis.append(yellowEmojis[word[i]])
+        else:
+            emojis.append(grayEmojis[word[i]])
+    return "".join(emojis)
+
+
+PRIORITY = {
+    "⬜": 0,
+    "⬛": 1,
+    "🟨": 2,
+    "🟩": 3
+}
+
+ROW_INDENTS = [
+    0,  # qwertyuiop
+    5,  # asdfghjkl
+    15  # zxcvbnm
+]
+
+
+def empty_keyboard():
+    return {chr(c): "⬜" for c in range(ord("a"), ord("z") + 1)}
+
+
+def update_keyboard(kb, word, greenlist, yellowlist):
+    for i, letter in enumerate(word):
+        if greenlist[i]:
+            new = "🟩"
+        elif yellowlist[i]:
+            new = "🟨"
+        else:
+            new = "⬛"
+
+        if PRIORITY[new] > PRIORITY[kb[letter]]:
+            kb[letter] = new
+
+
+def render_keyboard(kb):
+    lines = []
+    for row, indent in zip(KEYBOARD_ROWS, ROW_INDENTS):
+        keys = []
+        for letter in row:
+            state = kb[letter]
+            keys.append(KEYS[state][letter])
+        line = " ".join(keys)
+        lines.append(" " * indent + line)
+    return "\n".join(lines)
+
+
+# ---------- cached rendering ----------
+# everything a board or keyboard is made of, built once
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+FRAGMENTS = [None] * 3  # pattern digit -> letter -> emoji
+FRAGMENTS[GRAY], FRAGMENTS[YELLOW], FRAGMENTS[GREEN] = grayEmojis, yellowEmojis, greenEmojis
+DIGITS = [tuple(code // 3 ** i % 3 for i in range(5)) for code in range(3 ** 5)]  # pattern code -> per-position digits
+KEYS = {state: {letter: f"{state}**{letter.upper()}**" for letter in LETTERS} for state in PRIORITY}
+INDENTS = [" " * indent for indent in ROW_INDENTS]
+ROW_BITS = [[(1 << (ord(letter) - 97), letter) for letter in row] for row in KEYBOARD_ROWS]
+ROW_MASKS = [sum(bit for bit, _ in row) for row in ROW_BITS]
+
+
+@lru_cache(maxsize=1 << 16)
+def render_row(word, code):
+    """one board row, from the guess and its feedback pattern code."""
+    return "".join([FRAGMENTS[digit][letter] for digit, letter in zip(DIGITS[code], word)])
+
+
+def render_keyboard_masks(green, yellow, gray):
+    """render_keyboard for the letter masks a Game keeps."""
+    # a letter shows its best state only, so drop the lower bits before caching
+    yellow &= ~green
+    gray &= ~(green | yellow)
+    # each row is cached on its own letters, which repeat far more than whole keyboards
+    top, home, bottom = ROW_MASKS
+    return (
+        f"{_render_row_keys(0, green & top, yellow & top, gray & top)}\n"
+        f"{_render_row_keys(1, green & home, yellow & home, gray & home)}\n"
+        f"{_render_row_keys(2, green & bottom, yellow & bottom, gray & bottom)}"
+    )
+
+
+@lru_cache(maxsize=1 << 14)
+def _render_row_keys(i, green, yellow, gray):
+    keys = []
+    for bit, letter in ROW_BITS[i]:
+        if green & bit:
+            keys.append(KEYS["🟩"][letter])
+        elif yellow & bit:
+            keys.append(KEYS["🟨"][letter])
+        elif gray & bit:
+            keys.append(KEYS["⬛"][letter])
+        else:
+            keys.append(KEYS["⬜"][letter])
+    return INDENTS[i] + " ".join(keys)
+
+
+ROMAN = ["", "I", "II", "III", "IV", "V"]  # division 0 (the top rank) has no numeral
+
+
+def rank_label(elo):
+    """(emoji, "name division") for an elo, or None below the first rank."""
+    rank = get_rank_with_division(elo)
+    if rank is None:
+        return None
+    return _rank_label(*rank_key(rank))
+
+
+@lru_cache(maxsize=None)
+def _rank_label(index, div):
+    _, name, emoji = RANKS[index]
+    return emoji, f"{name} {ROMAN[div]}"
+
+
+if __name__ == "__main__":
+    # render cost per guess: the old dict keyboard + guessString concatenation
+    # vs cached rows and keyboard masks, over the same games
+    import random
+    import timeit
+
+    from feedback import ANSWERS, WORDS, score
+    from game import Game
+
+    rng = random.Random(0)
+    GAMES = 20_000
+
+    for elo in range(-1, 12_000):
+        rank = get_rank_with_division(elo)
+        if rank is None:
+            assert rank_label(elo) is None
+            continue
+        _, _, name, emoji, div = rank
+        old_div = ["I", "II", "III", "IV", "V"][div - 1] if div != 0 else ""
+        assert rank_label(elo) == (emoji, f"{name} {old_div}")
+
+    # a guess as play_guess handles it once WORDS.id has validated it: score
+    # it, then render the board and keyboard. players mostly open with a few favourite words, so the second
+    # run draws its first two guesses from a short list
+    OPENERS = ["crane", "slate", "adieu", "audio", "raise", "stare", "roate", "soare", "arise", "trace"]
+
+    def make_games(openers):
+        games = []
+        for _ in range(GAMES):
+            words = rng.sample(WORDS, 6)
+            if openers:
+                words[:2] = rng.sample(OPENERS, 2)
+            games.append((rng.randrange(len(ANSWERS)), words, [WORDS.id(w) for w in words]))
+        return games
+
+    def before(games, out):
+        for answer_id, words, _ in games:
+            answer, kb, guess_string = ANSWERS[answer_id], empty_keyboard(), ""
+            for n, word in enumerate(words, start=1):
+                greenlist, yellowlist = score(word, answer)
+                result = format_result(word, greenlist, yellowlist)
+                guess_string = f"{guess_string}\n{result}" if n > 1 else result
+                update_keyboard(kb, word, greenlist, yellowlist)
+                text = f"{guess_string}\n\n{render_keyboard(kb)}"
+                if out is not None:
+                    out.append(text)
+
+    def after(games, out):
+        for answer_id, words, word_ids in games:
+            game = Game(answer_id)
+            for word, word_id in zip(words, word_ids):
+                game.guess(word_id, word)
+                text = f"{game.board()}\n\n{game.keyboard_text()}"
+                if out is not None:
+                    out.append(text)
+
+    for label, openers in (("random guesses", False), ("common openers", True)):
+        games = make_games(openers)
+        old, new = [], []
+        before(games[:2000], old)
+        after(games[:2000], new)
+        assert old == new
+        for name, fn in (("before", before), ("after", after)):
+            took = min(timeit.repeat(lambda: fn(games, None), number=1, repeat=3))
+            print(f"{label}, {name:>6}: {took / (GAMES * 6) * 1e6:5.2f} us per guess (scoring + board + keyboard)")
+
+    # rendering a board state again (an edit, a re-sent board) after 4 guesses
+    answer_id, words = rng.randrange(len(ANSWERS)), rng.sample(WORDS, 4)
+    game, kb = Game(answer_id), empty_keyboard()
+    for word in words:
+        greenlist, yellowlist = score(word, ANSWERS[answer_id])
+        update_keyboard(kb, word, greenlist, yellowlist)
+        game.guess(WORDS.id(word), word)
+    guess_string = game.board()  # the old games kept theirs
+    for name, fn in (
+        ("before", lambda: guess_string + render_keyboard(kb)),
+        ("after", lambda: game.board() + game.keyboard_text()),
+    ):
+        took = min(timeit.repeat(fn, number=20_000, repeat=5)) / 20_000
+        print(f"re-render, {name:>6}: {took * 1e6:5.2f} us")
@@ -0,0 +1,335 @@
+"""
+offline re-rating: replays every recorded ranked result through an elo
+formula from elo.DELTAS and reports how the ladder would move.
+
+    python rerate.py --formula new                          # ranked games in history/
+    python rerate.py --formula old --csv games.csv          # user_id,guesses,won[,elo_before] lines, oldest first
+    python rerate.py --formula new --out rerated.json --json report.json
+    python rerate.py --formula new --synthetic 5000000      # timing on made-up games
+
+games are streamed in chunks, in time order, so the input never has to fit
+in memory. within a chunk each player's n-th game goes in round n; the
+games of one round all belong to different players, so a round is a single
+vectorized delta over all of them.
+
+history only goes back so far, so a replayed player starts from the elo
+before their first recorded game (the default elo for --synthetic and csv
+lines without one) and keeps their stored wins/losses, which a different
+formula would not change. players with no recorded ranked games keep their
+current stats. --out writes the result in leaderboard.json's format, to be
+swapped in while the bot is stopped.
+"""
+import argparse
+import json
+import os
+import time
+from itertools import islice
+
+import numpy as np
+
+from elo import DELTAS, default_params, parse_overrides
+from history import DTYPE, MODES
+from persistence import dump_json
+from ranks import RANKS, rank_indices
+from storage import default_stats, open_storage
+
+CHUNK = 1 << 20  # games per chunk
+RANKED = MODES.index("ranked")
+
+
+# ---------- input ----------
+class _WriterStream:
+    """one history writer's segments read as one time-ordered stream, through np.memmap."""
+
+    def __init__(self, paths):
+        # a torn record at the end of a live segment is left out
+        self.segments = [
+            np.memmap(p, dtype=DTYPE, mode="r", shape=(os.path.getsize(p) // DTYPE.itemsize,))
+            for p in paths if os.path.getsize(p) >= DTYPE.itemsize
+        ]
+        self.pos = 0  # row in segments[0]
+
+    def time_ahead(self, k):
+        # time of the k-th row from here, or None if there are fewer left
+        k += self.pos
+        for segment in self.segments:
+            if k < len(segment):
+                return int(segment["time"][k])
+            k -= len(segment)
+        return None
+
+    def take_until(self, t):
+        # every remaining row with time <= t (times never go back within one writer)
+        out = []
+        while self.segments:
+            segment = self.segments[0]
+            end = self.pos + int(np.searchsorted(segment["time"][self.pos:], t, side="right"))
+            out.append(np.asarray(segment[self.pos:end]))
+            if end < len(segment):
+                self.pos = end
+                break
+            self.segments.pop(0)
+            self.pos = 0
+        return out
+
+
+def history_chunks(root, chunk=CHUNK):
+    """ranked games from history segments, merged across writers by time."""
+    streams = []
+    for name in sorted(os.listdir(root)):
+        directory = os.path.join(root, name)
+        if name.startswith("w") and os.path.isdir(directory):
+            paths = [os.path.join(directory, n) for n in sorted(os.listdir(directory)) if n.endswith(".seg")]
+            streams.append(_WriterStream(paths))
+
+    while any(s.segments for s in streams):
+        ahead = [s.time_ahead(chunk - 1) for s in streams if s.segments]
+        limit = min((t for t in ahead if t is not None), default=None)
+        parts = [rows for s in streams for rows in s.take_until(2 ** 32 if limit is None else limit)]
+        games = np.concatenate(parts) if parts else np.empty(0, dtype=DTYPE)
+        games = games[games["mode"] == RANKED]
+        games = games[np.argsort(games["time"], kind="stable")]
+        if len(games):
+            yield (games["user"], games["guesses"].astype(np.int64), games["won"].astype(bool),
+                   games["elo_before"].astype(np.int64))
+
+
+def csv_chunks(path, chunk=CHUNK):
+    """user_id,guesses,won[,elo_before] lines (won 1/0), oldest first."""
+    with open(path) as f:
+        while True:
+            lines = list(islice(f, chunk))
+            if not lines:
+                return
+            data = np.loadtxt(lines, delimiter=",", dtype=np.int64, ndmin=2, comments="#")
+            if len(data):
+                yield data[:, 0].astype(np.uint64), data[:, 1], data[:, 2].astype(bool), \
+                    data[:, 3] if data.shape[1] > 3 else None
+
+
+def synthetic_chunks(games, players, chunk=CHUNK, seed=0):
+    """made-up ranked games, for timing."""
+    rng = np.random.default_rng(seed)
+    p = np.array([0.01, 0.06, 0.25, 0.33, 0.20, 0.10, 0.05])  # 1..6 guesses, then a loss
+    for lo in range(0, games, chunk):
+        n = min(chunk, games - lo)
+        outcome = rng.choice(7, size=n, p=p)
+        users = rng.integers(0, players, size=n).astype(np.uint64) + np.uint64(10 ** 17)
+        yield users, np.where(outcome < 6, outcome + 1, 6), outcome < 6, None
+
+
+# ---------- replay ----------
+class Ladder:
+    """elo, wins and losses per replayed player, in arrays sorted by user id."""
+
+    def __init__(self, start_elo):
+        self.start_elo = start_elo
+        self.ids = np.empty(0, dtype=np.uint64)
+        self.elo = np.empty(0, dtype=np.int64)
+        self.wins = np.empty(0, dtype=np.int64)
+        self.losses = np.empty(0, dtype=np.int64)
+        self.games = 0
+        self.rounds = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def replay(self, users, guesses, won, delta, params, elo_before=None):
+        """applies one chunk of games, in order. a new player starts from elo_before of their first game."""
+        n = len(users)
+
+        # one stable sort by user gives the new players, every game's dense
+        # index, and its occurrence: how many earlier games of the same player
+        # are in this chunk
+        order = np.argsort(users, kind="stable")
+        sorted_users = users[order]
+        first = np.r_[True, sorted_users[1:] != sorted_users[:-1]]
+        uniq = sorted_users[first]
+
+        pos = np.searchsorted(self.ids, uniq)
+        known = pos < len(self.ids)
+        known[known] = self.ids[pos[known]] == uniq[known]
+        if not known.all():
+            at = pos[~known]
+            start = self.start_elo if elo_before is None else elo_before[order[first]][~known]
+            self.ids = np.insert(self.ids, at, uniq[~known])
+            self.elo = np.insert(self.elo, at, start)
+            self.wins = np.insert(self.wins, at, 0)
+            self.losses = np.insert(self.losses, at, 0)
+            pos = np.searchsorted(self.ids, uniq)
+
+        idx = np.empty(n, dtype=np.int64)
+        idx[order] = pos[np.cumsum(first) - 1]
+        group_start = np.maximum.accumulate(np.where(first, np.arange(n), 0))
+        occurrence = np.empty(n, dtype=np.int64)
+        occurrence[order] = np.arange(n) - group_start
+
+        by_round = np.argsort(occurrence, kind="stable")
+        bounds = np.r_[0, np.cumsum(np.bincount(occurrence))]
+        for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            games = by_round[lo:hi]
+            players = idx[games]
+            self.elo[players] += delta(self.elo[players], guesses[games], won[games], params)
+
+        np.add.at(self.wins, idx[won], 1)
+        np.add.at(self.losses, idx[~won], 1)
+        self.games += n
+        self.rounds += len(bounds) - 1
+
+
+def rerate(chunks, formula, params=None, start_elo=None):
+    params = params or default_params()
+    delta = DELTAS[formula][1]
+    ladder = Ladder(default_stats()["elo"] if start_elo is None else start_elo)
+    for users, guesses, won, elo_before in chunks:
+        ladder.replay(users, guesses, won, delta, params, elo_before)
+    return ladder
+
+
+# ---------- report ----------
+def rerated(old, ladder):
+    """the new ladder in leaderboard.json's format; `old` is {user_id: stats} from storage."""
+    new = {uid: dict(stats) for uid, stats in old.items()}
+    for uid, elo, wins, losses in zip(ladder.ids.tolist(), ladder.elo.tolist(),
+                                      ladder.wins.tolist(), ladder.losses.tolist()):
+        stats = new.get(str(uid))
+        if stats is None:
+            new[str(uid)] = {"elo": elo, "wins": wins, "losses": losses}
+        else:
+            stats["elo"] = elo  # same results, only the formula changed
+    return new
+
+
+def diff(old, ladder):
+    """how players moved, by RANKS tier, without building the new ladder."""
+    old_ids = np.array([int(uid) for uid in old], dtype=np.uint64)
+    old_elo = np.array([stats["elo"] for stats in old.values()], dtype=np.int64)
+    old_games = np.array([stats["wins"] + stats["losses"] for stats in old.values()], dtype=np.int64)
+    order = np.argsort(old_ids)
+    old_ids, old_elo, old_games = old_ids[order], old_elo[order], old_games[order]
+
+    # replayed players: their stored elo (or the default) before, the replay after
+    pos = np.minimum(np.searchsorted(old_ids, ladder.ids), max(0, len(old_ids) - 1))
+    stored = (pos < len(old_ids)) & (old_ids[pos] == ladder.ids) if len(old_ids) else np.zeros(len(ladder), bool)
+    replayed_before = np.where(stored, old_elo[pos] if len(old_ids) else 0, default_stats()["elo"])
+    # played before history was recorded: only their later games were replayed
+    partial = stored & ((old_games[pos] if len(old_ids) else 0) > ladder.wins + ladder.losses)
+
+    # everyone else keeps their elo
+    pos = np.minimum(np.searchsorted(ladder.ids, old_ids), max(0, len(ladder) - 1))
+    untouched = ~((ladder.ids[pos] == old_ids) if len(ladder) else np.zeros(len(old_ids), bool))
+
+    uids = np.concatenate([ladder.ids, old_ids[untouched]])
+    before = np.concatenate([replayed_before, old_elo[untouched]])
+    after = np.concatenate([ladder.elo, old_elo[untouched]])
+    tier_before = np.maximum(rank_indices(before)[0], 0)
+    tier_after = np.maximum(rank_indices(after)[0], 0)
+
+    tiers = {}
+    for i, (_, name, _) in enumerate(RANKS):
+        here = tier_before == i
+        if not here.any() and not (tier_after == i).any():
+            continue
+        tiers[name] = {
+            "before": int(here.sum()),
+            "after": int((tier_after == i).sum()),
+            "up": int((tier_after[here] > i).sum()),
+            "same": int((tier_after[here] == i).sum()),
+            "down": int((tier_after[here] < i).sum()),
+            "mean_change": round(float((after[here] - before[here]).mean()), 1) if here.any() else 0.0,
+        }
+
+    moves = {}
+    pairs, counts = np.unique(np.stack([tier_before, tier_after]), axis=1, return_counts=True)
+    for (a, b), n in zip(pairs.T.tolist(), counts.tolist()):
+        if a != b:
+            moves.setdefault(RANKS[a][1], {})[RANKS[b][1]] = int(n)
+
+    change = after - before
+    order = np.argsort(change, kind="stable")
+    gains, drops = order[::-1][:10], order[:10]
+
+    def movers(picks):
+        return [{"user_id": str(uids[i]), "before": int(before[i]), "after": int(after[i])} for i in picks]
+
+    return {
+        "players": len(uids),
+        "replayed": len(ladder),
+        "games": ladder.games,
+        "partial": int(partial.sum()),
+        "tiers": tiers,
+        "moves": moves,
+        "biggest_gains": movers(gains[change[gains] > 0]),
+        "biggest_drops": movers(drops[change[drops] < 0]),
+    }
+
+
+def print_report(report):
+    print(f"{report['players']} players, {report['replayed']} replayed from {report['games']:,} ranked games\n")
+    if report["partial"]:
+        print(f"warning: {report['partial']} replayed players have more stored games than recorded ones, "
+              f"their elo is only replayed from their first recorded game on\n")
+    print(f"{'tier':>20} {'before':>8} {'after':>8} {'up':>7} {'same':>7} {'down':>7} {'mean Δ':>8}")
+    for name, t in report["tiers"].items():
+        print(f"{name:>20} {t['before']:>8} {t['after']:>8} {t['up']:>7} {t['same']:>7} {t['down']:>7} {t['mean_change']:>8}")
+    if report["moves"]:
+        print("\ntier moves")
+        for a, targets in report["moves"].items():
+            print(f"  {a:>20} -> " + ", ".join(f"{b} {n}" for b, n in targets.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="re-rate the ladder by replaying ranked games under an elo formula")
+    parser.add_argument("--formula", choices=sorted(DELTAS), default="new")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override one of the formula's constants (elo.FORMULA_PARAMS), e.g. CURVE_SCALE=6000")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--history", default="history", help="game history directory (default)")
+    source.add_argument("--csv", help="user_id,guesses,won per line, oldest first")
+    source.add_argument("--synthetic", type=int, metavar="GAMES", help="replay this many made-up games")
+    parser.add_argument("--players", type=int, default=1_000_000, help="players in --synthetic")
+    parser.add_argument("--storage", choices=("json", "sqlite"), default=os.environ.get("STORAGE_BACKEND", "json"))
+    parser.add_argument("--leaderboard", default="leaderboard.json")
+    parser.add_argument("--database", default="wordle.db")
+    parser.add_argument("--chunk", type=int, default=CHUNK)
+    parser.add_argument("--out", help="write the re-rated ladder here (leaderboard.json format)")
+    parser.add_argument("--json", help="write the report here")
+    args = parser.parse_args()
+
+    try:
+        params = parse_overrides(args.formula, args.set)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.synthetic:
+        chunks, old = synthetic_chunks(args.synthetic, args.players, args.chunk), {}
+    else:
+        storage = open_storage(args.storage, args.leaderboard, args.database)
+        old = {str(uid): dict(stats) for uid, stats in storage.all_players()}
+        storage.close()
+        if args.csv:
+            chunks = csv_chunks(args.csv, args.chunk)
+        elif os.path.isdir(args.history):
+            chunks = history_chunks(args.history, args.chunk)
+        else:
+            parser.error(f"no game history in {args.history}/ yet (games are recorded there once they finish)")
+
+    t = time.perf_counter()
+    ladder = rerate(chunks, args.formula, params)
+    took = time.perf_counter() - t
+    report = diff(old, ladder)
+
+    print_report(report)
+    print(f"\nreplayed {ladder.games:,} games in {took:.2f}s ({ladder.rounds} rounds)")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(dump_json(rerated(old, ladder)))
+    if args.json:
+        report.update(formula=args.formula, params=params, seconds=round(took, 3))
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import Counter
+
+log = logging.getLogger("wordle.game")
+
+
+class SessionExpiry:
+    """
+    idle timeouts for games, one background task for all of them.
+
+    touch() pushes a (deadline, mode, user_id) entry on a heap and remembers
+    the latest deadline per session; entries that no longer match (the player
+    guessed again, or the game ended) are skipped when they surface, and the
+    heap is rebuilt if those pile up.
+
+    each expiry runs as its own task, so the heap never waits on a slow
+    mailbox, flush or discord call.
+
+    stats(): live sessions per mode, sessions expired per mode, and how many
+    stale heap entries have been evicted.
+    """
+
+    def __init__(self, ttls, on_expire):
+        self.ttls = ttls  # mode -> idle seconds
+        self.on_expire = on_expire  # async (user_id, mode)
+        self.expired = Counter()
+        self.evicted = 0
+        self._deadlines = {}  # (mode, user_id) -> deadline
+        self._heap = []
+        self._wake = asyncio.Event()
+        self._task = None
+        self._expiring = set()  # the loop only keeps weak references to tasks
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def touch(self, user_id, mode):
+        deadline = time.monotonic() + self.ttls[mode]
+        self._deadlines[(mode, user_id)] = deadline
+        heapq.heappush(self._heap, (deadline, mode, user_id))
+        if self._heap[0][0] == deadline:
+            self._wake.set()
+
+    def forget(self, user_id, mode):
+        self._deadlines.pop((mode, user_id), None)
+
+    def active(self, user_id, mode):
+        return (mode, user_id) in self._deadlines
+
+    def stats(self):
+        live = Counter(mode for mode, _ in self._deadlines)
+        return {
+            "live": {mode: live[mode] for mode in self.ttls},
+            "expired": {mode: self.expired[mode] for mode in self.ttls},
+            "evicted": self.evicted,
+            "heap": len(self._heap),
+        }
+
+    def _compact(self):
+        if len(self._heap) <= 2 * len(self._deadlines) + 64:
+            return
+        before = len(self._heap)
+        self._heap = [(d, mode, uid) for (mode, uid), d in self._deadlines.items()]
+        heapq.heapify(self._heap)
+        self.evicted += before - len(self._heap)
+
+    async def _expire(self, user_id, mode):
+        try:
+            await self.on_expire(user_id, mode)
+        except Exception:
+            log.exception("expiring %s game of %s failed", mode, user_id)
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                deadline, mode, user_id = heapq.heappop(self._heap)
+                if self._deadlines.get((mode, user_id)) != deadline:
+                    self.evicted += 1
+                    continue
+                del self._deadlines[(mode, user_id)]
+                self.expired[mode] += 1
+                task = asyncio.create_task(self._expire(user_id, mode))
+                self._expiring.add(task)
+                task.add_done_callback(self._expiring.discard)
+            self._compact()
+
+            self._wake.clear()
+            timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,72 @@
+"""
+runs the bot as several worker processes, each an AutoShardedBot over its
+share of the shards (worker i gets shards i, i + n, i + 2n, ...):
+
+    SHARD_COUNT=8 SHARD_PROCESSES=4 STORAGE_BACKEND=sqlite python shards.py
+
+the workers share wordle.db: players, the leaderboard and which worker owns
+each running ranked game (see SqliteStorage). everything else (casual games,
+board messages, the ranked journal) stays inside the worker whose shard the
+command came in on. worker 0 also runs the web server.
+
+the word index and feedback matrix caches are built here, before the workers
+start. a worker that crashes is restarted; ctrl-c or SIGTERM stops them all
+cleanly.
+"""
+import os
+import signal
+import subprocess
+import sys
+import time
+
+RESTART_DELAY = 5.0  # seconds before restarting a crashed worker
+
+
+def spawn(worker):
+    env = dict(os.environ, SHARD_WORKER=str(worker))
+    # own session, so a ctrl-c reaches the workers once (from here), not twice
+    return subprocess.Popen([sys.executable, "main.py"], env=env, start_new_session=True)
+
+
+def main():
+    count = int(os.environ.get("SHARD_COUNT", 0))
+    processes = int(os.environ.get("SHARD_PROCESSES", 1))
+    if processes < 1 or count < processes:
+        sys.exit("SHARD_COUNT must be at least SHARD_PROCESSES (and SHARD_PROCESSES at least 1)")
+    if processes > 1 and os.environ.get("STORAGE_BACKEND") != "sqlite":
+        sys.exit("running several shard processes needs STORAGE_BACKEND=sqlite")
+
+    # build the word index and feedback matrix caches once, not in every worker at once
+    import feedback
+
+    workers = {i: spawn(i) for i in range(processes)}
+    crashed = {}  # worker -> when it died
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for proc in workers.values():
+            if proc.poll() is None:
+                proc.send_signal(signal.SIGINT)  # bot.run shuts down and flushes on KeyboardInterrupt
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    while not stopping:
+        time.sleep(1)
+        for i, proc in workers.items():
+            if proc.poll() is not None and i not in crashed:
+                print(f"worker {i} exited with {proc.returncode}, restarting in {RESTART_DELAY:.0f}s", file=sys.stderr)
+                crashed[i] = time.monotonic()
+        for i, died in list(crashed.items()):
+            if not stopping and time.monotonic() - died >= RESTART_DELAY:
+                workers[i] = spawn(i)
+                del crashed[i]
+
+    for proc in workers.values():
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
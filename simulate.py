@@ -0,0 +1,187 @@
+"""
+offline ranked ladder simulator, for comparing elo formulas and retuning constants.
+
+    python simulate.py --formula new --players 10000 --games 500
+    python simulate.py --formula old --set ELO_CENTER=2600 --set K_DECAY_POWER=3 --json out.json
+
+each synthetic player has a skill level (a guess-count distribution) and plays
+`games` ranked games from the starting elo. players never play each other, so
+they are split into chunks and simulated on a process pool.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from elo import DELTAS, default_params, parse_overrides
+from ranks import RANKS, STARTS, rank_indices
+
+# P(win in 1..6 guesses); whatever is left over is a loss
+SKILLS = {
+    "beginner": [0.000, 0.010, 0.080, 0.250, 0.300, 0.200],
+    "average": [0.002, 0.040, 0.200, 0.350, 0.250, 0.110],
+    "good": [0.005, 0.070, 0.300, 0.370, 0.180, 0.060],
+    "expert": [0.010, 0.100, 0.400, 0.360, 0.100, 0.025],
+}
+
+
+def _cumulative(dists):
+    cum = np.cumsum(np.asarray(dists, dtype=np.float64), axis=1)
+    if (cum[:, -1] > 1 + 1e-9).any():
+        raise ValueError("guess distribution adds up to more than 1")
+    return cum
+
+
+def simulate_chunk(formula, params, skill_ids, cum, games, start_elo, seed):
+    """
+    plays `games` rounds for one chunk of players.
+    returns final elos and, per player and tier, the game on which the tier
+    was first reached (-1 if never).
+    """
+    rng = np.random.default_rng(seed)
+    delta = DELTAS[formula][1]
+
+    n = len(skill_ids)
+    elos = np.full(n, start_elo, dtype=np.int64)
+    player_cum = cum[skill_ids]
+    reached = np.full((n, len(RANKS)), -1, dtype=np.int32)
+    reached[elos[:, None] >= np.asarray(STARTS)[None, :]] = 0
+
+    for game in range(1, games + 1):
+        outcome = (rng.random(n)[:, None] >= player_cum).sum(axis=1)  # 0..5 -> win in 1..6, 6 -> loss
+        won = outcome < 6
+        guesses = np.where(won, outcome + 1, 6)
+        elos += delta(elos, guesses, won, params)
+
+        best = rank_indices(elos)[0]
+        for tier in range(int(best.max()) + 1):
+            new = (reached[:, tier] < 0) & (best >= tier)
+            reached[new, tier] = game
+
+    return elos, reached
+
+
+def run(formula, skills, players, games, start_elo=1000, workers=None, seed=0, params=None):
+    params = params or default_params()
+    names = list(skills)
+    cum = _cumulative([skills[name] for name in names])
+    skill_ids = np.arange(players) % len(names)
+
+    workers = workers or os.cpu_count() or 1
+    chunks = np.array_split(skill_ids, max(1, min(workers * 4, players)))
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(simulate_chunk, formula, params, chunk, cum, games, start_elo, s)
+            for chunk, s in zip(chunks, seeds)
+        ]
+        results = [f.result() for f in futures]
+
+    elos = np.concatenate([r[0] for r in results])
+    reached = np.concatenate([r[1] for r in results])
+    return summarize(names, skill_ids, elos, reached, games)
+
+
+def summarize(names, skill_ids, elos, reached, games):
+    tiers = rank_indices(elos)[0]
+    report = {
+        "games_per_player": games,
+        "players": len(elos),
+        "tiers": {
+            name: int(count)
+            for (_, name, _), count in zip(RANKS, np.bincount(np.maximum(tiers, 0), minlength=len(RANKS)))
+        },
+        "skills": {},
+    }
+
+    for i, name in enumerate(names):
+        mask = skill_ids == i
+        e = elos[mask]
+        r = reached[mask]
+        counts, edges = np.histogram(e, bins=20)
+        time_to_rank = {}
+        for tier, (_, tier_name, _) in enumerate(RANKS):
+            hit = r[:, tier][r[:, tier] >= 0]
+            if len(hit):
+                time_to_rank[tier_name] = {
+                    "reached": round(len(hit) / len(r), 4),
+                    "median_games": int(np.median(hit)),
+                }
+        report["skills"][name] = {
+            "players": int(mask.sum()),
+            "elo_mean": round(float(e.mean()), 1),
+            "elo_p10": int(np.percentile(e, 10)),
+            "elo_p50": int(np.percentile(e, 50)),
+            "elo_p90": int(np.percentile(e, 90)),
+            "histogram": counts.tolist(),
+            "histogram_edges": edges.round().astype(int).tolist(),
+            "time_to_rank": time_to_rank,
+        }
+    return report
+
+
+def print_report(report):
+    print(f"{report['players']} players x {report['games_per_player']} games\n")
+
+    print("steady state elo")
+    for name, s in report["skills"].items():
+        print(f"  {name:>10}: mean {s['elo_mean']:>8}  p10 {s['elo_p10']:>6}  p50 {s['elo_p50']:>6}  p90 {s['elo_p90']:>6}")
+
+    print("\nrank populations")
+    for name, count in report["tiers"].items():
+        if count:
+            print(f"  {name:>20}: {count}")
+
+    print("\nmedian games to reach rank (share of players that got there)")
+    for name, s in report["skills"].items():
+        steps = [f"{tier} {t['median_games']} ({t['reached']:.0%})" for tier, t in s["time_to_rank"].items()]
+        print(f"  {name:>10}: " + ", ".join(steps))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="simulate the ranked ladder under an elo formula")
+    parser.add_argument("--formula", choices=sorted(DELTAS), default="new")
+    parser.add_argument("--players", type=int, default=4000)
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--start-elo", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override one of the formula's constants (elo.FORMULA_PARAMS), e.g. CURVE_SCALE=6000")
+    parser.add_argument("--skills", help="json file mapping skill name -> [P(1), ..., P(6)]")
+    parser.add_argument("--json", help="write the full report here")
+    args = parser.parse_args()
+
+    try:
+        params = parse_overrides(args.formula, args.set)
+    except ValueError as e:
+        parser.error(str(e))
+
+    skills = SKILLS
+    if args.skills:
+        with open(args.skills) as f:
+            skills = json.load(f)
+
+    t = time.perf_counter()
+    report = run(
+        args.formula, skills, args.players, args.games, start_elo=args.start_elo,
+        workers=args.workers, seed=args.seed, params=params
+    )
+    elapsed = time.perf_counter() - t
+
+    print_report(report)
+    print(f"\n{args.players * args.games:,} games in {elapsed:.2f}s")
+
+    if args.json:
+        report["formula"] = args.formula
+        report["params"] = params
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+hints and analysis: which answers are still possible after some guesses, and
+which next guess tells you the most about them (expected information, bits).
+
+the opening move and the second move after popular openers take seconds to
+rank, so they are precomputed on a process pool and cached on disk (the bot
+runs the build in the background the first time it starts without them):
+
+    python solver.py build --workers 8
+    python solver.py solve crane bybbg
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+
+from feedback import ALL_GREEN, ANSWERS, ANSWERS_FILE, GRAY, GREEN, MATRIX, WORD_IDS, WORDS, WORDS_FILE, YELLOW
+from persistence import atomic_write
+
+TABLES_FILE = "solver_{}.json"
+TOP = 5  # guesses kept per position
+OPENERS = ["crane", "slate", "adieu", "audio", "raise", "stare", "roate", "soare", "arise", "trace", "salet"]
+BEST_OPENERS = 10  # second-move tables are also built for this many top openers
+
+PATTERNS = 3 ** 5
+SMALL = 32  # candidate sets up to this size take the pairwise path in entropies()
+ALL_ANSWERS = np.arange(len(ANSWERS))
+ANSWER_WORD_IDS = np.array([WORD_IDS[a] for a in ANSWERS])
+PATTERN_LETTERS = {"g": GREEN, "y": YELLOW, "b": GRAY, "x": GRAY, "-": GRAY, ".": GRAY}
+
+
+# ---------- core ----------
+def candidates(state):
+    """answer ids still possible after `state`, a sequence of (word_id, pattern code)."""
+    cands = ALL_ANSWERS
+    for word_id, code in state:
+        cands = cands[MATRIX[word_id, cands] == code]
+    return cands
+
+
+def entropies(cands, chunk=1024):
+    """expected information in bits of every word as the next guess."""
+    n = len(cands)
+    out = np.empty(len(WORDS))
+    if n == 0:
+        out[:] = 0
+        return out
+    if n <= SMALL:
+        # few answers left: count equal patterns pairwise instead of binning.
+        # sum over patterns of c*log(c) == sum over answers of log(c of its pattern)
+        block = MATRIX[:, cands]
+        same = (block[:, :, None] == block[:, None, :]).sum(2)
+        return np.log2(n) - np.log2(same).mean(1)
+    for lo in range(0, len(WORDS), chunk):
+        block = np.asarray(MATRIX[lo:lo + chunk][:, cands], dtype=np.int64)
+        rows = len(block)
+        block += np.arange(rows)[:, None] * PATTERNS
+        counts = np.bincount(block.ravel(), minlength=rows * PATTERNS).reshape(rows, PATTERNS)
+        p = counts / n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[lo:lo + rows] = -np.where(p > 0, p * np.log2(p), 0).sum(1)
+    return out
+
+
+def rank_guesses(cands, top=TOP):
+    """[(word_id, bits)] best first; a guess that could be the answer wins ties."""
+    if len(cands) <= 2:
+        # 1: just say it. 2: either one is as good as any other guess, and might win
+        bits = 1.0 if len(cands) == 2 else 0.0
+        return [(int(ANSWER_WORD_IDS[a]), bits) for a in cands[:top]]
+    bits = np.round(entropies(cands), 9)
+    possible = np.zeros(len(WORDS), dtype=bool)
+    possible[ANSWER_WORD_IDS[cands]] = True
+    order = np.lexsort((~possible, -bits))[:top]
+    return [(int(w), float(bits[w])) for w in order]
+
+
+# ---------- precomputed tables ----------
+_tables = None  # {"opening": [...], "second": {(word_id, code): [...]}}
+
+
+def _tables_path():
+    digest = hashlib.sha1()
+    for path in (WORDS_FILE, ANSWERS_FILE):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    digest.update(str(TOP).encode())
+    return TABLES_FILE.format(digest.hexdigest()[:12])
+
+
+def _second_moves(opener_id):
+    # one process pool job: the best second guess for every pattern of one opener
+    out = {}
+    codes = MATRIX[opener_id, ALL_ANSWERS]
+    for code in np.unique(codes).tolist():
+        if code != ALL_GREEN:
+            out[code] = rank_guesses(ALL_ANSWERS[codes == code])
+    return opener_id, out
+
+
+def build_tables(workers=None):
+    """ranks the opening and second moves on a process pool and caches them."""
+    opening = rank_guesses(ALL_ANSWERS, top=max(TOP, BEST_OPENERS))
+    openers = dict.fromkeys([WORD_IDS[w] for w in OPENERS] + [w for w, _ in opening[:BEST_OPENERS]])
+
+    second = {}
+    # spawn, not fork: children only need this module and the mmap'd matrix
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        for opener_id, moves in pool.map(_second_moves, openers):
+            for code, ranked in moves.items():
+                second[f"{opener_id}:{code}"] = ranked
+
+    path = _tables_path()
+    atomic_write(path, json.dumps({"opening": opening[:TOP], "second": second}))
+    return path
+
+
+def load_tables():
+    """loads the cached tables; False if they have not been built yet."""
+    global _tables
+    path = _tables_path()
+    if not os.path.exists(path):
+        return False
+    with open(path) as f:
+        data = json.load(f)
+
+    second = {}
+    for key, ranked in data["second"].items():
+        word_id, code = map(int, key.split(":"))
+        second[(word_id, code)] = [tuple(r) for r in ranked]
+    _tables = {"opening": [tuple(r) for r in data["opening"]], "second": second}
+    suggest.cache_clear()
+    return True
+
+
+# ---------- queries ----------
+@lru_cache(maxsize=4096)
+def suggest(state):
+    """
+    (answers left, [(word, bits)]) for a tuple of (word_id, code) pairs.
+    table hits return at once; anything else takes up to a few hundred ms, so
+    call it off the event loop.
+    """
+    cands = candidates(state)
+    ranked = None
+    if _tables is not None:
+        if not state:
+            ranked = _tables["opening"]
+        elif len(state) == 1:
+            ranked = _tables["second"].get(tuple(state[0]))
+    if ranked is None:
+        ranked = rank_guesses(cands)
+    return len(cands), [(WORDS[w], bits) for w, bits in ranked]
+
+
+def remaining(state, limit=10):
+    return [ANSWERS[a] for a in candidates(state)[:limit]]
+
+
+def parse_pattern(text):
+    """'gybbb' (g green, y yellow, b/x/-/. gray) -> pattern code, or None."""
+    text = text.lower()
+    if len(text) != 5 or any(c not in PATTERN_LETTERS for c in text):
+        return None
+    return sum(PATTERN_LETTERS[c] * 3 ** i for i, c in enumerate(text))
+
+
+def parse_state(args):
+    """['crane', 'bybbg', ...] -> ((word_id, code), ...); raises ValueError with a message."""
+    if len(args) % 2:
+        raise ValueError("give guesses as pairs: `<word> <pattern>`")
+    state = []
+    for word, text in zip(args[::2], args[1::2]):
+        word_id = WORDS.id(word.lower())
+        if word_id is None:
+            raise ValueError(f"`{word}` is not a valid word")
+        code = parse_pattern(text)
+        if code is None:
+            raise ValueError(f"`{text}` is not a pattern, use 5 of g/y/b (like `bygbb`)")
+        state.append((word_id, code))
+    return tuple(state)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="build the solver tables, or solve a position")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("--workers", type=int, default=os.cpu_count())
+    solve = sub.add_parser("solve")
+    solve.add_argument("pairs", nargs="*", help="word pattern word pattern ...")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        t = time.perf_counter()
+        path = build_tables(args.workers)
+        load_tables()
+        print(f"built {path} in {time.perf_counter() - t:.1f}s: "
+              f"{len(_tables['second'])} second-move positions")
+
+        # table answers match a fresh computation
+        for (word_id, code), ranked in list(_tables["second"].items())[::97]:
+            assert ranked == rank_guesses(candidates(((word_id, code),))), (WORDS[word_id], code)
+        for state in ((), ((WORD_IDS["crane"], 0),), ((WORD_IDS["slate"], 0), (WORD_IDS["crony"], 0))):
+            suggest.cache_clear()
+            t = time.perf_counter()
+            left, ranked = suggest(state)
+            print(f"{len(state)} guesses: {left} answers left, {ranked[0][0]} ({ranked[0][1]:.2f} bits) "
+                  f"in {(time.perf_counter() - t) * 1000:.1f} ms")
+    else:
+        load_tables()
+        state = parse_state(args.pairs)
+        t = time.perf_counter()
+        left, ranked = suggest(state)
+        print(f"{left} answers left ({(time.perf_counter() - t) * 1000:.1f} ms): {' '.join(remaining(state))}")
+        for word, bits in ranked:
+            print(f"  {word}  {bits:.2f} bits")
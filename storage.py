@@ -0,0 +1,309 @@
+import json
+import os
+import sqlite3
+
+from persistence import WriteBehind, dump_json
+
+
+def default_stats():
+    return {"elo": 1000, "wins": 0, "losses": 0}
+
+
+def read_json(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            content = f.read().strip()
+        return json.loads(content) if content else {}
+    except json.JSONDecodeError:
+        return {}
+
+
+class JsonStorage:
+    """
+    the original layout: every player in one dict, dumped to leaderboard.json.
+    writes are coalesced. the loop only copies the players that changed; the
+    writer thread folds them into its own copy of the ladder and dumps that.
+    """
+
+    def __init__(self, leaderboard_file, interval=5.0):
+        self.players = read_json(leaderboard_file)
+        self._claims = {}  # user_id -> owner of their running ranked game
+        self._changed = set()
+        self._shadow = {uid: dict(stats) for uid, stats in self.players.items()}  # writer thread only
+        self.writer = WriteBehind(leaderboard_file, self._take_changes, interval=interval, serialize=self._serialize)
+
+    def _take_changes(self):
+        changes = {uid: dict(self.players[uid]) for uid in self._changed}
+        self._changed.clear()
+        return changes
+
+    def _serialize(self, changes):
+        self._shadow.update(changes)
+        return dump_json(self._shadow)
+
+    def _mark(self, user_id):
+        self._changed.add(user_id)
+        self.writer.mark_dirty()
+
+    def start(self):
+        self.writer.start()
+
+    async def durable(self):
+        await self.writer.durable()
+
+    def close(self):
+        self.writer.flush_sync()
+
+    # ---------- players ----------
+    def get_player(self, user_id):
+        user_id = str(user_id)
+        if user_id not in self.players:
+            self.players[user_id] = default_stats()
+            self._mark(user_id)
+        return self.players[user_id]
+
+    def save_player(self, user_id, stats):
+        user_id = str(user_id)
+        self.players[user_id] = stats
+        self._mark(user_id)
+
+    def find_player(self, user_id):
+        # like get_player, but never creates one
+        return self.players.get(str(user_id))
+
+    def count(self):
+        return len(self.players)
+
+    def _sorted(self):
+        return sorted(self.players.items(), key=lambda x: x[1]["elo"], reverse=True)
+
+    def top(self, n):
+        return self._sorted()[:n]
+
+    def position(self, user_id):
+        user_id = str(user_id)
+        for i, (uid, _) in enumerate(self._sorted(), start=1):
+            if uid == user_id:
+                return i
+        return None
+
+    def all_players(self):
+        return self.players.items()
+
+    # ---------- ranked claims ----------
+    # one process, so these only need to be in memory: the journal replay
+    # claims the running games again after a restart
+    def claim_ranked(self, user_id, owner):
+        return self._claims.setdefault(str(user_id), owner) == owner
+
+    def ranked_owner(self, user_id):
+        return self._claims.get(str(user_id))
+
+    def release_claims(self, owner, keep=()):
+        keep = {str(uid) for uid in keep}
+        for uid in [uid for uid, o in self._claims.items() if o == owner and uid not in keep]:
+            del self._claims[uid]
+
+    def finish_ranked(self, user_id, owner, delta_fn, won):
+        if self._claims.get(str(user_id)) != owner:
+            return None
+        del self._claims[str(user_id)]
+        stats = self.get_player(user_id)
+        old_elo = stats["elo"]
+        delta = delta_fn(old_elo)
+        stats["elo"] += delta
+        stats["wins" if won else "losses"] += 1
+        self.save_player(user_id, stats)
+        return old_elo, stats, delta
+
+
+class SqliteStorage:
+    """
+    one row per player, so a write only touches the rows of the players
+    involved. the first open migrates leaderboard.json.
+
+    several bot processes can share one database (see shards.py). a ranked
+    game is claimed in ranked_claims when it starts, and finish_ranked drops
+    the claim and applies the elo change in one transaction, so a user only
+    ever has one ranked game and it is only ever scored once. daily_played
+    does the same for the once-a-day daily, across every worker.
+    """
+
+    def __init__(self, path, leaderboard_file=None):
+        self.db = sqlite3.connect(path, isolation_level=None)  # autocommit, one statement per write
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS players (
+                user_id TEXT PRIMARY KEY,
+                elo     INTEGER NOT NULL,
+                wins    INTEGER NOT NULL,
+                losses  INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS players_elo ON players (elo DESC);
+            CREATE TABLE IF NOT EXISTS meta (
+                key   TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS ranked_claims (
+                user_id TEXT PRIMARY KEY,
+                owner   INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS daily_played (
+                user_id TEXT PRIMARY KEY,
+                day     TEXT NOT NULL,
+                owner   INTEGER  -- the worker running it, NULL once finished
+            );
+            """
+        )
+        self.migrate(leaderboard_file)
+
+    def migrate(self, leaderboard_file):
+        if self.db.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone():
+            return
+
+        players = read_json(leaderboard_file) if leaderboard_file else {}
+        with self.db:
+            self.db.execute("BEGIN")
+            self.db.executemany(
+                "INSERT OR IGNORE INTO players VALUES (?, ?, ?, ?)",
+                ((uid, s["elo"], s["wins"], s["losses"]) for uid, s in players.items())
+            )
+            self.db.execute("INSERT INTO meta VALUES ('migrated', '1')")
+
+    def start(self):
+        pass
+
+    async def durable(self):
+        pass  # every write is its own committed statement
+
+    def close(self):
+        self.db.close()
+
+    # ---------- players ----------
+    def get_player(self, user_id):
+        # never overwrites a row another worker just committed
+        stats = default_stats()
+        self.db.execute(
+            "INSERT OR IGNORE INTO players VALUES (?, ?, ?, ?)",
+            (str(user_id), stats["elo"], stats["wins"], stats["losses"])
+        )
+        return self.find_player(user_id)
+
+    def find_player(self, user_id):
+        row = self.db.execute(
+            "SELECT elo, wins, losses FROM players WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+        return None if row is None else {"elo": row[0], "wins": row[1], "losses": row[2]}
+
+    def save_player(self, user_id, stats):
+        self.db.execute(
+            "INSERT INTO players VALUES (?, ?, ?, ?) ON CONFLICT (user_id) DO UPDATE"
+            " SET elo = excluded.elo, wins = excluded.wins, losses = excluded.losses",
+            (str(user_id), stats["elo"], stats["wins"], stats["losses"])
+        )
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+
+    def top(self, n):
+        rows = self.db.execute(
+            "SELECT user_id, elo, wins, losses FROM players ORDER BY elo DESC, rowid LIMIT ?", (n,)
+        )
+        return [(uid, {"elo": elo, "wins": wins, "losses": losses}) for uid, elo, wins, losses in rows]
+
+    def position(self, user_id):
+        row = self.db.execute(
+            "SELECT elo, rowid FROM players WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+        if row is None:
+            return None
+        elo, rowid = row
+        ahead = self.db.execute(
+            "SELECT (SELECT COUNT(*) FROM players WHERE elo > ?)"
+            " + (SELECT COUNT(*) FROM players WHERE elo = ? AND rowid < ?)",
+            (elo, elo, rowid)
+        ).fetchone()[0]
+        return ahead + 1
+
+    def all_players(self):
+        rows = self.db.execute("SELECT user_id, elo, wins, losses FROM players ORDER BY rowid")
+        return [(uid, {"elo": elo, "wins": wins, "losses": losses}) for uid, elo, wins, losses in rows]
+
+    def page(self, start, count):
+        """[(user_id, elo)] for positions start+1 .. start+count."""
+        return self.db.execute(
+            "SELECT user_id, elo FROM players ORDER BY elo DESC, rowid LIMIT ? OFFSET ?", (count, start)
+        ).fetchall()
+
+    def data_version(self):
+        # moves whenever any connection, in any process, commits a change
+        return self.db.execute("PRAGMA data_version").fetchone()[0], self.db.total_changes
+
+    # ---------- ranked claims ----------
+    def claim_ranked(self, user_id, owner):
+        """True if `owner` now holds the user's ranked game (or already did)."""
+        user_id = str(user_id)
+        self.db.execute("INSERT OR IGNORE INTO ranked_claims VALUES (?, ?)", (user_id, owner))
+        return self.ranked_owner(user_id) == owner
+
+    def ranked_owner(self, user_id):
+        row = self.db.execute("SELECT owner FROM ranked_claims WHERE user_id = ?", (str(user_id),)).fetchone()
+        return None if row is None else row[0]
+
+    def release_claims(self, owner, keep=()):
+        # startup: drop claims of games this owner no longer has (crashed before journaling them)
+        keep = {str(uid) for uid in keep}
+        held = self.db.execute("SELECT user_id FROM ranked_claims WHERE owner = ?", (owner,))
+        stale = [(uid, owner) for (uid,) in held.fetchall() if uid not in keep]
+        self.db.executemany("DELETE FROM ranked_claims WHERE user_id = ? AND owner = ?", stale)
+
+    def finish_ranked(self, user_id, owner, delta_fn, won):
+        """
+        ends a claimed ranked game: (old elo, new stats, delta), or None if
+        `owner` does not hold it. delta_fn(old_elo) gives the change.
+        """
+        user_id = str(user_id)
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")  # takes the write lock before reading the elo
+            deleted = self.db.execute(
+                "DELETE FROM ranked_claims WHERE user_id = ? AND owner = ?", (user_id, owner)
+            ).rowcount
+            if not deleted:
+                return None
+            stats = self.find_player(user_id) or default_stats()
+            old_elo = stats["elo"]
+            delta = delta_fn(old_elo)
+            stats["elo"] += delta
+            stats["wins" if won else "losses"] += 1
+            self.save_player(user_id, stats)
+        return old_elo, stats, delta
+
+    # ---------- daily claims ----------
+    def claim_daily(self, user_id, day, owner):
+        """True if the user had not started the daily for `day` (iso date) yet; `owner` now runs it."""
+        return self.db.execute(
+            "INSERT INTO daily_played VALUES (?, ?, ?) ON CONFLICT (user_id) DO UPDATE"
+            " SET day = excluded.day, owner = excluded.owner WHERE day < excluded.day",
+            (str(user_id), day, owner)
+        ).rowcount == 1
+
+    def finish_daily(self, user_id, owner):
+        self.db.execute(
+            "UPDATE daily_played SET owner = NULL WHERE user_id = ? AND owner = ?", (str(user_id), owner)
+        )
+
+    def release_dailies(self, owner):
+        # startup: dailies this owner was running died with it, they can be played again
+        self.db.execute("DELETE FROM daily_played WHERE owner = ?", (owner,))
+
+
+def open_storage(backend, leaderboard_file, database_file, interval=5.0):
+    if backend == "sqlite":
+        return SqliteStorage(database_file, leaderboard_file)
+    if backend == "json":
+        return JsonStorage(leaderboard_file, interval=interval)
+    raise ValueError(f"unknown storage backend {backend!r}")
@@ -1,14 +1,25 @@
-from flask import Flask
-from threading import Thread
-
-app = Flask('')
-@app.route('/')
-def home():
-    return "im mart"
-
-def run():
-    app.run(host='0.0.0.0', port=8080)
-
-def keep_alive():
-    t = Thread(target=run)
+from flask import Flask, Response
+from threading import Thread
+
+import metrics
+
+app = Flask('')
+@app.route('/')
+def home():
+    return "im mart"
+
+@app.route('/metrics')
+def metrics_page():
+    return Response(metrics.expose(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/health')
+def health():
+    healthy, details = metrics.health()
+    return details, 200 if healthy else 503
+
+def run():
+    app.run(host='0.0.0.0', port=8080)
+
+def keep_alive():
+    t = Thread(target=run)
     t.start()
\ No newline at end of file
@@ -0,0 +1,180 @@
+import hashlib
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+
+WORDS_FILE = "words.txt"
+INDEX_FILE = "words_{}.bin"
+
+# a word is 5 letters of 5 bits each, first letter highest, so sorting the
+# keys sorts the words and a word's id is its line in words.txt
+LETTER_BITS = 5
+LETTER_MASK = (1 << LETTER_BITS) - 1
+
+
+def pack(word):
+    b = word.encode()
+    return (b[0] - 97) << 20 | (b[1] - 97) << 15 | (b[2] - 97) << 10 | (b[3] - 97) << 5 | (b[4] - 97)
+
+
+LETTERS = [chr(97 + i) for i in range(1 << LETTER_BITS)]
+PAIRS = [a + b for a in LETTERS for b in LETTERS]  # two letters per lookup
+
+
+def unpack(key):
+    return PAIRS[key >> 15] + PAIRS[key >> 5 & 1023] + LETTERS[key & LETTER_MASK]
+
+
+def _index_path(words_file):
+    with open(words_file, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:12]
+    return os.path.join(os.path.dirname(words_file), INDEX_FILE.format(digest))
+
+
+def build(words_file=WORDS_FILE, path=None):
+    """packs words.txt into a sorted array of uint32 keys and returns its path."""
+    path = path or _index_path(words_file)
+    with open(words_file) as f:
+        words = [line.strip() for line in f]
+
+    keys = []
+    for n, word in enumerate(words, start=1):
+        if len(word) != 5 or not (word.isascii() and word.isalpha() and word.islower()):
+            raise ValueError(f"{words_file}:{n}: {word!r} is not a 5 letter lowercase word")
+        keys.append(pack(word))
+    if any(a >= b for a, b in zip(keys, keys[1:])):
+        # ids are positions in words.txt and journals store them, so never reorder
+        raise ValueError(f"{words_file} must be sorted and without duplicates")
+
+    tmp = f"{path}.{os.getpid()}.tmp"  # shard workers may all build it at once
+    with open(tmp, "wb") as f:
+        array("I", keys).tofile(f)  # native byte order, read back with memoryview.cast("I")
+    os.replace(tmp, path)
+    return path
+
+
+def load(path):
+    # maps the file read-only: the keys live in the page cache, not on the heap
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(b"").cast("I")
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast("I")
+
+
+class WordIndex(Sequence):
+    """
+    every valid guess, id -> word, over the mmap'd key array. ids match the
+    line numbers of words.txt (0-based), same as the old WORDS list.
+    """
+
+    def __init__(self, keys):
+        self.keys = keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getitem__(self, word_id):
+        return unpack(self.keys[word_id])
+
+    def __iter__(self):
+        return map(unpack, self.keys)
+
+    def __contains__(self, word):
+        return self.id(word) is not None
+
+    def id(self, word):
+        """id of a word, or None if it is not a valid guess."""
+        if len(word) != 5 or not (word.isascii() and word.isalpha() and word.islower()):
+            return None
+        key = pack(word)
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return None
+
+    def index(self, word, *args):
+        word_id = self.id(word)
+        if word_id is None:
+            raise ValueError(f"{word!r} is not a valid word")
+        return word_id
+
+
+class WordIds(Mapping):
+    """word -> id, for code written against the old WORD_IDS dict."""
+
+    def __init__(self, words):
+        self.words = words
+
+    def __getitem__(self, word):
+        word_id = self.words.id(word)
+        if word_id is None:
+            raise KeyError(word)
+        return word_id
+
+    def __contains__(self, word):
+        return self.words.id(word) is not None
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def __len__(self):
+        return len(self.words)
+
+
+def open_index(words_file=WORDS_FILE):
+    path = _index_path(words_file)
+    if not os.path.exists(path):
+        build(words_file, path)
+    return WordIndex(load(path))
+
+
+WORDS = open_index()
+WORD_IDS = WordIds(WORDS)
+
+
+if __name__ == "__main__":
+    # startup time and memory: the old list + dict from words.txt vs the
+    # mmap'd index, each in a fresh interpreter
+    import subprocess
+    import sys
+    import timeit
+
+    with open(WORDS_FILE) as f:
+        text_words = [line.strip() for line in f]
+    assert list(WORDS) == text_words
+    assert all(WORDS.id(w) == i for i, w in enumerate(text_words))
+    for bad in ("", "abcd", "abcdef", "ABCDE", "ab1de", "abcd ", "ábcde", "zzzzz", "aaaaa"):
+        assert WORDS.id(bad) == (text_words.index(bad) if bad in text_words else None), bad
+
+    # the stdlib modules both need are loaded by the bot anyway (hashlib by
+    # feedback.py, the rest by discord.py), so they are imported up front
+    PROBE = """
+import array, bisect, collections.abc, hashlib, mmap, os, time
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+before = rss()
+t = time.perf_counter()
+{}
+took = time.perf_counter() - t
+print(took, rss() - before)
+"""
+    LOADERS = {
+        "list + dict": (
+            "with open('words.txt') as f: words = [line.strip() for line in f]\n"
+            "word_ids = {w: i for i, w in enumerate(words)}"
+        ),
+        "mmap index": "import wordindex",
+    }
+    for name, code in LOADERS.items():
+        runs = [subprocess.run([sys.executable, "-c", PROBE.format(code)], capture_output=True, text=True, check=True)
+                for _ in range(5)]
+        took, grew = min(tuple(map(float, r.stdout.split())) for r in runs)
+        print(f"{name:>18}: {took * 1000:6.2f} ms to load, rss +{grew / 1024:7.0f} KiB")
+
+    valid = {w: i for i, w in enumerate(text_words)}
+    for name, check in (("dict", lambda w: w in valid), ("index", WORDS.__contains__)):
+        took = min(timeit.repeat(lambda: check("crane") and check("zzzzz"), number=100_000, repeat=5)) / 200_000
+        print(f"{name:>18}: {took * 1e9:6.0f} ns per validity check")